@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""ASYNC FETCHER - Busca HTTP concorrente com limite por host"""
+
+import time
+import asyncio
+import functools
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimiter, rate_limiter
+
+
+class AsyncFetcher:
+    """
+    Motor asyncio sobre requests.Session
+    
+    Cada host tem um semáforo próprio: no máximo `max_per_host` requisições
+    em voo por host. O ritmo vem do `RateLimiter` (ficha por requisição,
+    ajustado pelo resultado de cada resposta), compartilhado com os demais
+    scrapers do processo, com o balde do host escalado para `max_per_host`
+    fluxos.
+    """
+    
+    def __init__(self, session: Optional[requests.Session] = None, max_per_host: int = 4,
+                 limiter: Optional[RateLimiter] = None, timeout: int = 45,
+                 max_workers: Optional[int] = None):
+        self.session = session or requests.Session()
+        self.max_per_host = max(1, int(max_per_host))
+        self.limiter = limiter or rate_limiter
+        self.timeout = timeout
+        self.max_workers = max_workers or self.max_per_host * 4
+        
+        self._ensure_pool()
+        
+        self._semaphores = {}
+        self._executor = None
+    
+    def _ensure_pool(self):
+        """
+        Pool de conexões keep-alive grande o bastante para a concorrência
+        
+        Só troca o adaptador da sessão se o pool dele for menor que
+        `max_workers`: os fetchers seguintes na mesma sessão reaproveitam o
+        pool (e as conexões abertas), e os retries escolhidos por quem criou
+        a sessão continuam valendo.
+        """
+        for prefix in ('https://', 'http://'):
+            current = self.session.get_adapter(prefix)
+            if getattr(current, '_pool_maxsize', 0) >= self.max_workers:
+                continue
+            retries = getattr(current, 'max_retries', 0)
+            self.session.mount(prefix, HTTPAdapter(pool_connections=8, pool_maxsize=self.max_workers,
+                                                   max_retries=retries))
+            if current not in self.session.adapters.values():
+                current.close()
+    
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+            # O balde do host acompanha a concorrência (senão ela não muda o ritmo)
+            self.limiter.set_streams(url, self.max_per_host)
+        return self._semaphores[host]
+    
+    async def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Executa uma requisição respeitando o limite do host"""
+        kwargs.setdefault('timeout', self.timeout)
+        call = functools.partial(self.session.request, method, url, **kwargs)
+        
+        async with self._semaphore(url):
+            await self.limiter.wait_async(url)
+            
+            start = time.time()
+            try:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self._executor, call)
+            except Exception:
+                self.limiter.observe(url, error=True)
+                raise
+            
+            self.limiter.observe(url, response, time.time() - start)
+            return response
+    
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        return await self.request('GET', url, **kwargs)
+    
+    async def post(self, url: str, **kwargs) -> requests.Response:
+        return await self.request('POST', url, **kwargs)
+    
+    def run(self, coro):
+        """Roda uma corrotina num event loop novo (API síncrona para os scrapers)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self._run(coro)
+
+        # Já há um loop rodando nesta thread (ex.: Playwright sync vivo no
+        # browser_pool): asyncio.run falharia, então roda numa thread auxiliar
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(self._run, coro).result()
+
+    def _run(self, coro):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            self._semaphores = {}
+            try:
+                return asyncio.run(coro)
+            finally:
+                self._executor = None
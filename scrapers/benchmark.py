@@ -0,0 +1,1056 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""⏱️ BENCHMARKS DOS SCRAPERS (sem rede - servidor stub local e dados sintéticos)"""
+
+import io
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import platform
+import threading
+import tracemalloc
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+# ============================================================
+# DADOS SINTÉTICOS
+# ============================================================
+
+SUPERBID_CATEGORIAS = {
+    'carros-motos': 930,
+    'caminhoes-onibus': 410,
+    'embarcacoes-aeronaves': 75,
+    'oportunidades': 620,
+}
+
+TITULOS = [
+    'CHEVROLET ONIX 1.0 LT 2018/2019',
+    'Moto Honda CG 160 Fan 2020',
+    'CAMINHÃO MERCEDES-BENZ ATEGO 1719 2015/2016',
+    'Bicicleta Caloi Elite Carbon',
+    'LANCHA FIBRAFORT 230 GTO',
+    'Patinete elétrico Xiaomi M365',
+    'VW GOL 1.6 MSI TRENDLINE 2017/2018 Placa FINAL 7 (SP)',
+]
+
+
+def superbid_offer(cat_slug: str, n: int) -> dict:
+    """Oferta Superbid sintética e determinística"""
+    rnd = random.Random(f"{cat_slug}-{n}")
+    title = rnd.choice(TITULOS)
+    value = round(rnd.uniform(500, 250000), 2)
+    return {
+        'id': int(f"{zlib.crc32(cat_slug.encode()) % 1000}{n:06d}"),
+        'product': {'shortDesc': title},
+        'auction': {'modalityDesc': 'Leilão', 'desc': f'Leilão {cat_slug} {n // 50}', 'auctioneer': 'Leiloeiro Oficial'},
+        'offerDetail': {'currentMinBid': value, 'currentMinBidFormatted': f'R$ {value:,.2f}'},
+        'seller': {'name': 'Banco Exemplo', 'city': rnd.choice(['São Paulo/SP', 'Curitiba - PR', 'Recife/PE'])},
+        'store': {'name': 'Loja Exemplo'},
+        'offerDescription': {'offerDescription': f'<p>{title}</p>' + '<p>Veículo em bom estado. </p>' * rnd.randint(1, 20)},
+        'endDate': '2030-01-01T12:00:00Z',
+        'lotNumber': n,
+        'visits': rnd.randint(0, 5000),
+        'totalBids': rnd.randint(0, 40),
+        'totalBidders': rnd.randint(0, 15),
+    }
+
+
+# Pedaços para títulos/descrições "sujos" como chegam das fontes
+MARCAS_MODELOS = [
+    ('VOLKSWAGEN', 'GOL 1.6 MSI TRENDLINE'), ('VW', 'SAVEIRO CS ROBUST'), ('CHEVROLET', 'ONIX 1.0 LT'),
+    ('GM', 'S10 LTZ 2.8 4X4 DIESEL'), ('FIAT', 'STRADA WORKING CD'), ('FORD', 'KA SE 1.0'),
+    ('HONDA', 'CG 160 FAN ESDI'), ('YAMAHA', 'FAZER YS250'), ('TOYOTA', 'HILUX SRV 3.0'),
+    ('MERCEDES-BENZ', 'ATEGO 1719'), ('RENAULT', 'SANDERO EXPRESSION'), ('HYUNDAI', 'HB20 COMFORT'),
+    ('LAND ROVER', 'DISCOVERY SPORT'), ('CITROËN', 'C3 TENDANCE'), ('SCANIA', 'R 440 A6X4'),
+]
+PREFIXOS = ['', '', 'Carro ', 'Moto ', 'Caminhonete ', 'LOTE 012 - ', 'Veículo: ', 'SUCATA ', '  ']
+SUFIXOS = ['', ' Placa FINAL 7 (SP)', ' - REMARCADO', ' c/ avarias', ' - sinistro recuperado',
+           ' Placa: ABC1D23', ' ** sem documentação **', ' (MOTOR FUNDIDO)']
+CIDADES = [('São Paulo', 'SP'), ('Guarulhos', 'SP'), ('Curitiba', 'PR'), ('Belo Horizonte', 'MG'),
+           ('Recife', 'PE'), ('Porto Alegre', 'RS'), ('Goiânia', 'GO'), ('Ribeirão Preto', 'SP')]
+PARAGRAFOS = [
+    'Veículo em bom estado de conservação, pneus meia-vida.',
+    'Não acompanha chave reserva nem manual do proprietário.',
+    'Débitos de IPVA e multas por conta do arrematante, conforme edital.',
+    'Lataria com pequenas avarias e riscos na porta traseira direita.',
+    'Motor não testado. Vendido no estado em que se encontra.',
+    'Retirada no pátio em até 10 dias úteis após a confirmação do pagamento.',
+]
+
+
+def titulo_sujo(rnd: random.Random) -> tuple:
+    """Título com caixa misturada, espaços/pontuação extras e ruído, mais marca/modelo/ano"""
+    marca, modelo = rnd.choice(MARCAS_MODELOS)
+    ano = rnd.randint(1998, 2024)
+    ano_txt = rnd.choice([f"{ano}/{ano + 1}", f"{ano}", f"{ano}/{ano}", f"ANO {ano}"])
+    corpo = f"{marca}   {modelo} {ano_txt}"
+    corpo = rnd.choice([corpo, corpo.lower(), corpo.title(), corpo.replace(' ', '_'), f"{corpo},"])
+    return f"{rnd.choice(PREFIXOS)}{corpo}{rnd.choice(SUFIXOS)}", marca, modelo, ano
+
+
+# Descrições longas em HTML: um conjunto fixo reaproveitado (o custo por item
+# é o mesmo e 100k itens não precisam de 100k textos distintos em memória)
+DESCRICOES = []
+for _i in range(128):
+    _rnd = random.Random(f"descricao-{_i}")
+    DESCRICOES.append(
+        '<div class="descricao"><h3>Informações do lote</h3>'
+        + ''.join(f"<p>{_rnd.choice(PARAGRAFOS)}</p>\n" for _ in range(_rnd.randint(5, 80)))
+        + '<ul>' + ''.join(f"<li>Item {k}: {_rnd.choice(PARAGRAFOS)}</li>" for k in range(_rnd.randint(0, 20))) + '</ul></div>'
+    )
+
+
+def sodre_lot(n: int) -> dict:
+    """Lote Sodré sintético (formato do search-lots)"""
+    rnd = random.Random(f"sodre-{n}")
+    titulo, marca, modelo, ano = titulo_sujo(rnd)
+    cidade, uf = rnd.choice(CIDADES)
+    cents = rnd.randint(50000, 25000000)
+    return {
+        'lot_id': 2000000 + n,
+        'auction_id': 27000 + n // 80,
+        'lot_title': titulo,
+        'bid_actual': rnd.choice([cents, f"R$ {cents / 100:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'), None]),
+        'bid_initial': cents,
+        'lot_location': rnd.choice([f"{cidade}/{uf}", f"{cidade} / {uf.lower()}", cidade, '']),
+        'lot_date_end': rnd.choice(['2030-01-01T12:00:00Z', '2030-03-15 14:30:00', None]),
+        'auction_date_init': '2029-12-20T10:00:00Z',
+        'lot_description': rnd.choice(DESCRICOES),
+        'auction_name': f"Leilão de Veículos {n // 80}",
+        'auctioneer_name': 'Sodré Santoro',
+        'lot_number': str(n % 500).zfill(3),
+        'lot_visits': rnd.randint(0, 9000),
+        'bid_count': rnd.randint(0, 60),
+        'lot_status': 'Aberto',
+        'lot_status_id': rnd.choice([1, 2, 3]),
+        'lot_brand': marca,
+        'lot_model': modelo,
+        'lot_plate': rnd.choice(['ABC1D23', 'XYZ-9876', None]),
+        'lot_year_model': ano,
+    }
+
+
+def megaleiloes_texto(n: int) -> tuple:
+    """Texto de card Megaleilões e external_id (cobre os padrões do extrator de título)"""
+    rnd = random.Random(f"megaleiloes-{n}")
+    marca, modelo = rnd.choice(MARCAS_MODELOS)
+    marca = marca.title()
+    ano = rnd.randint(1998, 2024)
+    cidade, uf = rnd.choice(CIDADES)
+    tipo = rnd.choice(['Carro', 'Caminhonete', 'Moto'])
+    slug = f"{tipo}-{marca}-{modelo}".lower().replace(' ', '-').replace('.', '-')
+    titulo = rnd.choice([
+        f"{tipo} {marca} {modelo.title()} - {ano}/{ano + 1}",          # padrão 1
+        f"{tipo} {marca} {modelo.title()} Lote 0{n % 9 + 1} J{117000 + n}",  # padrão 2
+        f"{modelo.title()} usado",                                       # fallback (id)
+    ])
+    valor = f"{rnd.uniform(1000, 300000):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    texto = (f"{titulo} 1º Leilão {rnd.randint(1, 28):02d}/0{rnd.randint(1, 9)}/2030 às 14:00 "
+             f"Lance inicial R$ {valor} {cidade} - {uf} {rnd.randint(0, 40)} lances")
+    external_id = f"megaleiloes_{slug}-{ano}{ano + 1}-lote-{n}-j{117000 + n}"
+    link = f"/leiloes-judiciais/veiculos/{uf.lower()}/{slug}-{ano}{ano + 1}-lote-{n}-j{117000 + n}"
+    return texto, external_id, link
+
+
+def megaleiloes_card_html(n: int) -> str:
+    texto, _, link = megaleiloes_texto(n)
+    partes = texto.split(' Lance inicial ')
+    return (f'<div class="card"><a href="{link}"><img src="/img/{n}.jpg" alt=""></a>'
+            f'<div class="titulo"><a href="{link}">{partes[0]}</a></div>'
+            f'<div class="preco">Lance inicial {partes[1]}</div></div>')
+
+
+# ============================================================
+# SERVIDOR STUB
+# ============================================================
+
+class StubServer:
+    """Servidor HTTP local que imita a API de ofertas Superbid"""
+    
+    def __init__(self, latency: float = 0.1, categorias: dict = None, com_total: bool = True):
+        self.latency = latency
+        self.categorias = categorias or SUPERBID_CATEGORIAS
+        self.com_total = com_total
+        self.requests = 0
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.latency)
+                query = parse_qs(urlsplit(self.path).query)
+                slug = query.get('urlSeo', [''])[0].rstrip('/').split('/')[-1]
+                page = int(query.get('pageNumber', ['1'])[0])
+                size = int(query.get('pageSize', ['100'])[0])
+                
+                total = stub.categorias.get(slug, 0)
+                start = (page - 1) * size
+                if start >= total:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                
+                ns = range(start, min(start + size, total))
+                if query.get('orderBy', [''])[0] == 'id:desc':
+                    ns = [total - 1 - n for n in ns]
+                offers = [superbid_offer(slug, n) for n in ns]
+                data = {'offers': offers, 'total': total} if stub.com_total else {'offers': offers}
+                body = json.dumps(data).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/seo/offers/"
+    
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+
+def _entre_aspas(texto: str) -> list:
+    """Valores "entre aspas" de um filtro do PostgREST, sem os escapes"""
+    return [re.sub(r'\\(.)', r'\1', v) for v in re.findall(r'"((?:[^"\\]|\\.)*)"', texto)]
+
+
+class SupabaseStub:
+    """
+    Servidor local que aceita os POST de upsert, os PATCH de last_scraped_at e a leitura de chaves do PostgREST
+    
+    Latência fixa + por KB do payload; `falhas` é a chance de um 503 passageiro e
+    um batch com external_id em `veneno` é recusado inteiro (400), como o
+    PostgREST faz com uma linha inválida. Leituras devolvem no máximo
+    `max_rows` linhas, como o max-rows do Supabase.
+    """
+    
+    def __init__(self, latency: float = 0.2, por_kb: float = 0.0, falhas: float = 0.0, veneno=(), max_rows: int = 1000):
+        self.latency = latency
+        self.por_kb = por_kb
+        self.falhas = falhas
+        self.veneno = set(veneno)
+        self.max_rows = max_rows
+        self.requests = 0
+        self.rows = 0
+        self.stored = set()
+        self.touched = set()
+        self.bytes = 0
+        self._rnd = random.Random('supabase')
+        self._lock = threading.Lock()
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                rows = json.loads(body)
+                with stub._lock:
+                    stub.requests += 1
+                    stub.bytes += len(self.path) + len(body)
+                    falhou = stub._rnd.random() < stub.falhas
+                time.sleep(stub.latency + stub.por_kb * len(body) / 1024)
+                
+                if falhou:
+                    status = 503
+                elif any(row['external_id'] in stub.veneno for row in rows):
+                    status = 400
+                else:
+                    status = 201
+                    with stub._lock:
+                        stub.rows += len(rows)
+                        stub.stored.update((row['source'], row['external_id']) for row in rows)
+                
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def do_PATCH(self):
+                # ?source=eq.X&external_id=in.("a","b",...)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                query = parse_qs(urlsplit(self.path).query)
+                source = query['source'][0][3:]
+                ids = _entre_aspas(query['external_id'][0])
+                with stub._lock:
+                    stub.requests += 1
+                    stub.bytes += len(self.path) + len(body)
+                time.sleep(stub.latency)
+                with stub._lock:
+                    stub.touched.update((source, i) for i in ids)
+                
+                self.send_response(204)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def do_GET(self):
+                # ?select=source,external_id&order=source,external_id&limit=N
+                # [&or=(source.gt."S",and(source.eq."S",external_id.gt."E"))]
+                query = parse_qs(urlsplit(self.path).query)
+                with stub._lock:
+                    stub.requests += 1
+                    keys = sorted(stub.stored)
+                if 'or' in query:
+                    source, _, external_id = _entre_aspas(query['or'][0])
+                    keys = [k for k in keys if k > (source, external_id)]
+                time.sleep(stub.latency)
+                
+                limit = min(int(query['limit'][0]), stub.max_rows)
+                body = json.dumps([{'source': k[0], 'external_id': k[1]} for k in keys[:limit]]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+    
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# ============================================================
+# BENCHMARKS
+# ============================================================
+
+def _ordenados(items: list) -> list:
+    """Itens em ordem estável, independente da ordem de chegada das páginas"""
+    return sorted(items, key=lambda item: (item['source'], str(item['external_id'])))
+
+
+def bench_superbid(concorrencias=(1, 2, 4, 8), latency: float = 0.1, rate=(5.0, 20.0)):
+    """Wall-clock de scrape_superbid + oportunidades contra o stub (plano x sondagem)"""
+    from veiculos import VeiculosScraper
+    from rate_limiter import RateLimiter
+    
+    print("\n🔴 SUPERBID (stub local)")
+    print(f"   latência {latency}s | ritmo inicial {rate[0]} req/s por fluxo (máx {rate[1]})")
+    
+    baseline = None
+    base_time = None
+    
+    for com_total in (True, False):
+        print(f"   {'plano pelo total' if com_total else 'sondagem (sem total)'}:")
+        
+        with StubServer(latency=latency, com_total=com_total) as stub:
+            for c in concorrencias:
+                scraper = VeiculosScraper(superbid_concurrency=c)
+                scraper.SUPERBID_API = stub.url
+                scraper.limiter = RateLimiter(default=rate)
+                stub.requests = 0
+                
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    items = scraper.scrape_superbid() + scraper.scrape_superbid_oportunidades()
+                elapsed = time.perf_counter() - start
+                
+                if baseline is None:
+                    baseline, base_time = items, elapsed
+                # Páginas de categorias diferentes chegam intercaladas: compara o conjunto
+                same = '✅ idêntico' if _ordenados(items) == _ordenados(baseline) else '❌ DIFERENTE'
+                ritmo = next(iter(scraper.limiter.report().values()))['rate']
+                print(f"     concorrência {c}: {elapsed:6.2f}s | {stub.requests} req "
+                      f"({scraper.stats['superbid_requests_saved']} economizadas) | "
+                      f"{len(items)} itens | {base_time / elapsed:4.1f}x | {ritmo} req/s | {same}")
+
+
+def _medir(fn, entradas: list, repeticoes: int) -> tuple:
+    """Melhor tempo de `repeticoes` passadas e pico de memória (passada separada: tracemalloc pesa no tempo)"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        start = time.perf_counter()
+        for entrada in entradas:
+            fn(entrada)
+        melhor = min(melhor, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    saidas = [fn(entrada) for entrada in entradas]
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del saidas
+    return melhor, pico
+
+
+def bench_cpu(tamanhos=(1000, 10000, 100000), repeticoes: int = 3, saida: str = None, comparar: str = None) -> dict:
+    """
+    Itens/s e pico de memória dos caminhos de CPU (limpeza, normalização, _prepare)
+    
+    Os dados são sintéticos e determinísticos: títulos sujos, descrições
+    longas em HTML, valores em centavos e em texto. Os resultados vão para
+    JSON (`saida`); com `comparar`, mostra a variação contra um JSON anterior.
+    """
+    from veiculos import VeiculosScraper
+    from veiculosnormalizer import VehicleDataNormalizer
+    from supabase_client import SupabaseClient
+    
+    maior = max(tamanhos)
+    scraper = VeiculosScraper()
+    normalizer = VehicleDataNormalizer()
+    client = SupabaseClient.__new__(SupabaseClient)  # _prepare não usa credenciais
+    
+    print(f"\n🧮 CPU ({', '.join(f'{n:,}' for n in tamanhos)} itens, melhor de {repeticoes})")
+    start = time.perf_counter()
+    
+    sodre = [sodre_lot(i) for i in range(maior)]
+    superbid = [superbid_offer('carros-motos', i) for i in range(maior)]
+    textos = [megaleiloes_texto(i)[:2] for i in range(maior)]
+    
+    # Cards parseados custam memória: um conjunto fixo, repetido até o tamanho
+    html = ''.join(megaleiloes_card_html(i) for i in range(min(maior, 2000)))
+    pool = scraper._megaleiloes_cards(html)
+    cards = [pool[i % len(pool)] for i in range(maior)]
+    
+    # Normalizer e _prepare recebem a saída real dos extratores, alternando as fontes
+    limpos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(maior):
+            if i % 3 == 0:
+                item = scraper._clean_sodre_item(sodre[i])
+            elif i % 3 == 1:
+                item = scraper._clean_superbid_offer(superbid[i], 'carros-motos')
+            else:
+                item = scraper._extract_megaleiloes_card(cards[i])
+            if item:
+                limpos.append(item)
+    limpos = [limpos[i % len(limpos)] for i in range(maior)]
+    
+    print(f"   dados gerados em {time.perf_counter() - start:.1f}s")
+    
+    funcoes = {
+        'veiculos._clean_sodre_item': (scraper._clean_sodre_item, sodre),
+        'veiculos._clean_superbid_offer': (lambda o: scraper._clean_superbid_offer(o, 'carros-motos'), superbid),
+        'veiculos._extract_megaleiloes_card': (scraper._extract_megaleiloes_card, cards),
+        'veiculos._extract_megaleiloes_title': (lambda t: scraper._extract_megaleiloes_title(*t), textos),
+        'VehicleDataNormalizer.normalize': (normalizer.normalize, limpos),
+        'SupabaseClient._prepare': (client._prepare, limpos),
+    }
+    
+    anterior = {}
+    if comparar:
+        with open(comparar, encoding='utf-8') as f:
+            anterior = json.load(f).get('resultados', {})
+    
+    resultados = {}
+    for nome, (fn, entradas) in funcoes.items():
+        print(f"   {nome}:")
+        resultados[nome] = {}
+        for n in tamanhos:
+            segundos, pico = _medir(fn, entradas[:n], repeticoes)
+            r = {
+                'itens': n,
+                'segundos': round(segundos, 4),
+                'itens_por_s': round(n / segundos, 1),
+                'pico_kb': round(pico / 1024, 1),
+            }
+            resultados[nome][str(n)] = r
+            
+            linha = f"     {n:>7,} itens: {r['itens_por_s']:>10,.0f} itens/s | pico {r['pico_kb']:>9,.0f} KB"
+            antes = anterior.get(nome, {}).get(str(n))
+            if antes:
+                delta = r['itens_por_s'] / antes['itens_por_s'] - 1
+                alerta = ' ⚠️' if delta < -0.10 else ''
+                linha += f" | {delta:+.0%} vs anterior{alerta}"
+            print(linha)
+    
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'maquina': platform.platform(),
+        'repeticoes': repeticoes,
+        'resultados': resultados,
+    }
+    
+    saida = Path(saida or f"benchmark_data/cpu_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"   💾 {saida}")
+    
+    return relatorio
+
+
+# Casos em que o `in` antigo erra (falso positivo ou marca mais curta)
+MARCAS_CASOS = [
+    ('Carro sem marca - acompanha MANUAL e chave reserva', None),
+    ('Bicicleta para SKIAR na neve', None),
+    ('Caminhão MERCEDES-BENZ ATEGO 1719', 'Mercedes-Benz'),
+    ('LAND  ROVER DISCOVERY SPORT 2019', 'Land Rover'),
+    ('Moto HARLEY-DAVIDSON Fat Boy', 'Harley-Davidson'),
+    ('VOLKSWAGEN_GOL 1.6 2015', 'Volkswagen'),
+    ('CAMINHÃO MAN TGX 29.440', 'Man'),
+    ('Kia Sportage EX 2012', 'Kia'),
+]
+
+
+def _marca_loop(normalizer, item: dict):
+    """_get_brand antigo: um `in` por marca sobre título + descrição em maiúsculas"""
+    text = f"{item.get('title', '')} {item.get('description', '')}".upper()
+    for brand in normalizer.KNOWN_BRANDS:
+        if brand in text:
+            return brand.title()
+    return None
+
+
+def bench_marcas(tamanhos=(1000, 10000, 100000), repeticoes: int = 3):
+    """Detecção de marca: loop de `in` por marca x KeywordMatcher (uma passada)"""
+    from veiculosnormalizer import VehicleDataNormalizer, ExtractionContext
+    
+    normalizer = VehicleDataNormalizer()
+    marca = lambda item: ExtractionContext(item, normalizer).brand
+    maior = max(tamanhos)
+    
+    # Itens sem metadata de veículo: o caminho que varre título e descrição
+    itens = []
+    for i in range(maior):
+        rnd = random.Random(f"marca-{i}")
+        titulo = titulo_sujo(rnd)[0] if i % 4 else rnd.choice(['Lote de sucata diversa', 'Veículo conforme edital'])
+        itens.append({'title': titulo, 'description': rnd.choice(DESCRICOES), 'metadata': {}})
+    
+    print(f"\n🏷️ MARCAS ({len(normalizer.KNOWN_BRANDS)} marcas, melhor de {repeticoes})")
+    for n in tamanhos:
+        entradas = itens[:n]
+        t_loop, _ = _medir(lambda item: _marca_loop(normalizer, item), entradas, repeticoes)
+        t_matcher, _ = _medir(marca, entradas, repeticoes)
+        diferentes = sum(_marca_loop(normalizer, item) != marca(item) for item in entradas)
+        print(f"     {n:>7,} itens: loop {n / t_loop:>9,.0f} itens/s | matcher {n / t_matcher:>9,.0f} itens/s "
+              f"| {t_loop / t_matcher:4.1f}x | {diferentes} resultado(s) diferente(s)")
+    
+    print("   casos:")
+    for titulo, esperado in MARCAS_CASOS:
+        item = {'title': titulo, 'description': '', 'metadata': {}}
+        novo = marca(item)
+        ok = '✅' if novo == esperado else '❌'
+        print(f"     {ok} {titulo!r}: loop {_marca_loop(normalizer, item)} | matcher {novo}")
+
+
+def bench_paralelo(tamanho: int = 20000, processos=None):
+    """normalize_vehicles com 1..N processos (escala com os núcleos?)"""
+    import os
+    from veiculos import VeiculosScraper
+    from veiculosnormalizer import normalize_vehicles
+    
+    nucleos = os.cpu_count() or 1
+    processos = processos or sorted({1, 2, 4, 8, nucleos} & set(range(1, nucleos + 1)))
+    scraper = VeiculosScraper()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        itens = [
+            scraper._clean_sodre_item(sodre_lot(i)) if i % 2
+            else scraper._clean_superbid_offer(superbid_offer('carros-motos', i), 'carros-motos')
+            for i in range(tamanho)
+        ]
+    
+    print(f"\n🧵 NORMALIZAÇÃO EM PARALELO ({tamanho:,} itens, {nucleos} núcleo(s))")
+    base = None
+    referencia = None
+    for p in processos:
+        start = time.perf_counter()
+        saida = normalize_vehicles(itens, workers=p)
+        elapsed = time.perf_counter() - start
+        
+        base = base or elapsed
+        referencia = referencia or saida
+        same = '✅ mesma ordem/saída' if saida == referencia else '❌ DIFERENTE'
+        print(f"     {p} processo(s): {elapsed:6.2f}s | {tamanho / elapsed:>8,.0f} itens/s | {base / elapsed:4.1f}x | {same}")
+
+
+# Títulos do feed "oportunidades": mobilidade, outras categorias e falsos positivos do `in`
+OPORTUNIDADES_TITULOS = [
+    'Bicicleta Caloi Elite Carbon aro 29', 'Lote com 12 bicicletas infantis', 'Patinete elétrico Xiaomi M365',
+    'Skate Longboard Mormaii', 'Quadriciclo Honda Fourtrax 2015', 'Hoverboard 6.5 polegadas',
+    'Notebook Dell Inspiron 15', 'Computadores e monitores diversos', 'Impressora HP LaserJet',
+    'Fogão Brastemp 5 bocas', 'Geladeira Electrolux Frost Free', 'Ar  condicionado Split 12000 BTUs',
+    'Lote de calçados femininos', 'Relógio Citizen Eco-Drive', 'Tênis Nike Air Max',
+    'Placa PCB para reparo', 'Speedometro automotivo digital', 'Caixa de chapéus (shape)',
+    'Mesa de escritório em MDF', 'Sucata de ferro 2 toneladas', 'Cadeira gamer reclinável',
+    'Lote misto: notebook, fogão e relógio', 'Celular Samsung e ventilador de mesa',
+]
+
+# lot_category dos lotes do índice materiais da Sodré
+MATERIAIS_CATEGORIAS = ['Informática', 'Eletrodomésticos', 'Diversos', 'Utilidades domésticas', 'Celulares']
+
+
+def _casa_loop(item: dict, palavras: list, campos: list) -> bool:
+    """Filtro antigo de uma categoria: `in` por palavra nos campos dela"""
+    textos = [(item.get(campo) or '').lower() for campo in campos]
+    return any(k in texto for k in palavras for texto in textos)
+
+
+def _rotas_loop(lotes: list, categorias: dict) -> dict:
+    """route() antigo: um filtro por categoria, cada um percorrendo o download inteiro"""
+    return {
+        categoria: [lote for lote in lotes if _casa_loop(lote, cfg['keywords'], cfg['campos'])]
+        for categoria, cfg in categorias.items()
+    }
+
+
+def bench_classificacao(tamanho: int = 20000, repeticoes: int = 3):
+    """Feed oportunidades: route() antigo (um loop de `in` por categoria) x uma passada do category_classifier"""
+    import veiculos
+    import tecnologia
+    import bens_consumo
+    import eletrodomesticos
+    from category_classifier import category_classifier
+    from sodre_materiais import sodre_materiais, SodreMateriais
+    
+    scraper = veiculos.VeiculosScraper()
+    categorias = sodre_materiais.categorias
+    
+    itens = []
+    for i in range(tamanho):
+        offer = superbid_offer('oportunidades', i)
+        titulo = random.Random(f"oportunidade-{i}").choice(OPORTUNIDADES_TITULOS)
+        descricao = offer['offerDescription']['offerDescription'].split('</p>', 1)[1]
+        offer['product']['shortDesc'] = titulo
+        offer['offerDescription']['offerDescription'] = f"<p>{titulo}</p>{descricao}"
+        itens.append(scraper._clean_superbid_offer(offer, 'oportunidades'))
+    
+    # O mesmo feed como lotes do índice materiais (campos da Sodré)
+    lotes = [
+        {'lot_id': i, 'lot_title': item['title'],
+         'lot_category': random.Random(f"categoria-{i}").choice(MATERIAIS_CATEGORIAS)}
+        for i, item in enumerate(itens)
+    ]
+    
+    print(f"\n🗂️ CLASSIFICAÇÃO (oportunidades, {tamanho:,} lotes, {len(categorias)} categorias do índice materiais)")
+    roteador = SodreMateriais()
+    roteador.categorias = categorias
+    t_loop, _ = _medir(lambda l: _rotas_loop(l, categorias), [lotes], repeticoes)
+    t_novo, _ = _medir(roteador._route_all, [lotes], repeticoes)
+    print(f"   route: {len(categorias)} loops {tamanho / t_loop:>9,.0f} lotes/s | "
+          f"1 passada {tamanho / t_novo:>9,.0f} lotes/s | {t_loop / t_novo:4.1f}x")
+    
+    # Caminho quente: is_mobility_vehicle roda para toda oferta
+    mobilidade = category_classifier.keywords['mobilidade']
+    t_loop, _ = _medir(lambda item: _casa_loop({'texto': f"{item['title']} {item['description']}"},
+                                               mobilidade, ['texto']), itens, repeticoes)
+    t_novo, _ = _medir(lambda item: scraper.is_mobility_vehicle(item['title'], item['description']), itens, repeticoes)
+    print(f"   mobilidade: loop {tamanho / t_loop:>9,.0f} lotes/s | matcher {tamanho / t_novo:>9,.0f} lotes/s | {t_loop / t_novo:4.1f}x")
+    
+    antes = _rotas_loop(lotes, categorias)
+    depois = roteador._route_all(lotes)
+    for categoria in categorias:
+        print(f"     • {categoria}: loops {len(antes[categoria]):>6,} | classificador {len(depois[categoria]):>6,}")
+    
+    classes = {}
+    for modo, rotas in (('antes', antes), ('depois', depois)):
+        for categoria, aceitos in rotas.items():
+            for lote in aceitos:
+                classes.setdefault(lote['lot_id'], {'antes': set(), 'depois': set()})[modo].add(categoria)
+    multi = {modo: sum(len(c[modo]) > 1 for c in classes.values()) for modo in ('antes', 'depois')}
+    print(f"     • em 2+ categorias: loops {multi['antes']:,} | classificador {multi['depois']:,}")
+    
+    exemplos = {}
+    for lote in lotes:
+        c = classes.get(lote['lot_id'], {'antes': set(), 'depois': set()})
+        if c['antes'] != c['depois']:
+            exemplos.setdefault((lote['lot_title'], lote['lot_category']), (c['antes'], c['depois']))
+    print("   diferenças:")
+    for (titulo, categoria), (a, d) in list(exemplos.items())[:10]:
+        print(f"     {titulo!r} ({categoria}): loops {sorted(a) or '-'} | classificador {sorted(d) or '-'}")
+
+
+
+# Corpus do filtro de teste/demo: (título, prévia da descrição)
+TESTE_CASOS = [
+    ('CHEVROLET ONIX 1.0 LT 2018/2019', 'Veículo em bom estado'),
+    ('Lote DEMO - não ofertar', ''),
+    ('Teste de integração', ''),
+    ('TESTES automatizados', ''),              # ^teste sem limite à direita
+    ('Testemunha ocular', ''),
+    ('Carro com testemunho', 'sem teste de rodagem'),
+    ('Moto Honda CG 160', 'Demonstração de funcionamento'),
+    ('Moto Honda CG 160', 'sem demonstracao'),
+    ('Veículo para codemo', ''),               # colado numa palavra: não conta
+    ('pytest_runner', ''),
+    ('test_lote', ''),                          # "_" é letra para o \b
+    ('Oferta deploy', ''),
+    ('Oferta de teste', 'após o deployment'),   # casou "teste", motivo deploy
+    ('Deployment automático', ''),            # só "deploy" colado: não conta
+    ('Bike democrática', ''),
+    ('demo-day Caloi', ''),
+    ('Caminhão test-drive', 'DEPLOY'),
+    ('Semidemonstração', ''),
+    ('Lancha 230 GTO', 'testeira nova, demo.'),
+    ('', ''),
+]
+
+
+TESTE_PADROES_ANTIGOS = [
+    re.compile(p, re.IGNORECASE)
+    for p in [r'\bdemo\b', r'\bteste\b', r'\btest\b', r'\bdeploy\b', r'^teste', r'demonstra[cç][aã]o']
+]
+
+
+def _is_test_item_antigo(item: dict) -> tuple:
+    """is_test_item antigo: 6 regex (IGNORECASE) buscadas no título e na prévia, uma a uma"""
+    store = item.get('store_name')
+    if not store or not str(store).strip():
+        return True, 'no_store'
+    if 'demo' in str(item.get('store_name', '')).lower():
+        return True, 'demo_seller'
+    if 'demo' in str(item.get('auction_name', '')).lower():
+        return True, 'demo_auctioneer'
+    
+    title = str(item.get('title', '')).lower()
+    desc = str(item.get('description_preview', '')).lower()
+    for pattern in TESTE_PADROES_ANTIGOS:
+        if pattern.search(title) or pattern.search(desc):
+            if 'deploy' in title or 'deploy' in desc:
+                return True, 'deploy_text'
+            return True, 'test_text'
+    return False, ''
+
+
+def bench_teste(tamanhos=(1000, 10000, 100000), repeticoes: int = 3) -> int:
+    """Filtro de teste/demo da Superbid: 6 regex x TEST_PATTERN (uma passada por campo); retorna os vereditos diferentes"""
+    import veiculos
+    
+    scraper = veiculos.VeiculosScraper()
+    maior = max(tamanhos)
+    
+    # Feed Superbid limpo; ~2% com uma das frases do corpus no título ou na descrição
+    itens = []
+    for i in range(maior):
+        offer = superbid_offer(random.Random(f"teste-{i}").choice(list(SUPERBID_CATEGORIAS)), i)
+        rnd = random.Random(f"teste-{i}")
+        if rnd.random() < 0.02:
+            titulo, descricao = rnd.choice(TESTE_CASOS)
+            offer['product']['shortDesc'] = titulo or offer['product']['shortDesc']
+            offer['offerDescription']['offerDescription'] = f"<p>{descricao}</p>" + offer['offerDescription']['offerDescription']
+        itens.append(scraper._clean_superbid_offer(offer, 'oportunidades'))
+    
+    print(f"\n🧪 FILTRO TESTE/DEMO (melhor de {repeticoes})")
+    falhas = 0
+    for n in tamanhos:
+        entradas = itens[:n]
+        t_antigo, _ = _medir(_is_test_item_antigo, entradas, repeticoes)
+        t_novo, _ = _medir(scraper.is_test_item, entradas, repeticoes)
+        diferentes = sum(_is_test_item_antigo(item) != scraper.is_test_item(item) for item in entradas)
+        falhas += diferentes
+        print(f"     {n:>7,} itens: 6 regex {n / t_antigo:>10,.0f} itens/s | fundida {n / t_novo:>10,.0f} itens/s "
+              f"| {t_antigo / t_novo:4.1f}x | {diferentes} veredito(s) diferente(s)")
+    
+    print("   corpus:")
+    for titulo, descricao in TESTE_CASOS:
+        item = {'store_name': 'Loja Exemplo', 'title': titulo, 'description_preview': descricao}
+        antigo, novo = _is_test_item_antigo(item), scraper.is_test_item(item)
+        ok = '✅' if antigo == novo else '❌'
+        falhas += antigo != novo
+        print(f"     {ok} {titulo!r} / {descricao!r}: {novo[1] or '-'}")
+    
+    return falhas
+
+
+
+def _deduplicate(items: list) -> list:
+    """Remove duplicatas (run() antigo; o pipeline deduplica no fluxo)"""
+    seen = set()
+    unique = []
+    
+    for item in items:
+        key = (item['source'], item['external_id'])
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    
+    return unique
+
+
+def _save_json(items: list, output_dir: str = 'veiculos_data') -> str:
+    """Salva JSON de uma vez (run() antigo)"""
+    Path(output_dir).mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filepath = f"{output_dir}/veiculos_{timestamp}.json"
+    
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+    
+    return filepath
+
+
+def _upload_em_lote(items: list):
+    """Upload único no fim (run() antigo)"""
+    from supabase_client import SupabaseClient
+    
+    print(f"\n📤 Enviando {len(items)} itens para Supabase...")
+    
+    if not items:
+        print("  ⚠️ Nenhum item para enviar")
+        return {'inserted': 0, 'updated': 0, 'errors': 0}
+    
+    try:
+        totals = SupabaseClient().upsert('veiculos', items)
+        print(f"\n  ✅ TOTAL: {totals['inserted']} novos, {totals['updated']} atualizados, {totals['errors']} erros")
+        return totals
+        
+    except Exception as e:
+        print(f"  ❌ Erro geral: {e}")
+        return None
+
+
+def _run_em_lote(scraper) -> dict:
+    """run() antigo: raspa tudo, deduplica, salva, normaliza e só então envia"""
+    from veiculosnormalizer import normalize_vehicles
+    
+    items = scraper.scrape_superbid() + scraper.scrape_superbid_oportunidades()
+    unique = _deduplicate(items)
+    _save_json(unique)
+    with open('veiculos_data/veiculos_normalized.json', 'w', encoding='utf-8') as f:
+        json.dump(normalize_vehicles(unique), f, ensure_ascii=False, indent=2)
+    return _upload_em_lote(unique)
+
+
+def bench_pipeline(latency: float = 0.1, upsert_latency: float = 0.3, rate=(1.0, 5.0)):
+    """run() em lote x pipeline (scrape e upload sobrepostos), Superbid e Supabase locais"""
+    import os
+    import tempfile
+    from veiculos import VeiculosScraper
+    from rate_limiter import RateLimiter
+    from change_store import change_store
+    
+    change_store.enabled = False  # compara o envio completo nos dois modos
+    print("\n🔀 PIPELINE (Superbid + Supabase locais)")
+    print(f"   latência Superbid {latency}s | upsert {upsert_latency}s por batch")
+    
+    cwd = os.getcwd()
+    with StubServer(latency=latency) as superbid, SupabaseStub(latency=upsert_latency) as supabase, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(SUPABASE_URL=supabase.url, SUPABASE_SERVICE_ROLE_KEY='benchmark')
+        os.chdir(tmp)
+        try:
+            resultados = {}
+            for modo in ('lote', 'pipeline'):
+                scraper = VeiculosScraper()
+                scraper.SUPERBID_API = superbid.url
+                scraper.limiter = RateLimiter(default=rate)
+                supabase.rows = 0
+                
+                tracemalloc.start()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if modo == 'lote':
+                        _run_em_lote(scraper)
+                    else:
+                        scraper.run(fonte='superbid')
+                elapsed = time.perf_counter() - start
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                
+                resultados[modo] = elapsed
+                extra = ''
+                if scraper.pipeline:
+                    s = scraper.pipeline.stats['enviar']
+                    extra = f" | envio ocupado {s['seconds']:.1f}s | fila máx {scraper.pipeline.peak}"
+                print(f"     {modo:>8}: {elapsed:6.2f}s | {supabase.rows} linhas enviadas | "
+                      f"pico {pico / 2**20:6.1f} MB{extra}")
+            
+            print(f"   {resultados['lote'] / resultados['pipeline']:4.1f}x")
+        finally:
+            os.chdir(cwd)
+
+
+def _upsert_antigo(client, tabela: str, items: list) -> dict:
+    """SupabaseClient.upsert antigo: batches de 500 em sequência, 0.5s entre eles, batch com erro perdido"""
+    prepared = [row for row in map(client._prepare, items) if row]
+    stats = {'inserted': 0, 'updated': 0, 'errors': 0}
+    url = f"{client.url}/rest/v1/{tabela}"
+    for i in range(0, len(prepared), 500):
+        batch = prepared[i:i + 500]
+        try:
+            r = client.session.post(url, json=batch, timeout=120)
+            stats['inserted' if r.status_code in (200, 201) else 'errors'] += len(batch)
+        except Exception:
+            stats['errors'] += len(batch)
+        if i + 500 < len(prepared):
+            time.sleep(0.5)
+    return stats
+
+
+def bench_upsert(tamanhos=(1000, 3000, 10000), latency: float = 0.1, por_kb: float = 0.001,
+                 cenarios=((0.0, 0), (0.05, 3))):
+    """Upsert contra um PostgREST local: antigo (sequencial) x concorrente, por bytes, com retry e bisseção"""
+    import os
+    from supabase_client import SupabaseClient
+    from veiculos import VeiculosScraper
+    from change_store import change_store
+    
+    change_store.enabled = False  # compara o envio completo nos dois modos
+    scraper = VeiculosScraper()
+    itens = [scraper._clean_sodre_item(sodre_lot(i)) for i in range(max(tamanhos))]
+    # Metade sem descrição (como os cards do Megaleilões): linhas de ~1 KB e de ~5 KB misturadas
+    for item in itens[::2]:
+        item.update(description=None, description_preview=item['title'])
+    print(f"\n📤 UPSERT (PostgREST local: {latency}s + {por_kb * 1000:.1f}ms/KB)")
+    
+    for falhas, venenos in cenarios:
+        print(f"   {falhas:.0%} de 503, {venenos} linhas inválidas:")
+        for n in tamanhos:
+            veneno = {itens[i]['external_id'] for i in random.Random(n).sample(range(n), venenos)}
+            
+            linha = f"     {n:>6,} itens:"
+            tempos = {}
+            for modo in ('antigo', 'novo'):
+                with SupabaseStub(latency, por_kb, falhas, veneno) as stub:
+                    os.environ.update(SUPABASE_URL=stub.url, SUPABASE_SERVICE_ROLE_KEY='benchmark')
+                    client = SupabaseClient()
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        if modo == 'antigo':
+                            stats = _upsert_antigo(client, 'veiculos', itens[:n])
+                        else:
+                            stats = client.upsert('veiculos', itens[:n])
+                    tempos[modo] = time.perf_counter() - start
+                
+                linha += f" {modo} {tempos[modo]:6.2f}s, {n - len(stub.stored):>4} perdidos |"
+                if modo == 'novo':
+                    falhos = {f['external_id'] for f in stats['failed']}
+                    exato = '✅' if falhos == veneno and stats['inserted'] == len(stub.stored) else '❌'
+                    linha += (f" {tempos['antigo'] / tempos['novo']:4.1f}x | {stats['batches']} batches "
+                              f"(fim: {client.batch_bytes // 1024} KB), {stub.requests} req, {stats['retries']} retries, "
+                              f"{stats['splits']} divisões | {exato} por linha")
+            print(linha)
+
+
+def bench_mudancas(tamanho: int = 10000, alterados: float = 0.05, latency: float = 0.1, por_kb: float = 0.001):
+    """
+    Reexecução com poucos lotes alterados contra um PostgREST local
+    
+    Modos: upsert de tudo, change_store (só novos/alterados + PATCH), refresh
+    (campos quentes) e change_store vazio na 2ª execução (cache perdido: a
+    leitura das chaves do banco ainda separa novos de atualizados).
+    """
+    import os
+    import tempfile
+    import supabase_client
+    from supabase_client import SupabaseClient
+    from change_store import ChangeStore
+    from veiculos import VeiculosScraper
+    
+    scraper = VeiculosScraper()
+    itens = [scraper._clean_sodre_item(sodre_lot(i)) for i in range(tamanho)]
+    for item in itens[::2]:
+        item.update(description=None, description_preview=item['title'])
+    
+    # Segunda execução: `alterados` com lance novo, 1% de lotes novos, o resto igual
+    rnd = random.Random('mudancas')
+    segunda = [dict(item) for item in itens]
+    for item in rnd.sample(segunda, int(tamanho * alterados)):
+        item.update(value=(item.get('value') or 0) + 500, total_bids=(item.get('total_bids') or 0) + 1)
+    novos = [scraper._clean_sodre_item(sodre_lot(tamanho + i)) for i in range(tamanho // 100)]
+    segunda += novos
+    
+    print(f"\n🧮 MUDANÇAS ({tamanho:,} lotes, {alterados:.0%} alterados + {len(novos)} novos na 2ª execução)")
+    
+    original = supabase_client.change_store
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for modo in ('tudo', 'mudancas', 'rapido', 'sem cache'):
+                store = ChangeStore(cache_dir=f"{tmp}/{modo}")
+                store.enabled = modo != 'tudo'
+                supabase_client.change_store = store
+                
+                with SupabaseStub(latency, por_kb) as stub:
+                    os.environ.update(SUPABASE_URL=stub.url, SUPABASE_SERVICE_ROLE_KEY='benchmark')
+                    for execucao, lote in (('1ª', itens), ('2ª', segunda)):
+                        stub.requests = stub.rows = stub.bytes = 0
+                        stub.touched = set()
+                        esperados = sum((i['source'], i['external_id']) not in stub.stored for i in lote)
+                        if modo == 'sem cache' and lote is segunda:
+                            supabase_client.change_store = ChangeStore(cache_dir=f"{tmp}/vazio")
+                        start = time.perf_counter()
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            client = SupabaseClient()
+                            if modo == 'rapido' and lote is segunda:
+                                stats = client.refresh('veiculos', lote)
+                            else:
+                                stats = client.upsert('veiculos', lote)
+                        elapsed = time.perf_counter() - start
+                        
+                        cobertos = len(stub.touched) + stub.rows
+                        exato = cobertos == len(lote) and stats['inserted'] == esperados and not stats['errors']
+                        print(f"     {modo:>9} {execucao}: {elapsed:6.2f}s | {stub.requests:>3} req | "
+                              f"{stub.bytes / 2**20:6.2f} MB | {stub.rows:>6,} linhas + {len(stub.touched):>6,} só last_scraped_at | "
+                              f"{stats['new']} novos, {stats['changed']} alterados ({stats['refreshed']} só campos quentes), "
+                              f"{stats['unchanged']} iguais | {stats['inserted']} inseridos, {stats['updated']} atualizados "
+                              f"{'✅' if exato else '❌'}")
+    finally:
+        supabase_client.change_store = original
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('alvo', choices=['superbid', 'cpu', 'marcas', 'paralelo', 'classificacao', 'teste', 'pipeline', 'upsert', 'mudancas', 'all'], nargs='?', default='all')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Quantidades de itens do benchmark de CPU')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', help='JSON de resultados (padrão: benchmark_data/cpu_<data>.json)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("⏱️ BENCHMARKS")
+    print("="*60)
+    
+    falhas = 0
+    
+    if args.alvo in ('superbid', 'all'):
+        bench_superbid()
+    
+    if args.alvo in ('cpu', 'all'):
+        bench_cpu(args.tamanhos, args.repeticoes, args.saida, args.comparar)
+    
+    if args.alvo in ('marcas', 'all'):
+        bench_marcas(args.tamanhos, args.repeticoes)
+    
+    if args.alvo in ('paralelo', 'all'):
+        bench_paralelo()
+    
+    if args.alvo in ('classificacao', 'all'):
+        bench_classificacao(repeticoes=args.repeticoes)
+    
+    if args.alvo in ('teste', 'all'):
+        falhas += bench_teste(args.tamanhos, args.repeticoes)
+    
+    if args.alvo in ('pipeline', 'all'):
+        bench_pipeline()
+    
+    if args.alvo in ('upsert', 'all'):
+        bench_upsert()
+    
+    if args.alvo in ('mudancas', 'all'):
+        bench_mudancas()
+    
+    print("\n" + "="*60)
+    
+    # Vereditos diferentes do filtro antigo são regressão, não só uma linha no relatório
+    if falhas:
+        print(f"❌ {falhas} veredito(s) de teste/demo diferente(s) do filtro antigo")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,11 @@
 
 import json
 import time
-import random
 import requests
 from datetime import datetime
 from pathlib import Path
-from playwright.sync_api import sync_playwright
+from rate_limiter import rate_limiter
+from sodre_materiais import sodre_materiais
 
 CATEGORIA = "bens_consumo"
 TABELA_DB = "bens_consumo"
@@ -30,51 +30,21 @@ class Normalizador:
 
 
 class SodreExtractor:
-    API = "https://www.sodresantoro.com.br/api/search-lots"
-    INDICES = ["materiais"]
+    # Também vão para a busca da Sodré como cláusulas should/match (com e sem acento,
+    # como "fogao"/"fogão" em eletrodomesticos; o classificador local ignora acentos)
+    KEYWORDS = ['roupa', 'calcado', 'calçado', 'tenis', 'tênis', 'sapato', 'bolsa', 'relogio', 'relógio',
+                'joia', 'acessorio', 'acessório']
+    CAMPOS = ['lot_title']
     
     def extrair(self):
         print("\n🔵 SODRÉ")
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto("https://www.sodresantoro.com.br", timeout=30000)
-            time.sleep(2)
-            cookies = {c["name"]: c["value"] for c in page.context.cookies()}
-            browser.close()
-        
-        items = []
-        for pag in range(15):
-            payload = {
-                "indices": self.INDICES,
-                "query": {"bool": {"filter": [{"terms": {"lot_status_id": [1, 2, 3]}}]}},
-                "from": pag * 100,
-                "size": 100
-            }
-            
-            r = requests.post(self.API, json=payload, cookies=cookies, timeout=60)
-            if r.status_code != 200:
-                break
-            
-            lotes = r.json().get("results", [])
-            if not lotes:
-                break
-            
-            # Filtra bens de consumo (roupas, calçados, acessórios, etc)
-            bens = [l for l in lotes if self._is_bem_consumo(l)]
-            items.extend(bens)
-            
-            print(f"  Pág {pag+1}: +{len(bens)} | Total: {len(items)}")
-            time.sleep(random.uniform(2, 4))
+        # Índice "materiais" baixado uma vez e compartilhado entre as categorias
+        items = sodre_materiais.route(CATEGORIA)
+        print(f"  +{len(items)} de {len(sodre_materiais.lotes)} lotes")
         
         return self._normalizar(items)
     
-    def _is_bem_consumo(self, item):
-        titulo = (item.get("lot_title") or "").lower()
-        keywords = ['roupa', 'calcado', 'tenis', 'sapato', 'bolsa', 'relogio', 'joia', 'acessorio']
-        return any(k in titulo for k in keywords)
-    
     def _normalizar(self, items):
         return [{
             "source": "sodre",
@@ -87,6 +57,10 @@ class SodreExtractor:
         } for i in items if i.get("lot_id")]
 
 
+# Registra as palavras-chave na busca compartilhada e no classificador antes do primeiro download
+sodre_materiais.register(CATEGORIA, SodreExtractor.KEYWORDS, SodreExtractor.CAMPOS)
+
+
 class MegaleiloesExtractor:
     def extrair(self):
         print("\n🟢 MEGALEILÕES")
@@ -110,7 +84,10 @@ class SuperbidExtractor:
                 "searchType": "openedAll"
             }
             
+            rate_limiter.wait(self.API)
+            start = time.time()
             r = requests.get(self.API, params=params, timeout=60)
+            rate_limiter.observe(self.API, r, time.time() - start)
             if r.status_code != 200:
                 break
             
@@ -131,17 +108,12 @@ class SuperbidExtractor:
                     })
             
             print(f"  Pág {pag}: {len(offers)} | Total: {len(items)}")
-            time.sleep(random.uniform(2, 4))
         
         return items
 
 
-def main():
-    import argparse
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--fonte', choices=['sodre', 'megaleiloes', 'superbid', 'all'], default='all')
-    args = parser.parse_args()
-    
+def executar(fonte: str = 'all'):
+    """Scraping + JSON + upload da categoria"""
     print("="*60)
     print(f"🛍️ SCRAPER: {CATEGORIA.upper()}")
     print("="*60)
@@ -149,13 +121,13 @@ def main():
     extractors = {'sodre': SodreExtractor, 'megaleiloes': MegaleiloesExtractor, 'superbid': SuperbidExtractor}
     todos = []
     
-    for fonte in ([args.fonte] if args.fonte != 'all' else list(extractors.keys())):
+    for nome in ([fonte] if fonte != 'all' else list(extractors.keys())):
         try:
-            items = extractors[fonte]().extrair()
+            items = extractors[nome]().extrair()
             todos.extend(items)
-            print(f"✅ {fonte}: {len(items)}")
+            print(f"✅ {nome}: {len(items)}")
         except Exception as e:
-            print(f"❌ {fonte}: {e}")
+            print(f"❌ {nome}: {e}")
     
     unicos = {i['external_id']: i for i in todos}
     todos = list(unicos.values())
@@ -170,10 +142,23 @@ def main():
     try:
         from supabase_client import SupabaseClient
         result = SupabaseClient().upsert(TABELA_DB, todos)
-        print(f"✅ Supabase: {result['inserted']} novos")
+        print(f"✅ Supabase: {result['inserted']} novos, {result['errors']} erros")
     except Exception as e:
         print(f"❌ {e}")
 
 
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fonte', choices=['sodre', 'megaleiloes', 'superbid', 'all'], default='all')
+    args = parser.parse_args()
+    
+    executar(args.fonte)
+    
+    sodre_materiais.print_report()
+    rate_limiter.print_report()
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
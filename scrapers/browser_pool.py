@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""BROWSER POOL - Um Chromium por processo, contextos isolados por fonte"""
+
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional, Union
+from playwright.sync_api import sync_playwright
+
+from cassette import cassette
+
+
+class BrowserPool:
+    """
+    Mantém um Chromium vivo e entrega um BrowserContext novo por uso
+    
+    A API sync do Playwright não pode ser usada entre threads, então o
+    navegador é por thread: no modo sequencial há um único launch por
+    processo; no modo paralelo cada worker que usa navegador tem o seu
+    e o libera com `release()` ao terminar.
+    
+    Por padrão os contextos abortam imagens, fontes, CSS, mídia e
+    rastreadores (BROWSER_BLOCK_RESOURCES=0 desliga, para comparar), e
+    `navigate()` troca os sleeps fixos por espera de uma condição,
+    medindo tempo e bytes de cada navegação.
+    """
+    
+    LAUNCH_ARGS = [
+        '--disable-blink-features=AutomationControlled',
+        '--disable-dev-shm-usage',
+        '--no-sandbox',
+    ]
+    
+    # Nada disso é necessário para cookies ou para o HTML dos cards
+    BLOCKED_TYPES = {'image', 'media', 'font', 'stylesheet'}
+    BLOCKED_HOSTS = (
+        'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+        'facebook.net', 'facebook.com/tr', 'hotjar.com', 'clarity.ms',
+        'tiktok.com', 'criteo', 'taboola', 'outbrain',
+    )
+    
+    def __init__(self, headless: bool = True, block_resources: Optional[bool] = None):
+        self.headless = headless
+        if block_resources is None:
+            block_resources = os.getenv('BROWSER_BLOCK_RESOURCES', '1') != '0'
+        self.block_resources = block_resources
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {
+            'launches': 0, 'contexts': 0, 'launch_seconds': 0.0,
+            'navigations': 0, 'nav_seconds': 0.0, 'nav_bytes': 0, 'blocked': 0,
+        }
+        atexit.register(self.release)
+    
+    def _browser(self):
+        browser = getattr(self._local, 'browser', None)
+        if browser is not None and browser.is_connected():
+            return browser
+        
+        start = time.time()
+        self._local.playwright = sync_playwright().start()
+        try:
+            self._local.browser = self._local.playwright.chromium.launch(
+                headless=self.headless,
+                args=self.LAUNCH_ARGS,
+            )
+        except Exception:
+            # Sem navegador, não deixa o driver vivo prendendo o loop da thread
+            self.release()
+            raise
+        
+        with self._lock:
+            self.stats['launches'] += 1
+            self.stats['launch_seconds'] += time.time() - start
+        
+        return self._local.browser
+    
+    def _route(self, route):
+        request = route.request
+        if request.resource_type in self.BLOCKED_TYPES or any(h in request.url for h in self.BLOCKED_HOSTS):
+            with self._lock:
+                self.stats['blocked'] += 1
+            route.abort()
+        else:
+            route.continue_()
+    
+    @contextmanager
+    def context(self, **options):
+        """Contexto isolado (cookies/storage próprios) no navegador compartilhado"""
+        # Replay do cassette: páginas gravadas, sem abrir o Chromium
+        if cassette.replaying:
+            yield cassette.replay_context()
+            return
+        
+        context = self._browser().new_context(**options)
+        if self.block_resources:
+            context.route('**/*', self._route)
+        
+        with self._lock:
+            self.stats['contexts'] += 1
+        
+        try:
+            yield cassette.wrap_context(context) if cassette.recording else context
+        finally:
+            try:
+                context.close()
+            except Exception:
+                pass
+    
+    def wait_until(self, page, condition: Callable[[], bool], timeout: int = 10000,
+                   interval: int = 250) -> bool:
+        """Espera `condition()` ficar verdadeira (ou o timeout, em ms)"""
+        deadline = time.time() + timeout / 1000
+        while True:
+            try:
+                if condition():
+                    return True
+            except Exception:
+                pass
+            if time.time() >= deadline:
+                return False
+            # wait_for_timeout mantém o Playwright processando eventos
+            page.wait_for_timeout(interval)
+    
+    def navigate(self, page, url: str, wait_for: Union[str, Callable[[], bool], None] = None,
+                 timeout: int = 30000, wait_timeout: int = 10000,
+                 wait_until: str = 'domcontentloaded', label: Optional[str] = None):
+        """
+        page.goto seguido de espera por condição, com tempo/bytes medidos
+        
+        `wait_for` é um seletor CSS ou uma função sem argumentos; se não
+        for satisfeita em `wait_timeout` ms a navegação segue mesmo assim
+        (como seguia depois do sleep fixo).
+        """
+        finished = []
+        
+        def on_finished(request):
+            finished.append(request)
+        
+        page.on('requestfinished', on_finished)
+        start = time.time()
+        
+        try:
+            response = page.goto(url, wait_until=wait_until, timeout=timeout)
+            
+            if isinstance(wait_for, str):
+                try:
+                    page.wait_for_selector(wait_for, timeout=wait_timeout)
+                except Exception:
+                    pass
+            elif wait_for is not None:
+                self.wait_until(page, wait_for, timeout=wait_timeout)
+            
+            return response
+        finally:
+            elapsed = time.time() - start
+            page.remove_listener('requestfinished', on_finished)
+            
+            size = 0
+            for request in finished:
+                try:
+                    sizes = request.sizes()
+                    size += sizes['responseBodySize'] + sizes['responseHeadersSize']
+                except Exception:
+                    pass
+            
+            with self._lock:
+                self.stats['navigations'] += 1
+                self.stats['nav_seconds'] += elapsed
+                self.stats['nav_bytes'] += size
+            
+            print(f"    🌐 {label or url}: {elapsed:.1f}s, {size / 1024:.0f} KB, {len(finished)} req")
+    
+    def release(self):
+        """Fecha o navegador da thread atual (se houver)"""
+        browser = getattr(self._local, 'browser', None)
+        playwright = getattr(self._local, 'playwright', None)
+        self._local.browser = None
+        self._local.playwright = None
+        
+        try:
+            if browser is not None:
+                browser.close()
+        except Exception:
+            pass
+        
+        try:
+            if playwright is not None:
+                playwright.stop()
+        except Exception:
+            pass
+    
+    def report(self) -> dict:
+        """Launches, contextos e tempo economizado estimado"""
+        launches = self.stats['launches']
+        contexts = self.stats['contexts']
+        avg_launch = self.stats['launch_seconds'] / launches if launches else 0.0
+        
+        navigations = self.stats['navigations']
+        
+        return {
+            'launches': launches,
+            'contexts': contexts,
+            'avg_launch_seconds': round(avg_launch, 2),
+            'seconds_saved': round(max(0, contexts - launches) * avg_launch, 1),
+            'navigations': navigations,
+            'avg_nav_seconds': round(self.stats['nav_seconds'] / navigations, 2) if navigations else 0.0,
+            'nav_kb': round(self.stats['nav_bytes'] / 1024),
+            'blocked': self.stats['blocked'],
+        }
+    
+    def print_report(self):
+        r = self.report()
+        if r['contexts']:
+            print(f"🌐 Navegador: {r['launches']} launch(es), {r['contexts']} contextos, "
+                  f"~{r['seconds_saved']}s economizados")
+        if r['navigations']:
+            bloqueio = f"{r['blocked']} requisições bloqueadas" if self.block_resources else "sem bloqueio"
+            print(f"   • {r['navigations']} navegações, {r['avg_nav_seconds']}s/nav, "
+                  f"{r['nav_kb']} KB ({bloqueio})")
+
+
+# Instância única do processo
+browser_pool = BrowserPool()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""CASSETTE - Grava e reproduz HTTP (requests) e páginas do Playwright, sem rede"""
+
+import os
+import gzip
+import json
+import atexit
+import base64
+import hashlib
+import tempfile
+import threading
+import requests
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlsplit
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from change_store import change_store
+from cookie_cache import cookie_cache
+from rate_limiter import rate_limiter
+from watermarks import watermarks
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Requisição sem gravação no modo replay (tratada como erro de rede)"""
+
+
+class Cassette:
+    """
+    Grava/reproduz tudo que passa por requests.Session e pelo browser_pool
+    
+    - record: as requisições vão para a rede e cada resposta (status,
+      headers, corpo) é guardada; no Playwright, o HTML de cada página e o
+      storage_state de cada site.
+    - replay: nada sai para a rede nem abre navegador; as respostas vêm do
+      arquivo, na ordem gravada, e o rate limiter não espera.
+    
+    A chave é método + URL (com params) + hash do corpo; se o corpo mudar
+    entre execuções (ex.: timestamps do upload), cai para método + URL.
+    O arquivo é JSON com gzip (`.json.gz`).
+    
+    Com o cassette ativo, cookies, marcas d'água e hashes de conteúdo
+    ficam num diretório temporário vazio: gravação e replay partem do
+    mesmo estado e pedem as mesmas URLs, em qualquer máquina.
+    
+    Ativação: CASSETTE_MODE=record|replay e CASSETTE_PATH, ou `start()`.
+    """
+    
+    def __init__(self):
+        self.mode = None
+        self.path = None
+        self._http = {}
+        self._loose = {}
+        self._browser = {}
+        self._cursors = {}
+        self._log = []
+        self._lock = threading.Lock()
+        self._original = None
+        self._local = None
+        self._local_paths = None
+        self.stats = {'recorded': 0, 'replayed': 0, 'misses': 0}
+    
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+    
+    def start(self, mode: str, path: str):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Modo de cassette inválido: {mode}")
+        if self.mode:
+            self.stop()
+        
+        self.mode = mode
+        self.path = Path(path)
+        self._isolate_local_state()
+        
+        if self.replaying:
+            self._load()
+            rate_limiter.enabled = False
+        
+        # Patch na classe: cobre self.session, AsyncFetcher, requests.get/post e Supabase
+        self._original = requests.Session.request
+        cassette = self
+        
+        def request(session, method, url, **kwargs):
+            return cassette._request(session, method, url, **kwargs)
+        
+        requests.Session.request = request
+        print(f"📼 Cassette: {'gravando em' if self.recording else 'reproduzindo'} {self.path}")
+    
+    def stop(self):
+        """Desfaz o patch e, gravando, salva o arquivo"""
+        if not self.mode:
+            return
+        
+        requests.Session.request = self._original
+        if self.recording:
+            self._save()
+        else:
+            rate_limiter.enabled = True
+        self._restore_local_state()
+        self.mode = None
+    
+    def _isolate_local_state(self):
+        """Cookies, marcas d'água e hashes em disco mudam quais requisições saem: usa um diretório vazio"""
+        self._local = tempfile.TemporaryDirectory(prefix='cassette-')
+        local = Path(self._local.name)
+        self._local_paths = (cookie_cache.dir, watermarks.path, change_store.path)
+        
+        change_store.close()
+        cookie_cache.dir = local / 'cookies'
+        watermarks.path = local / 'watermarks.json'
+        change_store.path = local / 'content_hashes.sqlite'
+    
+    def _restore_local_state(self):
+        change_store.close()
+        cookie_cache.dir, watermarks.path, change_store.path = self._local_paths
+        self._local.cleanup()
+        self._local = None
+    
+    # ============================================================
+    # ARQUIVO
+    # ============================================================
+    
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        for entry in data.get('http', []):
+            self._http.setdefault(entry['key'], []).append(entry)
+            self._loose.setdefault(entry['loose'], []).append(entry)
+        for entry in data.get('browser', []):
+            self._browser.setdefault((entry['kind'], entry['key']), []).append(entry['value'])
+    
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        http = [e for e in self._log if 'status' in e]
+        browser = [e for e in self._log if 'kind' in e]
+        
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            json.dump({'version': 1, 'http': http, 'browser': browser}, f, ensure_ascii=False)
+        tmp.replace(self.path)
+        
+        size = self.path.stat().st_size / 1024
+        print(f"📼 Cassette salvo: {self.path} ({len(http)} respostas HTTP, {len(browser)} do navegador, {size:.0f} KB)")
+    
+    def _next(self, table: dict, key) -> Optional[Any]:
+        """Próxima gravação da chave (a última se repete quando acabam)"""
+        entries = table.get(key)
+        if not entries:
+            return None
+        i = self._cursors.get((id(table), key), 0)
+        self._cursors[(id(table), key)] = i + 1
+        return entries[min(i, len(entries) - 1)]
+    
+    # ============================================================
+    # HTTP
+    # ============================================================
+    
+    @staticmethod
+    def _keys(method: str, url: str, params=None, data=None, json_body=None) -> tuple:
+        method = method.upper()
+        full_url = requests.Request(method, url, params=params).prepare().url
+        
+        if json_body is not None:
+            body = json.dumps(json_body, sort_keys=True, ensure_ascii=False).encode()
+        elif isinstance(data, str):
+            body = data.encode()
+        elif isinstance(data, bytes):
+            body = data
+        elif data:
+            body = json.dumps(data, sort_keys=True, default=str).encode()
+        else:
+            body = b''
+        
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        return f"{method} {full_url} {digest}", f"{method} {full_url}"
+    
+    def _request(self, session, method, url, **kwargs) -> requests.Response:
+        key, loose = self._keys(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+        
+        if self.replaying:
+            with self._lock:
+                entry = self._next(self._http, key) or self._next(self._loose, loose)
+                self.stats['replayed' if entry else 'misses'] += 1
+            if entry is None:
+                raise CassetteMiss(f"Sem gravação para {loose}")
+            return self._response(entry, method, url, kwargs.get('params'))
+        
+        response = self._original(session, method, url, **kwargs)
+        entry = {
+            'key': key,
+            'loose': loose,
+            'status': response.status_code,
+            'url': response.url,
+            'headers': dict(response.headers),
+            'body': base64.b64encode(response.content).decode('ascii'),
+        }
+        with self._lock:
+            self._log.append(entry)
+            self.stats['recorded'] += 1
+        return response
+    
+    @staticmethod
+    def _response(entry: dict, method: str, url: str, params=None) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = base64.b64decode(entry['body'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.request = requests.Request(method.upper(), url, params=params).prepare()
+        response.reason = ''
+        return response
+    
+    # ============================================================
+    # NAVEGADOR
+    # ============================================================
+    
+    def record(self, kind: str, key: str, value):
+        with self._lock:
+            self._log.append({'kind': kind, 'key': key, 'value': value})
+            self.stats['recorded'] += 1
+    
+    def replay(self, kind: str, key: str):
+        with self._lock:
+            value = self._next(self._browser, (kind, key))
+            self.stats['replayed' if value is not None else 'misses'] += 1
+        return value
+    
+    def wrap_context(self, context):
+        return RecordingContext(context, self)
+    
+    def replay_context(self):
+        return ReplayContext(self)
+    
+    def print_report(self):
+        if self.mode or any(self.stats.values()):
+            s = self.stats
+            print(f"📼 Cassette: {s['recorded']} gravadas, {s['replayed']} reproduzidas, {s['misses']} sem gravação")
+
+
+def _site(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+class RecordingPage:
+    """Página real; guarda status/HTML de cada navegação"""
+    
+    def __init__(self, page, context: 'RecordingContext'):
+        self._page = page
+        self._context = context
+        self._url = None
+        self._status = 0
+    
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+    
+    def goto(self, url: str, **kwargs):
+        self._context.first_url = self._context.first_url or url
+        self._url = url
+        response = self._page.goto(url, **kwargs)
+        self._status = response.status if response else 0
+        self._context.cassette.record('status', url, self._status)
+        return response
+    
+    def content(self) -> str:
+        html = self._page.content()
+        self._context.cassette.record('html', self._url, html)
+        return html
+
+
+class RecordingContext:
+    """BrowserContext real; guarda o storage_state por site"""
+    
+    def __init__(self, context, cassette: Cassette):
+        self._context = context
+        self.cassette = cassette
+        self.first_url = None
+    
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+    
+    def new_page(self):
+        return RecordingPage(self._context.new_page(), self)
+    
+    def storage_state(self, **kwargs):
+        state = self._context.storage_state(**kwargs)
+        self.cassette.record('storage_state', _site(self.first_url or ''), state)
+        return state
+
+
+class ReplayResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.headers = {}
+
+
+class ReplayPage:
+    """Página falsa: goto/content devolvem o que foi gravado, o resto é no-op"""
+    
+    def __init__(self, context: 'ReplayContext'):
+        self._context = context
+        self._url = None
+    
+    def goto(self, url: str, **kwargs):
+        self._context.first_url = self._context.first_url or url
+        self._url = url
+        status = self._context.cassette.replay('status', url)
+        if status is None:
+            raise CassetteMiss(f"Sem gravação de navegação para {url}")
+        return ReplayResponse(status)
+    
+    def content(self) -> str:
+        return self._context.cassette.replay('html', self._url) or ''
+    
+    def on(self, event, handler):
+        pass
+    
+    def remove_listener(self, event, handler):
+        pass
+    
+    def add_init_script(self, *args, **kwargs):
+        pass
+    
+    def evaluate(self, *args, **kwargs):
+        return None
+    
+    def wait_for_selector(self, *args, **kwargs):
+        return None
+    
+    def wait_for_load_state(self, *args, **kwargs):
+        pass
+    
+    def wait_for_timeout(self, *args, **kwargs):
+        pass
+
+
+class ReplayContext:
+    """BrowserContext falso: cookies/storage_state gravados, sem Chromium"""
+    
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self.first_url = None
+        self._state = None
+    
+    def _stored_state(self) -> dict:
+        if self._state is None and self.first_url:
+            self._state = self.cassette.replay('storage_state', _site(self.first_url))
+        return self._state or {'cookies': [], 'origins': []}
+    
+    def new_page(self):
+        return ReplayPage(self)
+    
+    def storage_state(self, **kwargs) -> dict:
+        return self._stored_state()
+    
+    def cookies(self, *args) -> list:
+        return self._stored_state().get('cookies', [])
+    
+    def add_cookies(self, cookies):
+        pass
+    
+    def clear_cookies(self, **kwargs):
+        pass
+    
+    def add_init_script(self, *args, **kwargs):
+        pass
+    
+    def route(self, *args, **kwargs):
+        pass
+    
+    def close(self):
+        pass
+
+
+# Instância única do processo (CASSETTE_MODE/CASSETTE_PATH ativam na importação)
+cassette = Cassette()
+
+if os.getenv('CASSETTE_MODE'):
+    cassette.start(os.environ['CASSETTE_MODE'], os.getenv('CASSETTE_PATH', 'cassettes/scrapers.json.gz'))
+
+atexit.register(cassette.stop)
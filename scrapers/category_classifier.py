@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""CATEGORY CLASSIFIER - Palavras-chave de todas as categorias numa passada só"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+from keyword_matcher import KeywordMatcher, strip_accents
+
+
+def plurals(term: str) -> List[str]:
+    """Termo sem acento e seus plurais comuns (na última palavra): fogao → fogoes, celular → celulares"""
+    base = strip_accents(term.lower().strip())
+    if base.endswith('ao'):
+        return [base, base[:-2] + 'oes', base[:-2] + 'aes', base + 's']
+    if base.endswith(('r', 'z', 's')):
+        return [base, base + 'es']
+    if base.endswith('m'):
+        return [base, base[:-1] + 'ns']
+    if base.endswith('l'):
+        return [base, base[:-1] + 'is']
+    return [base, base + 's']
+
+
+class CategoryClassifier:
+    """
+    Decide a(s) categoria(s) de um lote pelas palavras-chave registradas
+    
+    Substitui os `any(k in titulo for k in KEYWORDS)` de cada categoria:
+    as palavras de todas elas vão para um único KeywordMatcher (sem
+    acento, limite de palavra, plurais), então "fogao" casa "Fogões",
+    "pc" não casa em "pcb" nem "speed" em "speedometro". `classify`
+    percorre cada campo do lote uma vez e devolve todas as categorias que
+    casaram, cada uma só nos campos que ela sempre olhou; um lote pode ir
+    para mais de uma tabela.
+    
+    `matches` atende o caminho quente de uma categoria só
+    (is_mobility_vehicle): um matcher com as palavras dela, sem pagar
+    pelas das outras.
+    """
+    
+    def __init__(self):
+        self.keywords = {}
+        self.campos = {}
+        self._matchers = {}
+        self._all = None
+        self._fields = []
+    
+    def register(self, categoria: str, keywords: Iterable[str], campos: Iterable[str]):
+        """Palavras-chave da categoria e os campos do lote onde ela procura"""
+        self.keywords[categoria] = list(keywords)
+        self.campos[categoria] = list(campos)
+        self._matchers.pop(categoria, None)
+        self._all = None
+    
+    def _compile(self):
+        entries: Dict[str, Set[str]] = {}
+        for categoria, keywords in self.keywords.items():
+            for keyword in keywords:
+                for variant in plurals(keyword):
+                    entries.setdefault(variant, set()).add(categoria)
+        
+        # A frase mais longa ganha a posição: "ar condicionado" também conta como "ar"
+        for variant in sorted(entries, key=len):
+            words = variant.split()
+            for n in range(1, len(words)):
+                entries[variant] |= entries.get(' '.join(words[:n]), set())
+        
+        self._all = KeywordMatcher({k: frozenset(v) for k, v in entries.items()}, fold_accents=True)
+        
+        # Campo → categorias que olham para ele, na ordem de registro
+        leitores: Dict[str, Set[str]] = {}
+        for categoria, campos in self.campos.items():
+            for campo in campos:
+                leitores.setdefault(campo, set()).add(categoria)
+        self._fields = [(campo, frozenset(categorias)) for campo, categorias in leitores.items()]
+    
+    def classify(self, lot: dict) -> Set[str]:
+        """Categorias cujas palavras aparecem nos campos que cada uma olha (título, categoria, descrição...)"""
+        if self._all is None:
+            self._compile()
+        
+        categorias = set()
+        for campo, leitores in self._fields:
+            texto = lot.get(campo)
+            if not texto or leitores <= categorias:
+                continue
+            # Cada campo é buscado sozinho: uma frase não casa atravessando dois
+            for _, _, found in self._all.finditer(str(texto)):
+                categorias |= found & leitores
+                if leitores <= categorias:
+                    break
+        return categorias
+    
+    def _matcher(self, categoria: str) -> KeywordMatcher:
+        matcher = self._matchers.get(categoria)
+        if matcher is None:
+            entries = [variant for keyword in self.keywords[categoria] for variant in plurals(keyword)]
+            matcher = self._matchers[categoria] = KeywordMatcher(entries, fold_accents=True)
+        return matcher
+    
+    def matches(self, categoria: str, *texts: Optional[str]) -> bool:
+        """True se alguma palavra da categoria aparece em algum dos textos (título, categoria, descrição...)"""
+        return self._matcher(categoria).search_any(*texts) is not None
+
+
+# Instância única do processo
+category_classifier = CategoryClassifier()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""CHANGE STORE - Hash do conteúdo de cada linha enviada, para só reenviar o que mudou"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+class ChangeStore:
+    """
+    (tabela, source, external_id) → hash das colunas com conteúdo
+    
+    O upsert compara o hash da linha preparada com o da última vez que ela
+    foi enviada: igual, só renova `last_scraped_at` (um PATCH por lote de
+    ids); novo ou diferente, vai a linha inteira. Fica em
+    `<dir>/content_hashes.sqlite`.
+    
+    Os hashes só são gravados para linhas que o servidor aceitou (`stage`
+    no sucesso do batch, `commit` no fim do upsert). Uma linha igual há
+    mais de `resync_hours` vai inteira de novo, para corrigir o banco se
+    ele mudou por fora.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, resync_hours: Optional[float] = None):
+        cache_dir = cache_dir or os.getenv('SCRAPER_CACHE_DIR', '.cache')
+        resync_hours = resync_hours if resync_hours is not None else float(os.getenv('FULL_RESYNC_HOURS', '24'))
+        
+        self.path = Path(cache_dir) / 'content_hashes.sqlite'
+        self.resync = resync_hours * 3600
+        self.enabled = True
+        self.pending = []
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'refreshed': 0, 'bytes_sent': 0, 'bytes_saved': 0}
+        self._tables = {}
+        self._db = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Usado pela thread do upload e pela principal, sempre sob self._lock
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                " tabela TEXT, source TEXT, external_id TEXT, hash TEXT, saved_at REAL,"
+                " PRIMARY KEY (tabela, source, external_id)) WITHOUT ROWID"
+            )
+        return self._db
+    
+    def _table(self, tabela: str) -> Dict[Tuple[str, str], Tuple[str, float]]:
+        # Tabela inteira em memória na primeira consulta: uma leitura só por execução
+        if tabela not in self._tables:
+            rows = self._connect().execute(
+                "SELECT source, external_id, hash, saved_at FROM hashes WHERE tabela = ?", (tabela,)
+            )
+            self._tables[tabela] = {(source, eid): (h, saved_at) for source, eid, h, saved_at in rows}
+        return self._tables[tabela]
+    
+    def classify(self, tabela: str, key: Tuple[str, str], content_hash: str) -> str:
+        """'new', 'changed' ou 'unchanged' (desligado: sempre 'new')"""
+        if not self.enabled:
+            return 'new'
+        
+        with self._lock:
+            entry = self._table(tabela).get(key)
+        if entry is None:
+            return 'new'
+        if entry[0] != content_hash or time.time() - entry[1] > self.resync:
+            return 'changed'
+        return 'unchanged'
+    
+    def stage(self, tabela: str, key: Tuple[str, str], content_hash: str):
+        """Hash de uma linha aceita pelo servidor, pendente até o commit"""
+        if self.enabled:
+            with self._lock:
+                self.pending.append((tabela, key[0], key[1], content_hash, time.time()))
+    
+    def commit(self):
+        with self._lock:
+            if not self.pending:
+                return
+            
+            db = self._connect()
+            with db:
+                db.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)", self.pending)
+            
+            for tabela, source, eid, h, saved_at in self.pending:
+                if tabela in self._tables:
+                    self._tables[tabela][(source, eid)] = (h, saved_at)
+            self.pending = []
+    
+    def close(self):
+        """Fecha o banco; o próximo uso reabre em `self.path`"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._tables = {}
+    
+    def record(self, stats: dict):
+        """Soma as contagens de um upsert no relatório do processo"""
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] += stats.get(key, 0)
+    
+    def print_report(self):
+        s = self.stats
+        if not s['new'] and not s['changed'] and not s['unchanged']:
+            return
+        
+        refreshed = f" ({s['refreshed']} só campos quentes)" if s['refreshed'] else ''
+        print(f"🧮 Conteúdo: {s['new']} novos, {s['changed']} alterados{refreshed}, {s['unchanged']} iguais (só last_scraped_at) | "
+              f"{s['bytes_sent'] / 2**20:.1f} MB enviados, {s['bytes_saved'] / 2**20:.1f} MB economizados")
+
+
+# Instância única do processo
+change_store = ChangeStore()
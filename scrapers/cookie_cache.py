@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""COOKIE CACHE - storage_state do Playwright em disco, por host, com TTL"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+
+SODRE_HOST = "www.sodresantoro.com.br"
+MEGALEILOES_HOST = "www.megaleiloes.com.br"
+
+
+class CookieCache:
+    """
+    Cache de cookies entre execuções
+    
+    Guarda o storage_state do Playwright em `<dir>/cookies/<host>.json`.
+    Enquanto estiver dentro do TTL, os scrapers usam os cookies direto e só
+    abrem o navegador se o site recusar (401/403 ou resposta que não é JSON).
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, ttl_hours: Optional[float] = None):
+        cache_dir = cache_dir or os.getenv('SCRAPER_CACHE_DIR', '.cache')
+        ttl_hours = ttl_hours if ttl_hours is not None else float(os.getenv('COOKIE_CACHE_TTL_HOURS', '12'))
+        
+        self.dir = Path(cache_dir) / 'cookies'
+        self.ttl = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'refreshes': 0}
+    
+    def _path(self, host: str) -> Path:
+        return self.dir / f"{host}.json"
+    
+    def get(self, host: str) -> Optional[dict]:
+        """storage_state do host, ou None se ausente/expirado"""
+        try:
+            with open(self._path(host), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if time.time() - entry.get('saved_at', 0) > self.ttl:
+            return None
+        
+        state = entry.get('storage_state') or {}
+        return state if state.get('cookies') else None
+    
+    def set(self, host: str, storage_state: dict):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(host).with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': time.time(), 'storage_state': storage_state}, f)
+        tmp.replace(self._path(host))
+    
+    def invalidate(self, host: str):
+        try:
+            self._path(host).unlink()
+        except OSError:
+            pass
+    
+    def get_or_capture(self, host: str, capture: Callable[[], Optional[dict]],
+                       force: bool = False) -> Tuple[Optional[dict], bool]:
+        """
+        Retorna (storage_state, veio_do_cache)
+        
+        `capture` abre o navegador e devolve um storage_state novo; só é
+        chamado sem cache válido ou com `force=True` (cookies recusados).
+        """
+        if not force:
+            state = self.get(host)
+            if state is not None:
+                with self._lock:
+                    self.stats['hits'] += 1
+                return state, True
+        
+        with self._lock:
+            self.stats['refreshes' if force else 'misses'] += 1
+        
+        if force:
+            self.invalidate(host)
+        
+        state = capture()
+        if state and state.get('cookies'):
+            self.set(host, state)
+        return state, False
+    
+    def print_report(self):
+        s = self.stats
+        if s['hits'] or s['misses'] or s['refreshes']:
+            print(f"🍪 Cookies: {s['hits']} do cache, {s['misses']} capturados, {s['refreshes']} renovados")
+
+
+def cookies_dict(storage_state: Optional[dict]) -> dict:
+    """storage_state → {nome: valor} para requests"""
+    return {c['name']: c['value'] for c in (storage_state or {}).get('cookies', [])}
+
+
+def rejected(response) -> bool:
+    """Resposta que indica cookies inválidos: 401/403 ou corpo que não é JSON (página de bloqueio)"""
+    if response.status_code in (401, 403):
+        return True
+    if response.status_code != 200:
+        return False
+    try:
+        response.json()
+    except ValueError:
+        return True
+    # Lista vazia é uma consulta sem resultados, não recusa dos cookies
+    return False
+
+
+# Instância única do processo
+cookie_cache = CookieCache()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""KEYWORD MATCHER - Dicionário de palavras/frases buscado em uma passada só"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+# Letras acentuadas (Latin-1 e Latin Extended-A) → letra base, 1 para 1 (as posições não mudam)
+_ACCENTS = {}
+for _cp in range(0xC0, 0x250):
+    _base = ''.join(c for c in unicodedata.normalize('NFKD', chr(_cp)) if not unicodedata.combining(c))
+    if len(_base) == 1 and _base != chr(_cp):
+        _ACCENTS[chr(_cp)] = _base
+
+_ACCENTED = re.compile(f"[{''.join(_ACCENTS)}]")
+
+
+def strip_accents(text: str) -> str:
+    """"fogão" → "fogao", "CALÇADO" → "CALCADO" """
+    if text.isascii():
+        return text
+    # Um replace (em C) por letra acentuada presente: str.translate com dict custa ~10x mais
+    for char in set(_ACCENTED.findall(text)):
+        text = text.replace(char, _ACCENTS[char])
+    return text
+
+
+def _fold_byte(byte: int) -> int:
+    folded = strip_accents(chr(byte).upper())
+    # "ß" → "SS", "µ" → "Μ" não cabem num byte: \0 manda para o caminho lento
+    return ord(folded) if len(folded) == 1 and ord(folded) < 0x100 else 0
+
+
+# Latin-1 → maiúsculas sem acento, byte a byte
+_FOLD_UPPER = bytes(_fold_byte(byte) for byte in range(0x100))
+
+
+def fold_upper(text: str) -> str:
+    """strip_accents(text.upper()), mais rápido para português: "Fogões" → "FOGOES" """
+    if text.isascii():
+        return text.upper()
+    # Um translate (em C) sobre o Latin-1: upper() e os replace de texto acentuado custam ~2x
+    try:
+        folded = text.encode('latin-1').translate(_FOLD_UPPER).decode('latin-1')
+    except UnicodeEncodeError:
+        # Fora do Latin-1 (aspas curvas, emoji...)
+        return strip_accents(text.upper())
+    return folded if '\0' not in folded else strip_accents(text.upper())
+
+
+class KeywordMatcher:
+    """
+    Dicionário (marcas, modelos, ...) compilado num autômato de prefixos
+    
+    As entradas viram uma trie (prefixos compartilhados, como no
+    Aho-Corasick) e a trie vira uma única regex: o texto é percorrido uma
+    vez, no motor de regex em C, em vez de um `in` por palavra. Um
+    Aho-Corasick em Python puro anda caractere a caractere e sai mais
+    lento que os `in` que ele substituiria. Antes da regex, um filtro de
+    `in` (também em C) descarta textos sem nenhuma palavra do dicionário.
+    
+    - Limite de palavra: "MAN" não casa em "MANUAL", nem "KIA" em "SKIAR".
+    - Mais longo primeiro: "MERCEDES-BENZ" ganha de "MERCEDES".
+    - Frases: o espaço casa com qualquer sequência de espaços ("LAND  ROVER").
+    - Sem diferenciar maiúsculas (o texto é comparado em maiúsculas).
+    - Com `fold_accents`, sem diferenciar acentos ("fogao" casa "FOGÃO").
+    
+    Aceita lista (valor = a própria entrada) ou dict entrada → valor, o que
+    permite misturar dicionários: {'GOL': ('modelo', 'VOLKSWAGEN'), ...}.
+    """
+    
+    # Acima disso o filtro de `in` custa mais que a própria regex
+    MAX_STEMS = 100
+    # Pedaço comum mínimo para juntar radicais no filtro (BICICLETA, TRICICLO → CICL)
+    MIN_STEM = 4
+    # Até esse tamanho (títulos) search_any vai direto à regex
+    SHORT_TEXT = 80
+    
+    def __init__(self, entries: Union[Iterable[str], Dict[str, Any]] = (), fold_accents: bool = False):
+        self.fold_accents = fold_accents
+        self.values = {}
+        self._regex = None
+        self._stems = ()
+        self.update(entries)
+    
+    def _prepare(self, text: str) -> str:
+        return fold_upper(text) if self.fold_accents else text.upper()
+    
+    def _key(self, entry: str) -> str:
+        return ' '.join(self._prepare(entry).split())
+    
+    def add(self, entry: str, value: Any = None):
+        key = self._key(entry)
+        if key:
+            self.values[key] = entry if value is None else value
+            self._regex = None
+    
+    def update(self, entries: Union[Iterable[str], Dict[str, Any]]):
+        items = entries.items() if isinstance(entries, dict) else ((e, None) for e in entries)
+        for entry, value in items:
+            self.add(entry, value)
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    # ============================================================
+    # COMPILAÇÃO
+    # ============================================================
+    
+    @classmethod
+    def _trie_pattern(cls, node: dict) -> str:
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + cls._trie_pattern(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Fim de entrada com continuação: a continuação é opcional e gulosa (mais longo primeiro)
+        return f"(?:{body})?" if '' in node else body
+    
+    def _compile(self):
+        trie = {}
+        for key in self.values:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = True
+        
+        # Limite à direita na regex; à esquerda é conferido em finditer (um lookbehind
+        # no início da regex desliga a busca rápida pelo primeiro caractere)
+        body = self._trie_pattern(trie) or r'(?!)'
+        self._regex = re.compile(rf'(?:{body})(?![^\W_])')
+        
+        # Toda ocorrência contém uma palavra de cada entrada: se nenhuma está no
+        # texto, não há o que buscar. Frases usam uma palavra que já é entrada
+        # ("bike" em "mountain bike"), senão a mais longa
+        words = [key.split() for key in self.values]
+        stems = {w[0] for w in words if len(w) == 1}
+        for w in words:
+            if len(w) > 1 and not any(s in word for word in w for s in stems):
+                stems.add(max(w, key=len))
+        stems = self._merge_stems(stems)
+        self._stems = tuple(sorted(stems, key=len)) if len(stems) <= self.MAX_STEMS else ()
+    
+    @classmethod
+    def _merge_stems(cls, stems: set) -> set:
+        """Menos radicais (menos `in` por texto): um pedaço comum substitui os que o contêm"""
+        while True:
+            counts = {}
+            for stem in stems:
+                pieces = {stem[i:i + n] for n in range(cls.MIN_STEM, len(stem) + 1) for i in range(len(stem) - n + 1)}
+                for piece in pieces:
+                    counts[piece] = counts.get(piece, 0) + 1
+            
+            piece, count = max(counts.items(), key=lambda kv: (kv[1], len(kv[0])), default=(None, 0))
+            if count < 2:
+                break
+            stems = {s for s in stems if piece not in s} | {piece}
+        
+        # Os que contêm outro já listado saem
+        return {s for s in stems if not any(o != s and o in s for o in stems)}
+    
+    # ============================================================
+    # BUSCA
+    # ============================================================
+    
+    def finditer(self, text: Optional[str]) -> Iterator[Tuple[int, int, Any]]:
+        """
+        (início, fim, valor) de cada ocorrência, da esquerda para a direita, sem sobreposição
+        
+        As posições se referem ao texto em maiúsculas (igual ao original salvo raras letras como "ß").
+        """
+        if not text:
+            return
+        if self._regex is None:
+            self._compile()
+        
+        text = self._prepare(text)
+        # Texto curto (títulos): a regex direto sai mais barato que os `in` do filtro
+        if len(text) > self.SHORT_TEXT and self._stems and not any(map(text.__contains__, self._stems)):
+            return
+        yield from self._scan(text)
+    
+    def _scan(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        pos = 0
+        while True:
+            match = self._regex.search(text, pos)
+            if not match:
+                return
+            start, end = match.span()
+            if start and text[start - 1].isalnum():
+                pos = start + 1  # colado numa palavra ("MAN" em "HUMANO"): tenta da próxima letra
+                continue
+            # O texto já está preparado: só frases com espaço duplo precisam da chave
+            key = match.group()
+            yield start, end, self.values[key if key in self.values else ' '.join(key.split())]
+            pos = end
+    
+    def search(self, text: Optional[str]) -> Optional[Any]:
+        """Valor da primeira ocorrência (mais à esquerda), ou None"""
+        for _, _, value in self.finditer(text):
+            return value
+        return None
+    
+    def search_any(self, *texts: Optional[str]) -> Optional[Any]:
+        """
+        Valor da primeira ocorrência no primeiro texto que tiver uma (título, depois descrição...)
+        
+        Cada texto é buscado sozinho (nada casa atravessando dois) e os
+        seguintes nem são preparados se um anterior já casou.
+        """
+        if self._regex is None:
+            self._compile()
+        
+        search = self._regex.search
+        for text in texts:
+            if not text:
+                continue
+            text = fold_upper(text) if self.fold_accents else text.upper()
+            # Título curto: a regex direto sai mais barato que os `in` do filtro
+            if len(text) > self.SHORT_TEXT and self._stems and not any(map(text.__contains__, self._stems)):
+                continue
+            pos = 0
+            while True:
+                match = search(text, pos)
+                if not match:
+                    break
+                start = match.start()
+                if not start or not text[start - 1].isalnum():
+                    # O texto já está preparado: só frases com espaço duplo precisam da chave
+                    key = match.group()
+                    return self.values[key if key in self.values else ' '.join(key.split())]
+                pos = start + 1
+        return None
+    
+    def find_all(self, text: Optional[str]) -> List[Any]:
+        """Valores de todas as ocorrências, na ordem do texto"""
+        return [value for _, _, value in self.finditer(text)]
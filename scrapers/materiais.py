@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""📦 SCRAPER: MATERIAIS (tecnologia + bens de consumo + eletrodomésticos)"""
+
+import sys
+import time
+
+import tecnologia
+import bens_consumo
+import eletrodomesticos
+from browser_pool import browser_pool
+from cassette import cassette
+from change_store import change_store
+from cookie_cache import cookie_cache
+from rate_limiter import rate_limiter
+from sodre_materiais import sodre_materiais
+
+
+CATEGORIAS = [tecnologia, bens_consumo, eletrodomesticos]
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fonte', choices=['sodre', 'megaleiloes', 'superbid', 'all'], default='all')
+    parser.add_argument('--filtro-cliente', action='store_true',
+                        help='Baixa o índice materiais completo e filtra só no cliente')
+    parser.add_argument('--comparar-filtro', action='store_true',
+                        help='Só compara páginas/bytes do filtro no servidor x cliente (sem upload)')
+    parser.add_argument('--reenviar-tudo', action='store_true',
+                        help='Envia as linhas inteiras mesmo sem mudança desde o último envio')
+    args = parser.parse_args()
+    
+    if args.comparar_filtro:
+        sodre_materiais.compare()
+        return
+    
+    sodre_materiais.server_filter = not args.filtro_cliente
+    change_store.enabled = not args.reenviar_tudo
+    
+    start = time.time()
+    falhas = 0
+    
+    # Mesmo processo: o índice "materiais" da Sodré é baixado e classificado
+    # uma vez; cada categoria só lê os lotes que casaram com ela
+    for modulo in CATEGORIAS:
+        try:
+            modulo.executar(args.fonte)
+        except Exception as e:
+            print(f"❌ {modulo.CATEGORIA}: {e}")
+            falhas += 1
+        print()
+    
+    print("="*60)
+    sodre_materiais.print_report()
+    browser_pool.print_report()
+    cookie_cache.print_report()
+    rate_limiter.print_report()
+    change_store.print_report()
+    cassette.print_report()
+    print(f"⏱️ {len(CATEGORIAS)} categorias em {time.time() - start:.0f}s | ❌ Falhas: {falhas}")
+    print("="*60)
+    
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""PIPELINE - Scrape, deduplicação e envio em fluxo, com filas limitadas"""
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterator, List, Optional, Tuple
+
+
+_END = object()
+
+
+class Pipeline:
+    """
+    Produtor/consumidor: as fontes entregam itens enquanto raspam
+    
+    `put` descarta repetidos pela chave (source, external_id) e enfileira
+    o resto. Cada etapa (normalizar, enviar, ...) roda numa thread própria,
+    consome lotes de `batch_size` itens e passa o resultado adiante, então
+    o banco trabalha enquanto as fontes ainda raspam. As filas são
+    limitadas: se o envio atrasa, `put` bloqueia e o scrape espera, e a
+    memória fica no tamanho das filas, não no do inventário.
+    
+    A espera é de propósito, inclusive dentro do event loop do
+    AsyncFetcher (as fontes chamam `put` de dentro das corrotinas): com a
+    fila cheia o loop inteiro da fonte para, e as páginas em voo esperam
+    prontas em vez de virarem mais itens na memória. Cada fonte roda o seu
+    loop (no modo paralelo, na sua thread), então só a fonte que produz
+    espera; as respostas chegam nas threads do executor e só são lidas
+    quando a fila anda.
+    
+    Uma etapa que falha num lote conta os itens como erro e segue com o
+    próximo (a fila nunca para de andar, senão os produtores travariam).
+    """
+    
+    def __init__(self, stages: List[Tuple[str, Callable[[List[dict]], Any]]], batch_size: int = 100,
+                 max_batches: int = 4, key: Optional[Callable[[dict], Hashable]] = None):
+        self.stages = stages
+        self.batch_size = batch_size
+        self.key = key or (lambda item: (item['source'], item['external_id']))
+        self.queues = [queue.Queue(maxsize=batch_size * max_batches)]
+        self.queues += [queue.Queue(maxsize=max_batches) for _ in stages[1:]]
+        self.seen = set()
+        self.received = 0
+        self.unique = 0
+        self.peak = 0
+        self.stats = {name: {'batches': 0, 'items': 0, 'errors': 0, 'seconds': 0.0} for name, _ in stages}
+        self.started = None
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._threads = []
+    
+    def start(self) -> 'Pipeline':
+        self.started = time.time()
+        for index, (name, _) in enumerate(self.stages):
+            thread = threading.Thread(target=self._run_stage, args=(index,), name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+    
+    def put(self, item: dict) -> bool:
+        """Enfileira o item (bloqueia com a fila cheia); False se já foi visto"""
+        key = self.key(item)
+        with self._lock:
+            self.received += 1
+            if key in self.seen:
+                return False
+            self.seen.add(key)
+            self.unique += 1
+        
+        self.queues[0].put(item)
+        size = self.queues[0].qsize()
+        with self._lock:
+            self.peak = max(self.peak, size)
+        return True
+    
+    def close(self):
+        """Sem mais itens: esvazia as filas e espera todas as etapas"""
+        self.queues[0].put(_END)
+        for thread in self._threads:
+            thread.join()
+        self.elapsed = time.time() - self.started
+    
+    def _inbox(self, index: int) -> Iterator[List[dict]]:
+        if index:
+            while True:
+                batch = self.queues[index].get()
+                if batch is _END:
+                    return
+                yield batch
+        
+        # Primeira etapa: junta os itens em lotes
+        batch = []
+        while True:
+            item = self.queues[0].get()
+            if item is _END:
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _run_stage(self, index: int):
+        name, fn = self.stages[index]
+        stats = self.stats[name]
+        output = self.queues[index + 1] if index + 1 < len(self.stages) else None
+        
+        for batch in self._inbox(index):
+            start = time.time()
+            try:
+                result = fn(batch)
+            except Exception as e:
+                print(f"  ❌ {name}: {str(e)[:100]}")
+                stats['errors'] += len(batch)
+                result = None
+            stats['seconds'] += time.time() - start
+            stats['batches'] += 1
+            stats['items'] += len(batch)
+            
+            if output is not None and result:
+                output.put(result)
+        
+        if output is not None:
+            output.put(_END)
+    
+    def stream(self) -> 'ItemStream':
+        return ItemStream(self)
+    
+    def print_report(self):
+        if self.started is None:
+            return
+        
+        print(f"🔀 Pipeline: {self.received} recebidos, {self.unique} únicos, "
+              f"{self.received - self.unique} repetidos | fila máx {self.peak}/{self.queues[0].maxsize}")
+        for name, s in self.stats.items():
+            busy = 100 * s['seconds'] / self.elapsed if self.elapsed else 0
+            print(f"   • {name}: {s['items']} itens em {s['batches']} lotes, "
+                  f"{s['seconds']:.1f}s ocupado ({busy:.0f}% de {self.elapsed:.0f}s), {s['errors']} erros")
+
+
+class ItemStream:
+    """
+    "Lista" de itens de uma fonte que vai direto para o pipeline
+    
+    Os scrapers fazem `items.append(...)` e `len(items)`: com um ItemStream
+    no lugar da lista, cada item segue para o pipeline na hora e só a
+    contagem fica na fonte. Os itens não ficam aqui: percorrê-los é erro.
+    """
+    
+    def __init__(self, pipeline: Pipeline):
+        self.pipeline = pipeline
+        self.count = 0
+    
+    def append(self, item: dict):
+        self.pipeline.put(item)
+        self.count += 1
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __iter__(self):
+        raise TypeError("ItemStream não guarda os itens (já foram para o pipeline); use len()")
+
+
+class JsonArrayWriter:
+    """Lista JSON escrita item a item, no mesmo formato de json.dump(lista, indent=2)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+    
+    def write(self, items: List[dict]):
+        for item in items:
+            text = json.dumps(item, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            self._file.write(f"{',' if self.count else '['}\n  {text}")
+            self.count += 1
+    
+    def close(self):
+        self._file.write('\n]' if self.count else '[]')
+        self._file.close()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""RATE LIMITER - Token bucket por host com ajuste AIMD"""
+
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class HostBucket:
+    """Estado de um host: ritmo atual (req/s), fichas e bloqueio por Retry-After"""
+    
+    def __init__(self, rate: float, max_rate: float, min_rate: float, capacity: float):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.capacity = capacity
+        self.step = rate * 0.1
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.stats = {
+            'requests': 0, 'sleep_seconds': 0.0, 'increases': 0, 'decreases': 0,
+            'retry_after': 0, 'min_rate': rate,
+        }
+    
+    def reserve(self) -> float:
+        """Reserva uma ficha; retorna quantos segundos esperar por ela"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        
+        # Ficha negativa = reserva: a próxima chamada espera a mais
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        
+        wait = max(wait, self.blocked_until - now)
+        self.stats['requests'] += 1
+        self.stats['sleep_seconds'] += wait
+        return wait
+    
+    def increase(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.step)
+            self.stats['increases'] += 1
+    
+    def decrease(self):
+        # Falhas simultâneas (várias vagas em voo) contam como um recuo só
+        now = time.monotonic()
+        if now - self.last_decrease < 1 / self.rate:
+            return
+        self.last_decrease = now
+        
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0)
+        self.stats['decreases'] += 1
+        self.stats['min_rate'] = min(self.stats['min_rate'], self.rate)
+
+
+class RateLimiter:
+    """
+    Limite de requisições por host, compartilhado entre scrapers e threads
+    
+    Substitui os `time.sleep(random.uniform(...))`: cada requisição pega
+    uma ficha do balde do host (`wait`/`wait_async`) e depois informa o
+    resultado (`observe`). Respostas 200 rápidas sobem o ritmo aos poucos
+    (aditivo); 429, 5xx e timeouts cortam pela metade (multiplicativo) e
+    um `Retry-After` bloqueia o host pelo tempo pedido.
+    """
+    
+    # host → (req/s inicial, req/s máximo) por fluxo; o inicial é o ritmo dos
+    # atrasos antigos, uniform(1.5, 3), (2, 5) e (3, 6) s entre requisições
+    HOSTS = {
+        'www.sodresantoro.com.br': (0.44, 4.0),
+        'offer-query.superbid.net': (0.29, 5.0),
+        'www.megaleiloes.com.br': (0.22, 2.0),
+    }
+    DEFAULT = (0.5, 3.0)
+    
+    def __init__(self, hosts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 default: Optional[Tuple[float, float]] = None, min_rate: float = 0.05,
+                 capacity: float = 1.0, slow_seconds: float = 2.0, max_retry_after: float = 120.0):
+        self.hosts = dict(self.HOSTS if hosts is None else hosts)
+        self.default = default or self.DEFAULT
+        self.min_rate = min_rate
+        self.capacity = capacity
+        self.slow_seconds = slow_seconds
+        self.max_retry_after = max_retry_after
+        self.enabled = True  # desligado no replay do cassette (sem rede, sem espera)
+        self._streams = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    def _bucket(self, url: str) -> HostBucket:
+        host = urlsplit(url).netloc or url
+        if host not in self._buckets:
+            rate, max_rate = self.hosts.get(host, self.default)
+            streams = self._streams.get(host, 1)
+            self._buckets[host] = HostBucket(rate * streams, max_rate * streams, self.min_rate,
+                                             max(self.capacity, streams))
+        return self._buckets[host]
+    
+    def set_streams(self, url: str, streams: int):
+        """
+        Requisições em paralelo no host (ex.: --concorrencia)
+        
+        O ritmo inicial e o máximo valem por fluxo: com N fluxos o balde
+        começa em N vezes o ritmo sequencial e aceita N fichas de uma vez.
+        429/5xx continuam cortando o total pela metade.
+        """
+        host = urlsplit(url).netloc or url
+        streams = max(1, int(streams))
+        with self._lock:
+            previous = self._streams.get(host, 1)
+            self._streams[host] = streams
+            bucket = self._buckets.get(host)
+            if bucket is not None and streams != previous:
+                factor = streams / previous
+                bucket.rate = max(self.min_rate, bucket.rate * factor)
+                bucket.max_rate *= factor
+                bucket.step *= factor
+                bucket.capacity = max(self.capacity, streams)
+    
+    def _reserve(self, url: str) -> float:
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            return self._bucket(url).reserve()
+    
+    def wait(self, url: str) -> float:
+        """Espera a vez do host (aceita URL ou host); retorna o tempo dormido"""
+        wait = self._reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    async def wait_async(self, url: str) -> float:
+        wait = self._reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+    
+    def _retry_after(self, response) -> Optional[float]:
+        # requests: headers sem caixa; Playwright: nomes já em minúsculas
+        value = (getattr(response, 'headers', None) or {}).get('retry-after')
+        if not value:
+            return None
+        
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        
+        return min(max(0.0, seconds), self.max_retry_after)
+    
+    def observe(self, url: str, response=None, elapsed: float = 0.0, error: bool = False):
+        """
+        Ajusta o ritmo do host pelo resultado da requisição
+        
+        `response` pode ser do requests (status_code) ou do Playwright (status).
+        404 e demais 4xx não mexem no ritmo (fim de paginação, lote removido).
+        """
+        status = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+        retry_after = self._retry_after(response) if response is not None else None
+        
+        with self._lock:
+            bucket = self._bucket(url)
+            
+            if retry_after is not None and status in (429, 503):
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+                bucket.stats['retry_after'] += 1
+            
+            if error or status == 429 or (status or 0) >= 500:
+                bucket.decrease()
+            elif status == 200 and elapsed < self.slow_seconds:
+                bucket.increase()
+    
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                host: {
+                    'rate': round(b.rate, 2),
+                    'min_rate': round(b.stats['min_rate'], 2),
+                    'requests': b.stats['requests'],
+                    'sleep_seconds': round(b.stats['sleep_seconds'], 1),
+                    'decreases': b.stats['decreases'],
+                    'retry_after': b.stats['retry_after'],
+                }
+                for host, b in self._buckets.items()
+            }
+    
+    def print_report(self):
+        report = self.report()
+        if not report:
+            return
+        
+        total = sum(r['sleep_seconds'] for r in report.values())
+        print(f"🚦 Ritmo por host ({total:.0f}s de espera no total):")
+        for host, r in report.items():
+            print(f"   • {host}: {r['rate']} req/s (mín {r['min_rate']}), {r['requests']} req, "
+                  f"{r['sleep_seconds']}s dormindo, {r['decreases']} recuos, {r['retry_after']} Retry-After")
+
+
+# Instância única do processo
+rate_limiter = RateLimiter()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""SODRÉ MATERIAIS - Índice "materiais" baixado uma vez e distribuído por categoria"""
+
+import time
+import requests
+from typing import Dict, List
+
+from browser_pool import browser_pool
+from category_classifier import category_classifier
+from cookie_cache import cookie_cache, cookies_dict, rejected, SODRE_HOST
+from rate_limiter import rate_limiter
+
+
+class SodreMateriais:
+    """
+    Etapa compartilhada de busca da Sodré para as categorias não-veículo
+    
+    tecnologia, bens_consumo e eletrodomesticos filtram o mesmo índice
+    "materiais". A primeira categoria que pedir dispara o download e a
+    classificação: cada lote passa uma vez pelo category_classifier e vai
+    para todas as categorias que casaram. As demais (no mesmo processo)
+    só leem a sua parte.
+    
+    Cada categoria registra suas palavras-chave ao ser importada. A busca
+    leva a união delas como cláusulas `should` (minimum_should_match=1),
+    então só lotes candidatos trafegam; o classificador continua
+    verificando no cliente.
+    """
+    
+    API = "https://www.sodresantoro.com.br/api/search-lots"
+    INDICES = ["materiais"]
+    MAX_PAGES = 20
+    
+    def __init__(self, server_filter: bool = True):
+        self.server_filter = server_filter
+        self.lotes = None
+        self.rotas = None
+        self.categorias = {}
+        self.stats = {'pages': 0, 'bytes': 0, 'seconds': 0.0, 'routes': {}, 'multi': 0}
+        self._cookies = None
+        self._from_cache = False
+    
+    def register(self, categoria: str, keywords: List[str], campos: List[str]):
+        """Registra palavras-chave e campos na busca do servidor e no classificador local"""
+        self.categorias[categoria] = {
+            'keywords': keywords,
+            'campos': campos,
+        }
+        category_classifier.register(categoria, keywords, campos)
+    
+    def _capture_cookies(self):
+        with browser_pool.context() as context:
+            page = context.new_page()
+            browser_pool.navigate(page, "https://www.sodresantoro.com.br",
+                                  wait_for=lambda: bool(context.cookies()), label="Sodré home")
+            return context.storage_state()
+    
+    def _should(self) -> List[dict]:
+        """Cláusulas should de todas as categorias registradas (sem repetição)"""
+        clauses = []
+        seen = set()
+        for cfg in self.categorias.values():
+            for campo in cfg['campos']:
+                for kw in cfg['keywords']:
+                    if (campo, kw) in seen:
+                        continue
+                    seen.add((campo, kw))
+                    # Frases ("ar condicionado") precisam casar na ordem
+                    tipo = "match_phrase" if ' ' in kw else "match"
+                    clauses.append({tipo: {campo: kw}})
+        return clauses
+    
+    def _query(self, server_filter: bool) -> dict:
+        should = self._should() if server_filter else []
+        query = {
+            "bool": {
+                "must": [],
+                "filter": [{"terms": {"lot_status_id": [1, 2, 3]}}],
+                "should": should,
+                "must_not": []
+            }
+        }
+        if should:
+            query["bool"]["minimum_should_match"] = 1
+        return query
+    
+    def _send(self, payload: dict) -> requests.Response:
+        rate_limiter.wait(self.API)
+        start = time.time()
+        try:
+            r = requests.post(self.API, json=payload, cookies=self._cookies, timeout=60)
+        except Exception:
+            rate_limiter.observe(self.API, error=True)
+            raise
+        rate_limiter.observe(self.API, r, time.time() - start)
+        return r
+    
+    def _post(self, payload: dict) -> requests.Response:
+        if self._cookies is None:
+            state, self._from_cache = cookie_cache.get_or_capture(SODRE_HOST, self._capture_cookies)
+            self._cookies = cookies_dict(state)
+        
+        r = self._send(payload)
+        
+        # Cookies do cache recusados: recaptura uma vez e repete
+        if payload["from"] == 0 and self._from_cache and rejected(r):
+            state, self._from_cache = cookie_cache.get_or_capture(SODRE_HOST, self._capture_cookies, force=True)
+            self._cookies = cookies_dict(state)
+            r = self._send(payload)
+        
+        return r
+    
+    def _download(self, server_filter: bool, verbose: bool = True) -> dict:
+        """Pagina o índice; retorna lotes, páginas, bytes e status da 1ª página"""
+        result = {'lotes': [], 'pages': 0, 'bytes': 0, 'status': None}
+        pag = 0
+        
+        while pag < self.MAX_PAGES:
+            payload = {
+                "indices": self.INDICES,
+                "query": self._query(server_filter),
+                "from": pag * 100,
+                "size": 100
+            }
+            
+            r = self._post(payload)
+            if result['status'] is None:
+                result['status'] = r.status_code
+            
+            if r.status_code != 200:
+                break
+            
+            result['pages'] += 1
+            result['bytes'] += len(r.content)
+            
+            page_lotes = r.json().get("results", [])
+            if not page_lotes:
+                break
+            
+            result['lotes'].extend(page_lotes)
+            if verbose:
+                print(f"  Pág {pag+1}: +{len(page_lotes)} | Total: {len(result['lotes'])}")
+            
+            if len(page_lotes) < 100:
+                break
+            
+            pag += 1
+        
+        return result
+    
+    def fetch(self) -> List[dict]:
+        """Lotes ativos do índice (baixa só na primeira chamada)"""
+        if self.lotes is not None:
+            print(f"  ♻️ Índice materiais já baixado ({len(self.lotes)} lotes)")
+            return self.lotes
+        
+        start = time.time()
+        server_filter = self.server_filter and bool(self.categorias)
+        if server_filter:
+            print(f"  🔎 Filtro no servidor: {len(self._should())} cláusulas ({', '.join(self.categorias)})")
+        
+        result = self._download(server_filter)
+        
+        # Busca não aceitou o filtro: volta para o download completo
+        if server_filter and result['status'] == 400:
+            print("  ⚠️ Filtro no servidor recusado (HTTP 400) - baixando índice completo")
+            result = self._download(False)
+        
+        self.stats['pages'] += result['pages']
+        self.stats['bytes'] += result['bytes']
+        self.stats['seconds'] += time.time() - start
+        self.lotes = result['lotes']
+        return self.lotes
+    
+    def _route_all(self, lotes: List[dict]) -> Dict[str, List[dict]]:
+        """Classifica cada lote uma vez e o entrega a todas as categorias registradas que casaram"""
+        rotas = {categoria: [] for categoria in self.categorias}
+        for lote in lotes:
+            destinos = category_classifier.classify(lote) & rotas.keys()
+            for categoria in destinos:
+                rotas[categoria].append(lote)
+        return rotas
+    
+    def route(self, categoria: str) -> List[dict]:
+        """Lotes do índice compartilhado que casaram com a categoria (classificados só na primeira chamada)"""
+        lotes = self.fetch()
+        if self.rotas is None:
+            self.rotas = self._route_all(lotes)
+            destinos = {}
+            for aceitos in self.rotas.values():
+                for lote in aceitos:
+                    destinos[id(lote)] = destinos.get(id(lote), 0) + 1
+            self.stats['multi'] = sum(n > 1 for n in destinos.values())
+        
+        aceitos = self.rotas.get(categoria, [])
+        self.stats['routes'][categoria] = len(aceitos)
+        return aceitos
+    
+    def compare(self) -> dict:
+        """
+        Baixa o índice com e sem filtro no servidor e compara
+        
+        Reporta páginas/bytes economizados e, por categoria, quantos lotes
+        o classificador aceita em cada modo (perdidos = só no download completo).
+        """
+        print("\n🔬 COMPARAÇÃO: filtro no servidor x filtro no cliente")
+        completo = self._download(False, verbose=False)
+        filtrado = self._download(True, verbose=False)
+        
+        report = {
+            'cliente': {k: completo[k] for k in ('pages', 'bytes')},
+            'servidor': {k: filtrado[k] for k in ('pages', 'bytes')},
+            'categorias': {},
+        }
+        report['cliente']['lotes'] = len(completo['lotes'])
+        report['servidor']['lotes'] = len(filtrado['lotes'])
+        
+        print(f"  Cliente:  {completo['pages']} págs, {completo['bytes'] / 1024:.0f} KB, {len(completo['lotes'])} lotes")
+        print(f"  Servidor: {filtrado['pages']} págs, {filtrado['bytes'] / 1024:.0f} KB, {len(filtrado['lotes'])} lotes")
+        
+        if completo['bytes']:
+            saved = 1 - filtrado['bytes'] / completo['bytes']
+            print(f"  💾 Economia: {completo['pages'] - filtrado['pages']} págs, "
+                  f"{(completo['bytes'] - filtrado['bytes']) / 1024:.0f} KB ({saved:.0%})")
+        
+        rotas_cliente = self._route_all(completo['lotes'])
+        rotas_servidor = self._route_all(filtrado['lotes'])
+        for categoria in self.categorias:
+            ids_cliente = {l.get('lot_id') for l in rotas_cliente[categoria]}
+            ids_servidor = {l.get('lot_id') for l in rotas_servidor[categoria]}
+            perdidos = len(ids_cliente - ids_servidor)
+            report['categorias'][categoria] = {
+                'cliente': len(ids_cliente),
+                'servidor': len(ids_servidor),
+                'perdidos': perdidos,
+            }
+            print(f"  • {categoria}: cliente {len(ids_cliente)} | servidor {len(ids_servidor)} | perdidos {perdidos}")
+        
+        return report
+    
+    def print_report(self):
+        s = self.stats
+        if not s['pages']:
+            return
+        
+        routes = ', '.join(f"{cat}: {n}" for cat, n in s['routes'].items())
+        modo = "filtro no servidor" if self.server_filter and self.categorias else "índice completo"
+        print(f"📦 Sodré materiais: {len(self.lotes or [])} lotes, {s['pages']} págs, "
+              f"{s['bytes'] / 1024:.0f} KB em {s['seconds']:.0f}s (baixado 1x, {modo})")
+        if len(s['routes']) > 1:
+            print(f"   • Roteados: {routes} - {len(s['routes']) - 1} download(s) evitado(s)")
+        if s['multi']:
+            print(f"   • {s['multi']} lote(s) em 2+ categorias")
+
+
+# Instância única do processo
+sodre_materiais = SodreMateriais()
@@ -3,15 +3,45 @@
 """SUPABASE CLIENT - CORRIGIDO PARA SCHEMA auctions"""
 
 import os
+import json
 import time
+import random
+import hashlib
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from typing import Optional
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+
+from change_store import change_store
 
 
 class SupabaseClient:
     """Cliente para Supabase - Schema auctions (não public)"""
     
-    def __init__(self):
+    # Batch por bytes do payload (linhas de 300 B e de 8 KB não pesam igual),
+    # ajustado pela latência observada: rápido cresce, lento encolhe
+    BATCH_BYTES = 512 * 1024
+    MIN_BATCH_BYTES = 32 * 1024
+    MAX_BATCH_BYTES = 4 * 1024 * 1024
+    TARGET_LATENCY = 2.0        # s por batch
+    CONCURRENCY = 4             # batches em voo (uma conexão keep-alive cada)
+    MAX_RETRIES = 4
+    BACKOFF = 1.0               # 1s, 2s, 4s, 8s... (com jitter)
+    MAX_BACKOFF = 30.0
+    TIMEOUT = (10, 60)          # conexão, leitura
+    RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+    # Servidor fora/sobrecarregado: dividir o batch não ajuda
+    UNAVAILABLE = {None, 429, 502, 503, 504}
+    # Mudam a cada execução: ficam fora do hash de conteúdo (change_store)
+    VOLATILE = ('is_active', 'last_scraped_at')
+    TOUCH_CHUNK = 200           # ids por PATCH de last_scraped_at
+    # O que muda num lote ao vivo entre execuções (modo rápido: só isso vai)
+    HOT_FIELDS = ('value', 'value_text', 'total_bids', 'total_bidders', 'total_visits', 'days_remaining')
+    PREFETCH_PAGE = 10000       # chaves por leitura (o servidor pode cortar antes, ex.: max-rows 1000)
+    
+    def __init__(self, concurrency: Optional[int] = None):
         self.url = os.getenv('SUPABASE_URL')
         self.key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
         
@@ -30,79 +60,157 @@ class SupabaseClient:
             'Prefer': 'resolution=merge-duplicates,return=minimal'
         }
         
+        self.concurrency = concurrency or self.CONCURRENCY
+        self.batch_bytes = self.BATCH_BYTES
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        
+        # Pool do tamanho da concorrência: cada thread reaproveita sua conexão
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def upsert(self, tabela: str, items: list) -> dict:
         """
         Faz upsert em batch na tabela especificada (schema auctions)
         
+        As chaves já no banco são lidas antes (`existing_keys`), então
+        'inserted'/'updated' contam de verdade quem era novo. Linhas iguais
+        às do último envio (change_store) só têm `last_scraped_at`
+        renovado; as demais vão em batches montados por
+        tamanho em bytes (`batch_bytes`, que se ajusta à latência), em
+        paralelo (`concurrency`). 429, 5xx e timeouts são repetidos com
+        backoff exponencial (respeitando Retry-After); um batch recusado é
+        dividido ao meio até isolar as linhas com problema, e só elas ficam
+        de fora.
+        
         Args:
             tabela: Nome da tabela (veiculos, tecnologia, etc)
             items: Lista de items para inserir/atualizar
         
         Returns:
-            {'inserted': X, 'updated': Y, 'errors': Z}
+            {'inserted': X, 'updated': Y, 'errors': Z, 'skipped': W,
+             'failed': [{'source', 'external_id', 'status', 'error'}, ...],
+             'new': N, 'changed': N, 'unchanged': N, 'touched': N, 'touch_errors': N, 'refreshed': N,
+             'existing': N (None se a leitura falhou), 'prefetch_reads': N,
+             'requests': N, 'retries': N, 'splits': N, 'batches': N,
+             'bytes_sent': N, 'bytes_saved': N}
         """
-        if not items:
-            return {'inserted': 0, 'updated': 0, 'errors': 0}
-        
-        prepared = []
-        for item in items:
-            try:
-                db_item = self._prepare(item)
-                if db_item:
-                    prepared.append(db_item)
-            except Exception as e:
-                print(f"  ⚠️ Erro ao preparar item: {e}")
+        stream = self.stream(tabela)
+        stream.send(items)
+        return stream.close()
+    
+    def refresh(self, tabela: str, items: list) -> dict:
+        """
+        Atualização rápida: só os campos quentes dos lotes já enviados
         
-        if not prepared:
-            print("  ⚠️ Nenhum item válido para inserir")
-            return {'inserted': 0, 'updated': 0, 'errors': 0}
+        Lote conhecido (aceito antes, no change_store) que mudou vai só com
+        HOT_FIELDS + last_scraped_at, num upsert parcial (`columns=`): a
+        descrição e o resto da linha não trafegam nem são regravados. Lote
+        novo vai inteiro; igual, só o PATCH de `last_scraped_at`. Mudanças
+        fora dos campos quentes ficam para o próximo `upsert` completo (o
+        hash antigo é mantido, então a linha conta como alterada lá).
         
-        stats = {'inserted': 0, 'updated': 0, 'errors': 0}
-        batch_size = 500
-        total_batches = (len(prepared) + batch_size - 1) // batch_size
+        Returns:
+            As mesmas stats de `upsert`, com 'refreshed' = linhas enviadas só com os campos quentes
+        """
+        stream = self.stream(tabela, hot=True)
+        stream.send(items)
+        return stream.close()
+    
+    def stream(self, tabela: str, hot: bool = False) -> 'UpsertStream':
+        """Upsert em fluxo: `send` a cada lote de itens, `close` no fim (retorna as stats)"""
+        return UpsertStream(self, tabela, hot)
+    
+    def existing_keys(self, tabela: str) -> tuple:
+        """
+        (source, external_id) de todas as linhas da tabela, em leituras grandes
         
-        # 🔥 FIX: URL sem schema (usa Content-Profile header)
+        Paginação por chave: cada página começa depois da última chave da
+        anterior (sem OFFSET, que fica mais caro a cada página) e só a
+        chave trafega. Retorna (chaves, leituras); chaves None se uma
+        leitura falhar.
+        """
         url = f"{self.url}/rest/v1/{tabela}"
-        
-        for i in range(0, len(prepared), batch_size):
-            batch = prepared[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
+        keys = set()
+        reads = 0
+        last = None
+        while True:
+            params = {'select': 'source,external_id', 'order': 'source,external_id', 'limit': self.PREFETCH_PAGE}
+            if last:
+                source, external_id = (self._quote(v) for v in last)
+                params['or'] = f"(source.gt.{source},and(source.eq.{source},external_id.gt.{external_id}))"
             
-            try:
-                r = self.session.post(
-                    url,
-                    json=batch,
-                    timeout=120
-                )
-                
-                if r.status_code in (200, 201):
-                    stats['inserted'] += len(batch)
-                    print(f"  ✅ Batch {batch_num}/{total_batches}: {len(batch)} itens")
-                
-                elif r.status_code == 409:
-                    stats['updated'] += len(batch)
-                    print(f"  🔄 Batch {batch_num}/{total_batches}: {len(batch)} atualizados")
-                
-                else:
-                    error_msg = r.text[:200] if r.text else 'Sem detalhes'
-                    print(f"  ❌ Batch {batch_num}: HTTP {r.status_code} - {error_msg}")
-                    stats['errors'] += len(batch)
+            status, error, attempts, _, content = self._request('get', f"{url}?{urlencode(params)}", None, self.MAX_RETRIES)
+            reads += attempts
+            if status != 200:
+                print(f"  ⚠️ Leitura das chaves de {tabela}: HTTP {status} - {error}")
+                return None, reads
             
+            rows = json.loads(content)
+            if not rows:
+                return keys, reads
+            keys.update((row['source'], row['external_id']) for row in rows)
+            last = (rows[-1]['source'], rows[-1]['external_id'])
+    
+    @staticmethod
+    def _quote(value: str) -> str:
+        """Valor entre aspas para filtros do PostgREST (vírgulas, parênteses...)"""
+        return '"{}"'.format(value.replace('\\', '\\\\').replace('"', '\\"'))
+    
+    def _request(self, method: str, url: str, body: Optional[bytes], retries: int) -> tuple:
+        """
+        GET/POST/PATCH com novas tentativas
+        
+        Retorna (status, erro, tentativas, segundos da última, corpo): status 408 em timeout, None sem conexão.
+        """
+        attempt = 0
+        while True:
+            wait = None
+            content = None
+            start = time.time()
+            try:
+                r = self.session.request(method, url, data=body, timeout=self.TIMEOUT)
+                status = r.status_code
+                content = r.content
+                error = (r.text[:200] if r.text else 'Sem detalhes') if status >= 300 else None
+                if status == 429 or status == 503:
+                    wait = self._retry_after(r)
             except requests.exceptions.Timeout:
-                print(f"  ❌ Batch {batch_num}: Timeout após 120s")
-                stats['errors'] += len(batch)
+                status, error = 408, f"Timeout após {self.TIMEOUT[1]}s"
+            except requests.exceptions.RequestException as e:
+                status, error = None, str(e)[:200]
             
-            except Exception as e:
-                print(f"  ❌ Batch {batch_num}: {e}")
-                stats['errors'] += len(batch)
+            # `retries` vale para 408/500 (podem ser do próprio batch); servidor fora sempre tem todas
+            retryable = status is None or status in self.RETRY_STATUS
+            limit = self.MAX_RETRIES if status in self.UNAVAILABLE else retries
+            if not retryable or attempt >= limit:
+                return status, error, attempt + 1, time.time() - start, content
             
-            if batch_num < total_batches:
-                time.sleep(0.5)
-        
-        return stats
+            time.sleep(wait if wait is not None else self._backoff(attempt))
+            attempt += 1
+    
+    def _adapt(self, size: int, status, elapsed: float):
+        """Ajusta batch_bytes pelo batch que voltou (só a thread que envia mexe nele)"""
+        if status in (408, 413):
+            self.batch_bytes = max(self.MIN_BATCH_BYTES, min(self.batch_bytes, size) // 2)
+        elif status not in (200, 201, 409) or size < self.batch_bytes / 2:
+            return  # erro de dados ou batch pequeno (sobra do fim): não diz nada do ritmo
+        elif elapsed > self.TARGET_LATENCY:
+            self.batch_bytes = max(self.MIN_BATCH_BYTES, self.batch_bytes // 2)
+        elif elapsed < self.TARGET_LATENCY / 2:
+            self.batch_bytes = min(self.MAX_BATCH_BYTES, int(self.batch_bytes * 1.5))
+    
+    def _backoff(self, attempt: int) -> float:
+        # Metade fixa + metade aleatória: threads que falharam juntas não voltam juntas
+        delay = min(self.MAX_BACKOFF, self.BACKOFF * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def _retry_after(self, response) -> Optional[float]:
+        try:
+            return min(self.MAX_BACKOFF, max(0.0, float(response.headers.get('Retry-After', ''))))
+        except ValueError:
+            return None
     
     def _prepare(self, item: dict) -> dict:
         """Prepara item para o schema do Supabase"""
@@ -227,6 +335,234 @@ class SupabaseClient:
             self.session.close()
 
 
+
+class UpsertStream:
+    """
+    Batches de upsert montados por bytes conforme as linhas chegam
+    
+    `send` prepara e serializa cada linha uma vez só. Linha igual à do
+    último envio (mesmo hash no change_store) entra só num PATCH de
+    `last_scraped_at` por lote de ids; as novas/alteradas vão para o buffer,
+    que vira um batch quando passa de `client.batch_bytes`. Com `hot`, as
+    alteradas vão só com os campos quentes, num buffer à parte (ver
+    `SupabaseClient.refresh`), e contam como atualizadas; sem a leitura
+    das chaves do banco, vão inteiras no upsert. As chaves já no banco são
+    lidas no primeiro `send` com itens (stream vazio não faz leitura nenhuma).
+    Chave fora do banco é nova (mesmo com hash local); no banco e sem hash
+    local, conta como alterada. Os pedidos saem em segundo plano (até
+    `client.concurrency` em voo - com todos ocupados, `send` espera um
+    voltar). Numa recusa, as metades reaproveitam os bytes já serializados.
+    """
+    
+    def __init__(self, client: SupabaseClient, tabela: str, hot: bool = False):
+        self.client = client
+        self.tabela = tabela
+        self.hot = hot
+        # 🔥 FIX: URL sem schema (usa Content-Profile header)
+        self.url = f"{client.url}/rest/v1/{tabela}"
+        columns = ','.join(('source', 'external_id') + client.HOT_FIELDS + client.VOLATILE)
+        self.urls = {
+            'upsert': self.url,
+            'hot': f"{self.url}?{urlencode({'columns': columns, 'on_conflict': 'source,external_id'})}",
+        }
+        self.stats = {
+            'inserted': 0, 'updated': 0, 'errors': 0, 'skipped': 0, 'failed': [],
+            'new': 0, 'changed': 0, 'unchanged': 0, 'touched': 0, 'touch_errors': 0, 'refreshed': 0,
+            'existing': None, 'prefetch_reads': 0,
+            'requests': 0, 'retries': 0, 'splits': 0, 'batches': 0, 'bytes_sent': 0, 'bytes_saved': 0,
+        }
+        self.executor = ThreadPoolExecutor(max_workers=client.concurrency)
+        self.prefetched = False
+        self.existing = None
+        self.pending = {}
+        # Mesma chave duas vezes no batch derruba o upsert inteiro: fica a última
+        self.buffers = {'upsert': {}, 'hot': {}}
+        self.buffered = {'upsert': 0, 'hot': 0}
+        self.touch = {}
+    
+    def _existing_keys(self) -> Optional[set]:
+        # Só no primeiro lote com itens: sem nada a enviar, a tabela não é lida
+        if not self.prefetched:
+            self.prefetched = True
+            start = time.time()
+            self.existing, self.stats['prefetch_reads'] = self.client.existing_keys(self.tabela)
+            if self.existing is not None:
+                self.stats['existing'] = len(self.existing)
+                print(f"  🔎 {len(self.existing)} linhas já no banco ({self.stats['prefetch_reads']} leituras, "
+                      f"{time.time() - start:.1f}s)")
+        return self.existing
+    
+    def send(self, items: list):
+        if not items:
+            return
+        existing = self._existing_keys()
+        for item in items:
+            try:
+                row = self.client._prepare(item)
+                if row:
+                    volatile = {k: row.pop(k) for k in self.client.VOLATILE}
+                    content = json.dumps(row, ensure_ascii=False, allow_nan=False).encode()
+                    encoded = content[:-1] + b',' + json.dumps(volatile).encode()[1:]
+                else:
+                    encoded = None
+            except Exception as e:
+                print(f"  ⚠️ Erro ao preparar item: {e}")
+                encoded = None
+            
+            if not encoded:
+                self.stats['skipped'] += 1
+                continue
+            
+            key = (row['source'], row['external_id'])
+            content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+            state = change_store.classify(self.tabela, key, content_hash)
+            if existing is not None:
+                # O banco manda: apagada lá vai inteira, existente sem hash local vai como alterada
+                if key not in existing:
+                    state = 'new'
+                elif state == 'new':
+                    state = 'changed'
+            self.stats[state] += 1
+            
+            if state == 'unchanged':
+                self.stats['bytes_saved'] += len(encoded)
+                ids = self.touch.setdefault(row['source'], [])
+                ids.append(row['external_id'])
+                if len(ids) >= self.client.TOUCH_CHUNK:
+                    self._flush_touch(row['source'])
+                continue
+            
+            kind = 'upsert'
+            # Sem a leitura do banco, a linha pode ter sido apagada lá: só o upsert
+            # completo leva as colunas NOT NULL
+            if state == 'changed' and self.hot and existing is not None:
+                # Hash fica o antigo: o que mudou fora dos campos quentes vai no próximo upsert completo
+                hot = {k: row[k] for k in ('source', 'external_id') + self.client.HOT_FIELDS}
+                hot.update(volatile)
+                self.stats['bytes_saved'] += len(encoded)
+                encoded = json.dumps(hot, ensure_ascii=False, allow_nan=False).encode()
+                self.stats['bytes_saved'] -= len(encoded)
+                kind, content_hash = 'hot', None
+            
+            buffer = self.buffers[kind]
+            if key in buffer:
+                self.buffered[kind] -= len(buffer[key][1])
+            buffer[key] = (row, encoded, content_hash)
+            self.buffered[kind] += len(encoded)
+            
+            if self.buffered[kind] >= self.client.batch_bytes:
+                self._flush(kind)
+    
+    def close(self) -> dict:
+        """Envia o que sobrou, espera todos os pedidos e grava os hashes aceitos"""
+        for kind in self.buffers:
+            self._flush(kind)
+        for source in list(self.touch):
+            self._flush_touch(source)
+        while self.pending:
+            self._collect()
+        self.executor.shutdown()
+        
+        change_store.commit()
+        change_store.record(self.stats)
+        
+        if self.stats['skipped'] and not self.stats['batches'] and not self.stats['unchanged']:
+            print("  ⚠️ Nenhum item válido para inserir")
+        return self.stats
+    
+    def _wait_slot(self):
+        # Concorrência cheia: espera um pedido voltar (o scrape também espera)
+        while len(self.pending) >= self.client.concurrency:
+            self._collect()
+    
+    def _flush(self, kind: str = 'upsert'):
+        if not self.buffers[kind]:
+            return
+        
+        self._wait_slot()
+        self.stats['batches'] += 1
+        self._submit(kind, list(self.buffers[kind].values()), str(self.stats['batches']), self.client.MAX_RETRIES)
+        self.buffers[kind] = {}
+        self.buffered[kind] = 0
+    
+    def _flush_touch(self, source: str):
+        """PATCH de last_scraped_at/is_active nas linhas iguais de uma fonte"""
+        ids = self.touch.pop(source, [])
+        if not ids:
+            return
+        
+        self._wait_slot()
+        quoted = ','.join(self.client._quote(i) for i in ids)
+        url = f"{self.url}?{urlencode({'source': f'eq.{source}', 'external_id': f'in.({quoted})'})}"
+        body = json.dumps({'last_scraped_at': datetime.now().isoformat(), 'is_active': True}).encode()
+        
+        # O que o PATCH custa sai do que foi economizado
+        self.stats['bytes_saved'] -= len(url) + len(body)
+        future = self.executor.submit(self.client._request, 'patch', url, body, self.client.MAX_RETRIES)
+        self.pending[future] = ('touch', ids, source, 0, len(url) + len(body))
+    
+    def _submit(self, kind: str, batch: list, label: str, retries: int):
+        body = b'[' + b','.join(encoded for _, encoded, _ in batch) + b']'
+        future = self.executor.submit(self.client._request, 'post', self.urls[kind], body, retries)
+        self.pending[future] = (kind, batch, label, retries, len(body))
+    
+    def _collect(self):
+        """Processa os pedidos que voltaram (espera ao menos um)"""
+        done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            kind, batch, label, retries, size = self.pending.pop(future)
+            status, error, attempts, elapsed, _ = future.result()
+            self.stats['requests'] += attempts
+            self.stats['retries'] += attempts - 1
+            
+            if kind == 'touch':
+                if status in (200, 204):
+                    self.stats['touched'] += len(batch)
+                else:
+                    self.stats['touch_errors'] += len(batch)
+                    print(f"  ⚠️ last_scraped_at de {len(batch)} itens ({label}): HTTP {status} - {error}")
+                continue
+            
+            self.client._adapt(size, status, elapsed)
+            info = f"{len(batch)} itens, {size / 1024:.0f} KB, {elapsed:.2f}s"
+            
+            if status in (200, 201, 409):
+                if self.existing is not None:
+                    # merge-duplicates responde 201 para tudo: quem já existia vem da leitura prévia
+                    updated = sum((row['source'], row['external_id']) in self.existing for row, _, _ in batch)
+                    self.stats['updated'] += updated
+                    self.stats['inserted'] += len(batch) - updated
+                else:
+                    self.stats['inserted' if status != 409 else 'updated'] += len(batch)
+                self.stats['bytes_sent'] += size
+            
+            if status in (200, 201, 409) and kind == 'hot':
+                self.stats['refreshed'] += len(batch)
+                print(f"  ⚡ Batch {label}: {info} (campos quentes)")
+            
+            elif status in (200, 201, 409):
+                for row, _, content_hash in batch:
+                    change_store.stage(self.tabela, (row['source'], row['external_id']), content_hash)
+                print(f"  {'✅' if status != 409 else '🔄'} Batch {label}: {info}{' (atualizados)' if status == 409 else ''}")
+            
+            elif len(batch) > 1 and status not in self.client.UNAVAILABLE:
+                # Recusado: metades em paralelo, com uma tentativa extra só
+                # (a recusa quase sempre é de uma linha)
+                half = len(batch) // 2
+                self.stats['splits'] += 1
+                print(f"  ✂️ Batch {label}: {info} - HTTP {status}, dividindo em {half} + {len(batch) - half}")
+                self._submit(kind, batch[:half], label, min(retries, 1))
+                self._submit(kind, batch[half:], label, min(retries, 1))
+            
+            else:
+                self.stats['errors'] += len(batch)
+                self.stats['failed'].extend(
+                    {'source': row['source'], 'external_id': row['external_id'], 'status': status, 'error': error}
+                    for row, _, _ in batch
+                )
+                print(f"  ❌ Batch {label}: {info} - HTTP {status} - {error}")
+
+
 if __name__ == "__main__":
     print("="*60)
     print("🧪 TESTE DO SUPABASE CLIENT (SCHEMA auctions)")
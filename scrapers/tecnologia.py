@@ -4,13 +4,14 @@
 
 import json
 import time
-import random
 import requests
 from datetime import datetime
 from pathlib import Path
-from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 
+from rate_limiter import rate_limiter
+from sodre_materiais import sodre_materiais
+
 
 CATEGORIA = "tecnologia"
 TABELA_DB = "tecnologia"
@@ -43,60 +44,20 @@ class Normalizador:
 
 
 class SodreExtractor:
-    API = "https://www.sodresantoro.com.br/api/search-lots"
-    INDICES = ["materiais"]  # Sodré geralmente tem tech em "materiais"
+    # Também vão para a busca da Sodré como cláusulas should/match
+    KEYWORDS = ['notebook', 'computador', 'pc', 'monitor', 'impressora', 'tablet',
+                'celular', 'smartphone', 'iphone', 'samsung', 'dell', 'hp', 'lenovo']
+    CAMPOS = ['lot_title', 'lot_category']
     
     def extrair(self):
         print("\n🔵 SODRÉ")
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto("https://www.sodresantoro.com.br", timeout=30000)
-            time.sleep(2)
-            cookies = {c["name"]: c["value"] for c in page.context.cookies()}
-            browser.close()
-        
-        items = []
-        pag = 0
-        
-        while pag < 20:
-            payload = {
-                "indices": self.INDICES,
-                "query": {"bool": {"filter": [{"terms": {"lot_status_id": [1, 2, 3]}}]}},
-                "from": pag * 100,
-                "size": 100
-            }
-            
-            r = requests.post(self.API, json=payload, cookies=cookies, timeout=60)
-            if r.status_code != 200:
-                break
-            
-            lotes = r.json().get("results", [])
-            if not lotes:
-                break
-            
-            # Filtra apenas tecnologia
-            tech_lotes = [l for l in lotes if self._is_tech(l)]
-            items.extend(tech_lotes)
-            
-            print(f"  Pág {pag+1}: +{len(tech_lotes)} tech | Total: {len(items)}")
-            
-            pag += 1
-            time.sleep(random.uniform(2, 4))
+        # Índice "materiais" baixado uma vez e compartilhado entre as categorias
+        items = sodre_materiais.route(CATEGORIA)
+        print(f"  +{len(items)} tech de {len(sodre_materiais.lotes)} lotes")
         
         return self._normalizar(items)
     
-    def _is_tech(self, item):
-        """Verifica se é tecnologia"""
-        titulo = (item.get("lot_title") or "").lower()
-        cat = (item.get("lot_category") or "").lower()
-        
-        keywords = ['notebook', 'computador', 'pc', 'monitor', 'impressora', 'tablet',
-                   'celular', 'smartphone', 'iphone', 'samsung', 'dell', 'hp', 'lenovo']
-        
-        return any(k in titulo or k in cat for k in keywords)
-    
     def _normalizar(self, items):
         resultado = []
         
@@ -123,6 +84,10 @@ class SodreExtractor:
         return resultado
 
 
+# Registra as palavras-chave na busca compartilhada e no classificador antes do primeiro download
+sodre_materiais.register(CATEGORIA, SodreExtractor.KEYWORDS, SodreExtractor.CAMPOS)
+
+
 class MegaleiloesExtractor:
     BASE = "https://www.megaleiloes.com.br"
     
@@ -153,7 +118,10 @@ class SuperbidExtractor:
                 "searchType": "openedAll"
             }
             
+            rate_limiter.wait(self.API)
+            start = time.time()
             r = requests.get(self.API, params=params, timeout=60)
+            rate_limiter.observe(self.API, r, time.time() - start)
             if r.status_code != 200:
                 break
             
@@ -169,7 +137,6 @@ class SuperbidExtractor:
             
             print(f"  Pág {pag}: {len(offers)} | Total: {len(items)}")
             pag += 1
-            time.sleep(random.uniform(2, 4))
         
         return items
     
@@ -191,13 +158,8 @@ class SuperbidExtractor:
         }
 
 
-def main():
-    import argparse
-    
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--fonte', choices=['sodre', 'megaleiloes', 'superbid', 'all'], default='all')
-    args = parser.parse_args()
-    
+def executar(fonte: str = 'all'):
+    """Scraping + JSON + upload da categoria"""
     print("="*60)
     print(f"💻 SCRAPER: {CATEGORIA.upper()}")
     print("="*60)
@@ -210,16 +172,16 @@ def main():
     
     todos = []
     
-    fontes = [args.fonte] if args.fonte != 'all' else list(extractors.keys())
+    fontes = [fonte] if fonte != 'all' else list(extractors.keys())
     
-    for fonte in fontes:
+    for nome in fontes:
         try:
-            ext = extractors[fonte]()
+            ext = extractors[nome]()
             items = ext.extrair()
             todos.extend(items)
-            print(f"✅ {fonte}: {len(items)} itens")
+            print(f"✅ {nome}: {len(items)} itens")
         except Exception as e:
-            print(f"❌ {fonte}: {e}")
+            print(f"❌ {nome}: {e}")
     
     unicos = {i['external_id']: i for i in todos}
     todos = list(unicos.values())
@@ -237,10 +199,23 @@ def main():
         from supabase_client import SupabaseClient
         client = SupabaseClient()
         result = client.upsert(TABELA_DB, todos)
-        print(f"✅ Supabase: {result['inserted']} novos, {result['updated']} atualizados")
+        print(f"✅ Supabase: {result['inserted']} novos, {result['updated']} atualizados, {result['errors']} erros")
     except Exception as e:
         print(f"❌ Erro Supabase: {e}")
 
 
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fonte', choices=['sodre', 'megaleiloes', 'superbid', 'all'], default='all')
+    args = parser.parse_args()
+    
+    executar(args.fonte)
+    
+    sodre_materiais.print_report()
+    rate_limiter.print_report()
+
+
 if __name__ == "__main__":
     main()
@@ -7,38 +7,148 @@ Megaleilões + Superbid + Sodré Santoro
 
 import os
 import re
-import json
+import math
+import copy
 import time
-import random
+import asyncio
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from playwright.sync_api import sync_playwright
+from typing import Callable, Dict, List, Optional, Tuple
 from bs4 import BeautifulSoup
 
 # Importa cliente Supabase e normalizador
 from supabase_client import SupabaseClient
 from veiculosnormalizer import normalize_vehicles
+from async_fetcher import AsyncFetcher
+from browser_pool import browser_pool
+from cassette import cassette
+from category_classifier import category_classifier
+from change_store import change_store
+from cookie_cache import cookie_cache, cookies_dict, rejected, SODRE_HOST, MEGALEILOES_HOST
+from pipeline import Pipeline, JsonArrayWriter
+from rate_limiter import rate_limiter
+from watermarks import watermarks
 
 
 class VeiculosScraper:
     """Scraper unificado para veículos"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    SUPERBID_API = "https://offer-query.superbid.net/seo/offers/"
+    SUPERBID_HEADERS = {
+        "accept": "*/*",
+        "accept-language": "pt-BR,pt;q=0.9",
+        "origin": "https://exchange.superbid.net",
+        "referer": "https://exchange.superbid.net/",
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    }
+    SUPERBID_PAGE_SIZE = 100
+    SUPERBID_MAX_PAGES = 100  # só limita a sondagem; com `total` o plano é exato
+    SUPERBID_ORDER_RECENT = "id:desc"  # modo incremental: mais novas primeiro
+    
+    SODRE_API = "https://www.sodresantoro.com.br/api/search-lots"
+    SODRE_INDICES = ["veiculos", "judiciais-veiculos"]
+    SODRE_HEADERS = {
+        "accept": "application/json",
+        "accept-language": "pt-BR,pt;q=0.9",
+        "content-type": "application/json",
+        "origin": "https://www.sodresantoro.com.br",
+        "referer": "https://www.sodresantoro.com.br/",
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+    # Ordenação estável: lot_id desempata lotes com mesmo status/data
+    SODRE_SORT = [
+        ("lot_status_id_order", "asc"),
+        ("auction_date_init", "asc"),
+        ("lot_id", "asc"),
+    ]
+    # Modo incremental: mais novos primeiro, para parar na marca d'água
+    SODRE_SORT_RECENT = [("lot_id", "desc")]
+    SODRE_WINDOW = 10000  # max_result_window padrão do Elasticsearch
+    
+    MEGALEILOES_URL = "https://www.megaleiloes.com.br/veiculos"
+    MEGALEILOES_HEADERS = {
+        "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "accept-language": "pt-BR,pt;q=0.9",
+        "referer": "https://www.megaleiloes.com.br/",
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    }
+    MEGALEILOES_CARDS = 'div.card, .leilao-card, div[class*="card"]'
+    MEGALEILOES_MAX_PAGES = 50
+    
+    # Palavras-chave mobilidade (só tipo, não marca) - sem acento e plurais: category_classifier
+    MOBILITY_TYPES = [
+        'bicicleta', 'bike', 'velocípede',
+        'e-bike', 'bike elétrica',
+        'mountain bike', 'speed', 'bmx',
+        'patinete', 'patinete elétrico',
+        'patins', 'skate', 'longboard',
+        'segway', 'hoverboard', 'monowheel',
+        'quadriciclo', 'triciclo',
+        'ciclomotor', 'motoneta',
+    ]
+    
+    # Teste/demo: uma regex só, o grupo que casou é o motivo (texto já em minúsculas).
+    # Sem \b à esquerda (desligaria a busca rápida pelo literal): conferido em _test_match
+    TEST_PATTERN = re.compile(
+        r'(?P<deploy_text>deploy\b)'
+        r'|(?P<test_text>(?:demo|teste?)\b|^teste|demonstra[cç][aã]o)'
+    )
+    
+    # (chave em stats, nome, método) - ordem define a ordem dos itens
+    SOURCES = [
+        ('sodre', 'Sodré', 'scrape_sodre'),
+        ('megaleiloes', 'Megaleilões', 'scrape_megaleiloes'),
+        ('superbid', 'Superbid', 'scrape_superbid'),
+        ('superbid_oportunidades', 'Superbid Oportunidades', 'scrape_superbid_oportunidades'),
+    ]
+    
+    def __init__(self, superbid_concurrency: int = 4, megaleiloes_render: bool = False, hot_refresh: bool = False):
+        self.session = self._new_session()
+        
+        self.stats = self._empty_stats()
+        
+        # run(): itens das fontes vão direto para o pipeline (deduplica, normaliza, envia)
+        self.pipeline = None
+        
+        self.sodre_cookies = {}
+        self.cookies_from_cache = set()
+        
+        # Ritmo por host (AIMD), compartilhado por todas as fontes do processo
+        self.limiter = rate_limiter
+        
+        # Superbid: páginas em voo por host
+        self.superbid_concurrency = superbid_concurrency
+        
+        # Megaleilões: navegador só para cookies; listagem por HTTP
+        # (renderização só como fallback ou com megaleiloes_render=True)
+        self.megaleiloes_render = megaleiloes_render
+        self.megaleiloes_concurrency = 3
+        
+        # Upload só dos campos quentes (lance, visitas, dias) dos lotes já enviados
+        self.hot_refresh = hot_refresh
+    
+    @staticmethod
+    def _new_session() -> requests.Session:
+        session = requests.Session()
+        session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
         })
-        
-        self.items = []
-        self.stats = {
+        return session
+    
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {
             'sodre': 0,
             'megaleiloes': 0,
             'superbid': 0,
             'superbid_oportunidades': 0,
+            'sodre_truncated': 0,
+            'superbid_requests': 0,
+            'superbid_requests_saved': 0,
             'filtered_test_items': 0,
             'filter_details': {
                 'no_store': 0,
@@ -48,31 +158,10 @@ class VeiculosScraper:
                 'test_text': 0
             }
         }
-        
-        self.test_patterns = [
-            r'\bdemo\b',
-            r'\bteste\b',
-            r'\btest\b',
-            r'\bdeploy\b',
-            r'^teste',
-            r'demonstra[cç][aã]o',
-        ]
-        
-        self.compiled_patterns = [re.compile(p, re.IGNORECASE) for p in self.test_patterns]
-        
-        # Palavras-chave mobilidade (só tipo, não marca)
-        self.mobility_types = [
-            'bicicleta', 'bike', 'velocípede',
-            'e-bike', 'bike elétrica', 'bike eletrica',
-            'mountain bike', 'speed', 'bmx',
-            'patinete', 'patinete elétrico', 'patinete eletrico',
-            'patins', 'skate', 'longboard',
-            'segway', 'hoverboard', 'monowheel',
-            'quadriciclo', 'triciclo',
-            'ciclomotor', 'motoneta',
-        ]
-        
-        self.sodre_cookies = {}
+    
+    def _new_items(self) -> list:
+        """Onde uma fonte acumula itens: lista comum ou, dentro do run(), o fluxo do pipeline"""
+        return self.pipeline.stream() if self.pipeline else []
     
     def is_test_item(self, item: dict) -> tuple[bool, str]:
         """Verifica se é teste/demo"""
@@ -91,81 +180,246 @@ class VeiculosScraper:
         title = str(item.get('title', '')).lower()
         desc = str(item.get('description_preview', '')).lower()
         
-        for pattern in self.compiled_patterns:
-            if pattern.search(title) or pattern.search(desc):
-                if 'deploy' in title or 'deploy' in desc:
-                    return True, 'deploy_text'
-                return True, 'test_text'
-        
-        return False, ''
+        match = self._test_match(title) or self._test_match(desc)
+        if not match:
+            return False, ''
+        # "deploy" em qualquer campo vence, mesmo que o casamento tenha sido "teste"
+        if match.lastgroup == 'deploy_text' or 'deploy' in title or 'deploy' in desc:
+            return True, 'deploy_text'
+        return True, 'test_text'
+    
+    def _test_match(self, text: str) -> Optional[re.Match]:
+        """Primeira ocorrência de TEST_PATTERN no início de uma palavra ("demonstração" vale em qualquer lugar)"""
+        pos = 0
+        while True:
+            match = self.TEST_PATTERN.search(text, pos)
+            if not match:
+                return None
+            start = match.start()
+            if start and (text[start - 1].isalnum() or text[start - 1] == '_') and not text.startswith('demonstra', start):
+                pos = start + 1  # colado numa palavra ("codemo", "pytest"): tenta da próxima letra
+                continue
+            return match
     
     def is_mobility_vehicle(self, title: str, description: str = '') -> bool:
         """Verifica se é mobilidade pessoal por TIPO"""
-        text = f"{title} {description}".lower()
-        return any(mobility_type in text for mobility_type in self.mobility_types)
+        return category_classifier.matches('mobilidade', title, description)
     
     # ============================================================
     # SODRÉ SANTORO
     # ============================================================
     
-    def get_sodre_cookies(self) -> dict:
-        """Captura cookies da Sodré"""
+    def _capture_sodre_state(self) -> Optional[dict]:
+        """Abre a Sodré no navegador e devolve o storage_state"""
         print("  🍪 Capturando cookies Sodré...")
+        with browser_pool.context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            viewport={'width': 1920, 'height': 1080},
+            locale='pt-BR',
+            timezone_id='America/Sao_Paulo',
+        ) as context:
+            page = context.new_page()
+            
+            page.add_init_script("""
+                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                window.chrome = {runtime: {}};
+            """)
+            
+            has_cookies = lambda: bool(context.cookies())
+            browser_pool.navigate(page, "https://www.sodresantoro.com.br", wait_for=has_cookies,
+                                  timeout=60000, label="Sodré home")
+            
+            if not context.cookies():
+                browser_pool.navigate(page, "https://www.sodresantoro.com.br/veiculos/lotes",
+                                      wait_for=has_cookies, label="Sodré lotes")
+            
+            return context.storage_state()
+    
+    def get_sodre_cookies(self, force: bool = False) -> dict:
+        """Cookies da Sodré: cache em disco primeiro, navegador se preciso"""
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--no-sandbox',
-                    ]
-                )
-                
-                context = browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                    viewport={'width': 1920, 'height': 1080},
-                    locale='pt-BR',
-                    timezone_id='America/Sao_Paulo',
-                )
-                
-                page = context.new_page()
-                
-                page.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    window.chrome = {runtime: {}};
-                """)
-                
-                page.goto("https://www.sodresantoro.com.br", wait_until="networkidle", timeout=60000)
-                time.sleep(5)
-
-                cookies = context.cookies()
-                if not cookies:
-                    page.goto("https://www.sodresantoro.com.br/veiculos/lotes", wait_until="networkidle")
-                    time.sleep(3)
-                    cookies = context.cookies()
-
-                browser.close()
-                cookie_dict = {c["name"]: c["value"] for c in cookies}
-                
+            if force:
+                print("  🍪 Cookies Sodré recusados - recapturando...")
+            
+            state, from_cache = cookie_cache.get_or_capture(SODRE_HOST, self._capture_sodre_state, force)
+            cookie_dict = cookies_dict(state)
+            
+            if from_cache:
+                self.cookies_from_cache.add(SODRE_HOST)
+                print(f"  🍪 Cookies Sodré do cache ({len(cookie_dict)})")
+            else:
+                self.cookies_from_cache.discard(SODRE_HOST)
                 if cookie_dict:
                     print(f"     ✅ {len(cookie_dict)} cookies capturados")
                 else:
                     print(f"     ⚠️ Nenhum cookie capturado")
-                    
-                return cookie_dict
+            
+            return cookie_dict
 
         except Exception as e:
+            self.cookies_from_cache.discard(SODRE_HOST)
             print(f"     ❌ Erro ao capturar cookies: {e}")
             return {}
     
+    def _sodre_payload(self, index: str, cursor: Optional[list] = None, offset: int = 0,
+                       sort: Optional[list] = None) -> dict:
+        """Payload da search-lots: search_after quando há cursor, from/size senão"""
+        payload = {
+            "indices": [index],
+            "query": {
+                "bool": {
+                    "must": [],
+                    "filter": [
+                        {
+                            "terms": {
+                                "lot_status_id": [1, 2, 3]
+                            }
+                        }
+                    ],
+                    "should": [],
+                    "must_not": []
+                }
+            },
+            "size": 100,
+            "sort": [{field: {"order": order}} for field, order in (sort or self.SODRE_SORT)],
+        }
+        
+        if cursor is not None:
+            payload["search_after"] = cursor
+        else:
+            payload["from"] = offset
+        
+        return payload
+    
+    def _sodre_cursor(self, lot: dict, sort: Optional[list] = None) -> Optional[list]:
+        """Valores de ordenação do último lote (cursor da próxima página)"""
+        if lot.get('sort'):
+            return lot['sort']
+        
+        values = [lot.get(field) for field, _ in (sort or self.SODRE_SORT)]
+        if values[-1] is None:
+            values[-1] = lot.get('id')
+        
+        return values if all(v is not None for v in values) else None
+    
+    @staticmethod
+    def _sodre_lot_id(lot: dict) -> Optional[int]:
+        try:
+            return int(lot.get('lot_id') or lot.get('id'))
+        except (TypeError, ValueError):
+            return None
+    
+    async def _fetch_sodre_index(self, fetcher: AsyncFetcher, index: str, emit: Callable[[list], None],
+                                 watermark: Optional[int] = None) -> dict:
+        """
+        Pagina um índice da Sodré por cursor (search_after)
+        
+        Paginação por offset fica mais lenta a cada página e esbarra no
+        max_result_window do backend. Se o backend não aceitar search_after
+        (HTTP 400) ou o lote não trouxer os campos de ordenação, continua por
+        offset até a janela e marca o índice como truncado.
+        
+        Com `watermark`, ordena por lot_id decrescente e para na primeira
+        página que alcança lotes já vistos.
+        
+        Os lotes de cada página vão para `emit` assim que ela chega; o
+        resultado guarda só as contagens ('got') e o maior lot_id.
+        """
+        result = {
+            'index': index, 'got': 0, 'total': None, 'pages': 0,
+            'mode': 'cursor', 'truncated': False, 'rejected': False, 'error': None,
+            'incremental': watermark is not None, 'max_id': None,
+        }
+        sort = self.SODRE_SORT_RECENT if watermark is not None else self.SODRE_SORT
+        cursor = None
+        
+        while True:
+            offset = result['got']
+            use_cursor = result['mode'] == 'cursor' and cursor is not None
+            
+            if not use_cursor and offset + 100 > self.SODRE_WINDOW:
+                print(f"  ⚠️ [{index}] Janela de {self.SODRE_WINDOW} resultados atingida")
+                result['truncated'] = True
+                break
+            
+            try:
+                r = await fetcher.post(
+                    self.SODRE_API,
+                    headers=self.SODRE_HEADERS,
+                    json=self._sodre_payload(index, cursor if use_cursor else None, offset, sort),
+                    cookies=self.sodre_cookies,
+                )
+            except Exception as e:
+                result['error'] = str(e)[:100]
+                break
+            
+            # Cookies do cache recusados: quem chamou recaptura e repete
+            if result['pages'] == 0 and rejected(r):
+                result['rejected'] = True
+                return result
+            
+            if r.status_code == 400 and use_cursor:
+                print(f"  ⚠️ [{index}] search_after recusado - seguindo por offset")
+                result['mode'] = 'offset'
+                continue
+            
+            if r.status_code != 200:
+                result['error'] = f"HTTP {r.status_code}"
+                break
+            
+            data = r.json()
+            results = data.get('results', [])
+            if result['total'] is None:
+                result['total'] = data.get('total', 0)
+            
+            if not results:
+                break
+            
+            ids = [self._sodre_lot_id(lot) for lot in results]
+            if watermark is not None and result['pages'] == 0:
+                # Backend ignorou a ordenação por lot_id: não dá para parar cedo
+                if None in ids or ids != sorted(ids, reverse=True):
+                    print(f"  ⚠️ [{index}] Ordem por lot_id indisponível - busca completa")
+                    return await self._fetch_sodre_index(fetcher, index, emit)
+            
+            emit(results)
+            result['got'] += len(results)
+            result['max_id'] = max((i for i in ids + [result['max_id']] if i is not None), default=None)
+            result['pages'] += 1
+            print(f"  [{index}] Pág {result['pages']}: +{len(results)} | {result['got']}/{result['total']}")
+            
+            if watermark is not None and min(ids) <= watermark:
+                print(f"  💧 [{index}] Marca d'água {watermark} alcançada")
+                break
+            
+            if len(results) < 100:
+                break
+            
+            if result['mode'] == 'cursor':
+                next_cursor = self._sodre_cursor(results[-1], sort)
+                if next_cursor is None or next_cursor == cursor:
+                    print(f"  ⚠️ [{index}] Cursor indisponível - seguindo por offset")
+                    result['mode'] = 'offset'
+                cursor = next_cursor
+        
+        if not result['incremental'] and result['total'] and result['got'] < result['total']:
+            result['truncated'] = True
+        return result
+    
+    async def _fetch_sodre_indices(self, fetcher: AsyncFetcher, marks: Dict[str, Optional[int]],
+                                   emit: Callable[[list], None]) -> List[dict]:
+        """Pagina os índices de `marks` em paralelo, cada um com o seu cursor"""
+        return await asyncio.gather(
+            *(self._fetch_sodre_index(fetcher, index, emit, watermark) for index, watermark in marks.items())
+        )
+    
     def scrape_sodre(self) -> List[dict]:
         """
         Scrape Sodré Santoro
-        ✅ PAGINAÇÃO CORRIGIDA - Pega todos os veículos
+        ✅ Cursor por índice (veiculos e judiciais-veiculos em paralelo)
         """
         print("🔵 SODRÉ SANTORO")
-        items = []
+        items = self._new_items()
         
         self.sodre_cookies = self.get_sodre_cookies()
         
@@ -173,87 +427,55 @@ class VeiculosScraper:
             print("  ❌ Sem cookies - pulando Sodré")
             return items
         
-        indices = ["veiculos", "judiciais-veiculos"]
-        api_url = "https://www.sodresantoro.com.br/api/search-lots"
-        
-        headers = {
-            "accept": "application/json",
-            "accept-language": "pt-BR,pt;q=0.9",
-            "content-type": "application/json",
-            "origin": "https://www.sodresantoro.com.br",
-            "referer": "https://www.sodresantoro.com.br/",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
         try:
-            page = 0
-            page_num = 1
-            total_reported = None
-            
-            # ✅ Loop até não retornar mais resultados
-            while True:
-                payload = {
-                    "indices": indices,
-                    "query": {
-                        "bool": {
-                            "must": [],
-                            "filter": [
-                                {
-                                    "terms": {
-                                        "lot_status_id": [1, 2, 3]
-                                    }
-                                }
-                            ],
-                            "should": [],
-                            "must_not": []
-                        }
-                    },
-                    "from": page,
-                    "size": 100,
-                    "sort": [
-                        {"lot_status_id_order": {"order": "asc"}},
-                        {"auction_date_init": {"order": "asc"}}
-                    ]
-                }
-                
-                r = self.session.post(
-                    api_url,
-                    headers=headers,
-                    json=payload,
-                    cookies=self.sodre_cookies,
-                    timeout=30
-                )
-                
-                r.raise_for_status()
-                data = r.json()
-                
-                results = data.get('results', [])
-                total = data.get('total', 0)
-                
-                # Guarda total da primeira chamada
-                if total_reported is None:
-                    total_reported = total
-                
-                # Para quando não há mais resultados
-                if not results:
-                    print(f"  ✅ Fim: página {page_num} vazia")
-                    break
-                
-                for lot in results:
+            fetcher = AsyncFetcher(
+                self.session,
+                max_per_host=len(self.SODRE_INDICES),
+                limiter=self.limiter,
+                timeout=30,
+            )
+            marks = {index: watermarks.get(f"sodre:{index}") for index in self.SODRE_INDICES}
+            
+            # Cada página segue para `items` (o pipeline, no run) assim que chega
+            def emit(lots):
+                for lot in lots:
                     cleaned = self._clean_sodre_item(lot)
                     if cleaned:
                         items.append(cleaned)
+            
+            results = fetcher.run(self._fetch_sodre_indices(fetcher, marks, emit))
+            
+            # Cookies do cache recusados: recaptura uma vez e repete os índices recusados
+            # (a recusa vem na 1ª página, antes de qualquer lote ser entregue)
+            retry = {r['index']: marks[r['index']] for r in results if r['rejected']}
+            if retry and SODRE_HOST in self.cookies_from_cache:
+                self.sodre_cookies = self.get_sodre_cookies(force=True)
+                if self.sodre_cookies:
+                    again = fetcher.run(self._fetch_sodre_indices(fetcher, retry, emit))
+                    results = [r for r in results if not r['rejected']] + again
+            
+            for result in results:
+                # Recusa sem nova tentativa (ou recusada de novo) é falha, não índice vazio
+                if result['rejected'] and not result['error']:
+                    result['error'] = 'cookies recusados'
                 
-                print(f"  Pág {page_num}: +{len(results)} | Total: {len(items)}/{total_reported}")
+                got, total = result['got'], result['total'] or 0
+                mode = f"{result['mode']}, incremental" if result['incremental'] else result['mode']
+                icon = '❌' if result['error'] else '✅'
+                status = f"  {icon} {result['index']}: {got}/{total} lotes em {result['pages']} págs ({mode})"
+                if result['error']:
+                    status += f" | {result['error']}"
+                print(status)
                 
-                # Para se pegou menos de 100 (última página)
-                if len(results) < 100:
-                    print(f"  ✅ Última página (retornou {len(results)} itens)")
-                    break
+                if result['truncated']:
+                    missing = max(0, total - got)
+                    print(f"  ⚠️ {result['index']} TRUNCADO: faltaram {missing} lotes")
+                    self.stats['sodre_truncated'] += missing
                 
-                page += 100
-                page_num += 1
-                time.sleep(random.uniform(1.5, 3.0))
+                if not result['error'] and not result['truncated'] and not result['rejected']:
+                    avoided = math.ceil(total / 100) - result['pages'] if result['incremental'] else 0
+                    watermarks.record(result['incremental'], result['pages'], avoided)
+                    watermarks.stage(f"sodre:{result['index']}", result['max_id'], full=not result['incremental'])
         
         except Exception as e:
             print(f"  ❌ Erro: {e}")
@@ -367,58 +589,194 @@ class VeiculosScraper:
     # MEGALEILÕES
     # ============================================================
     
-    def get_megaleiloes_cookies(self) -> List[dict]:
-        """Captura cookies do Megaleilões"""
+    def _capture_megaleiloes_state(self) -> Optional[dict]:
+        """Abre o Megaleilões no navegador e devolve o storage_state"""
         print("  🍪 Capturando cookies Megaleilões...")
+        with browser_pool.context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            viewport={'width': 1920, 'height': 1080},
+            locale='pt-BR'
+        ) as context:
+            context.add_init_script("""
+                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                window.chrome = {runtime: {}};
+            """)
+            
+            page = context.new_page()
+            browser_pool.navigate(page, "https://www.megaleiloes.com.br",
+                                  wait_for=lambda: bool(context.cookies()), label="Megaleilões home")
+            
+            return context.storage_state()
+    
+    def get_megaleiloes_cookies(self, force: bool = False) -> List[dict]:
+        """Cookies do Megaleilões: cache em disco primeiro, navegador se preciso"""
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-blink-features=AutomationControlled']
-                )
-                
-                context = browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                    viewport={'width': 1920, 'height': 1080},
-                    locale='pt-BR'
-                )
-                
-                context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    window.chrome = {runtime: {}};
-                """)
-                
-                page = context.new_page()
-                page.goto("https://www.megaleiloes.com.br", wait_until="domcontentloaded", timeout=30000)
-                time.sleep(3)
-                
-                cookies = context.cookies()
-                browser.close()
-                
+            if force:
+                print("  🍪 Cookies Megaleilões recusados - recapturando...")
+            
+            state, from_cache = cookie_cache.get_or_capture(
+                MEGALEILOES_HOST, self._capture_megaleiloes_state, force
+            )
+            cookies = (state or {}).get('cookies', [])
+            
+            if from_cache:
+                self.cookies_from_cache.add(MEGALEILOES_HOST)
+                print(f"  🍪 Cookies Megaleilões do cache ({len(cookies)})")
+            else:
+                self.cookies_from_cache.discard(MEGALEILOES_HOST)
                 print(f"     ✅ {len(cookies)} cookies capturados")
-                return cookies
+            
+            return cookies
                 
         except Exception as e:
+            self.cookies_from_cache.discard(MEGALEILOES_HOST)
             print(f"     ⚠️ Erro ao capturar cookies: {e}")
             return []
     
+    def _megaleiloes_url(self, page_num: int) -> str:
+        if page_num == 1:
+            return self.MEGALEILOES_URL
+        return f"{self.MEGALEILOES_URL}?pagina={page_num}"
+    
+    def _megaleiloes_cards(self, html: Optional[str]) -> list:
+        if not html:
+            return []
+        soup = BeautifulSoup(html, 'html.parser')
+        return soup.select(self.MEGALEILOES_CARDS)
+    
+    def _collect_megaleiloes_cards(self, cards: list, items: List[dict], ids_vistos: set) -> int:
+        """Extrai os cards da página para `items`; retorna quantos eram novos"""
+        print(f"    📦 {len(cards)} cards")
+        
+        novos = 0
+        for card in cards:
+            item = self._extract_megaleiloes_card(card)
+            if item and item['external_id'] not in ids_vistos:
+                items.append(item)
+                ids_vistos.add(item['external_id'])
+                novos += 1
+        
+        if novos > 0:
+            print(f"    ✅ +{novos} | Total: {len(items)}")
+        else:
+            print(f"    ⚪ Sem novos")
+        
+        return novos
+    
+    async def _fetch_megaleiloes_page(self, fetcher: AsyncFetcher, page_num: int,
+                                      cookies: dict) -> Tuple[int, Optional[str]]:
+        """(status HTTP, HTML) de uma página da listagem; status 0 em erro de rede"""
+        try:
+            r = await fetcher.get(
+                self._megaleiloes_url(page_num),
+                headers=self.MEGALEILOES_HEADERS,
+                cookies=cookies,
+            )
+        except Exception as e:
+            print(f"    ❌ Pág {page_num}: {str(e)[:100]}")
+            return 0, None
+        
+        return r.status_code, r.text if r.status_code == 200 else None
+    
+    async def _fetch_megaleiloes_window(self, fetcher: AsyncFetcher, pages: List[int],
+                                        cookies: dict) -> List[Tuple[int, Optional[str]]]:
+        return await asyncio.gather(
+            *(self._fetch_megaleiloes_page(fetcher, p, cookies) for p in pages)
+        )
+    
+    def _fetch_megaleiloes_http(self) -> Optional[List[dict]]:
+        """
+        Listagem por HTTP direto com os cookies do navegador
+        
+        A pág 1 decide o modo: se o HTML do servidor não traz cards (listagem
+        montada por JS ou bloqueio), retorna None e o chamador renderiza.
+        As demais páginas vão em janelas concorrentes; o critério de parada
+        (3 páginas seguidas sem novos) é o mesmo da renderização.
+        """
+        cookies = cookies_dict({'cookies': self.get_megaleiloes_cookies()})
+        fetcher = AsyncFetcher(
+            self.session,
+            max_per_host=self.megaleiloes_concurrency,
+            limiter=self.limiter,
+            timeout=60,
+        )
+        
+        print("  Pág 1 (HTTP)")
+        status, html = fetcher.run(self._fetch_megaleiloes_page(fetcher, 1, cookies))
+        cards = self._megaleiloes_cards(html)
+        
+        # Cookies do cache recusados: recaptura uma vez e repete a pág 1
+        if not cards and MEGALEILOES_HOST in self.cookies_from_cache:
+            cookies = cookies_dict({'cookies': self.get_megaleiloes_cookies(force=True)})
+            status, html = fetcher.run(self._fetch_megaleiloes_page(fetcher, 1, cookies))
+            cards = self._megaleiloes_cards(html)
+        
+        if not cards:
+            print(f"    ⚠️ HTML sem cards (HTTP {status}) - usando navegador")
+            return None
+        
+        items = self._new_items()
+        ids_vistos = set()
+        sem_novos = 0 if self._collect_megaleiloes_cards(cards, items, ids_vistos) else 1
+        page_num = 2
+        
+        while page_num <= self.MEGALEILOES_MAX_PAGES and sem_novos < 3:
+            window = list(range(page_num, min(page_num + fetcher.max_per_host,
+                                              self.MEGALEILOES_MAX_PAGES + 1)))
+            results = fetcher.run(self._fetch_megaleiloes_window(fetcher, window, cookies))
+            
+            # Processa na ordem; páginas especulativas após a parada são descartadas
+            for p, (status, html) in zip(window, results):
+                print(f"  Pág {p}")
+                cards = self._megaleiloes_cards(html)
+                
+                if html is None:
+                    print(f"    ❌ HTTP {status}")
+                    sem_novos += 1
+                elif not cards:
+                    print(f"    ⚪ Nenhum card")
+                    sem_novos += 1
+                elif self._collect_megaleiloes_cards(cards, items, ids_vistos):
+                    sem_novos = 0
+                else:
+                    sem_novos += 1
+                
+                if sem_novos >= 3:
+                    break
+            
+            page_num += len(window)
+        
+        return items
+    
     def scrape_megaleiloes(self) -> List[dict]:
-        """Scrape Megaleilões"""
+        """Scrape Megaleilões (HTTP direto; navegador só para cookies ou fallback)"""
         print("🟢 MEGALEILÕES")
-        items = []
+        items = None
+        
+        if not self.megaleiloes_render:
+            try:
+                items = self._fetch_megaleiloes_http()
+            except Exception as e:
+                print(f"  ⚠️ HTTP direto falhou: {str(e)[:100]} - usando navegador")
+        
+        if items is None:
+            items = self._render_megaleiloes()
+        
+        self.stats['megaleiloes'] = len(items)
+        return items
+    
+    def _render_megaleiloes(self) -> List[dict]:
+        """Listagem renderizada no navegador (fallback do modo HTTP)"""
+        items = self._new_items()
         
         cookies_raw = self.get_megaleiloes_cookies()
         
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True, args=['--no-sandbox'])
-                
-                context = browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                    viewport={'width': 1920, 'height': 1080},
-                    locale='pt-BR'
-                )
-                
+            with browser_pool.context(
+                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                viewport={'width': 1920, 'height': 1080},
+                locale='pt-BR'
+            ) as context:
                 if cookies_raw:
                     context.add_cookies(cookies_raw)
                 
@@ -428,25 +786,36 @@ class VeiculosScraper:
                 sem_novos = 0
                 ids_vistos = set()
                 
-                while page_num <= 50:
-                    if page_num == 1:
-                        url = "https://www.megaleiloes.com.br/veiculos"
-                    else:
-                        url = f"https://www.megaleiloes.com.br/veiculos?pagina={page_num}"
+                while page_num <= self.MEGALEILOES_MAX_PAGES:
+                    url = self._megaleiloes_url(page_num)
                     
                     print(f"  Pág {page_num}")
                     
                     try:
-                        page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                        time.sleep(random.uniform(3, 5))
+                        self.limiter.wait(url)
+                        start = time.time()
+                        response = browser_pool.navigate(
+                            page, url, wait_for=self.MEGALEILOES_CARDS,
+                            timeout=60000, wait_timeout=15000, label=f"Megaleilões pág {page_num}",
+                        )
+                        self.limiter.observe(url, response, time.time() - start)
                         
+                        # Cards carregados ao rolar: espera a rede assentar
                         page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                        time.sleep(2)
+                        try:
+                            page.wait_for_load_state("networkidle", timeout=5000)
+                        except Exception:
+                            pass
                         
-                        html = page.content()
-                        soup = BeautifulSoup(html, 'html.parser')
+                        cards = self._megaleiloes_cards(page.content())
                         
-                        cards = soup.select('div.card, .leilao-card, div[class*="card"]')
+                        # Cookies do cache recusados: recaptura uma vez e repete a pág 1
+                        status = response.status if response else 0
+                        if (page_num == 1 and MEGALEILOES_HOST in self.cookies_from_cache
+                                and (status in (401, 403) or not cards)):
+                            context.clear_cookies()
+                            context.add_cookies(self.get_megaleiloes_cookies(force=True))
+                            continue
                         
                         if not cards:
                             print(f"    ⚪ Nenhum card")
@@ -456,41 +825,26 @@ class VeiculosScraper:
                             page_num += 1
                             continue
                         
-                        print(f"    📦 {len(cards)} cards")
-                        
-                        novos = 0
-                        for card in cards:
-                            item = self._extract_megaleiloes_card(card)
-                            if item and item['external_id'] not in ids_vistos:
-                                items.append(item)
-                                ids_vistos.add(item['external_id'])
-                                novos += 1
-                        
-                        if novos > 0:
-                            print(f"    ✅ +{novos} | Total: {len(items)}")
+                        if self._collect_megaleiloes_cards(cards, items, ids_vistos):
                             sem_novos = 0
                         else:
-                            print(f"    ⚪ Sem novos")
                             sem_novos += 1
                             if sem_novos >= 3:
                                 break
                         
                         page_num += 1
-                        time.sleep(random.uniform(3, 6))
                         
                     except Exception as e:
+                        self.limiter.observe(url, error=True)
                         print(f"    ❌ Erro: {str(e)[:100]}")
                         sem_novos += 1
                         if sem_novos >= 3:
                             break
                         page_num += 1
-                
-                browser.close()
         
         except Exception as e:
             print(f"  ❌ Erro geral: {e}")
         
-        self.stats['megaleiloes'] = len(items)
         return items
     
     def _extract_megaleiloes_card(self, card) -> Optional[dict]:
@@ -617,222 +971,342 @@ class VeiculosScraper:
     # SUPERBID
     # ============================================================
     
+    def _superbid_params(self, cat_slug: str, page: int, recent: bool = False) -> dict:
+        """Parâmetros da API de ofertas Superbid"""
+        params = {
+            "urlSeo": f"https://exchange.superbid.net/categorias/{cat_slug}",
+            "locale": "pt_BR",
+            "orderBy": "offerDetail.percentDiffReservedPriceOverFipePrice:asc",
+            "pageNumber": page,
+            "pageSize": self.SUPERBID_PAGE_SIZE,
+            "portalId": "[2,15]",
+            "preOrderBy": "orderByFirstOpenedOffersAndSecondHasPhoto",
+            "requestOrigin": "marketplace",
+            "searchType": "openedAll",
+            "timeZoneId": "America/Sao_Paulo",
+        }
+        
+        if recent:
+            params["orderBy"] = self.SUPERBID_ORDER_RECENT
+            del params["preOrderBy"]
+        
+        return params
+    
+    async def _fetch_superbid_page(self, fetcher: AsyncFetcher, cat_slug: str, page: int,
+                                   recent: bool = False) -> Tuple[str, list, Optional[int]]:
+        """
+        Busca uma página Superbid com até 3 tentativas
+        
+        Returns:
+            ('ok', offers, total) | ('end', [], None) em 404 | ('error', [], None) após 3 falhas
+        """
+        for attempt in range(3):
+            self.stats['superbid_requests'] += 1
+            try:
+                r = await fetcher.get(
+                    self.SUPERBID_API,
+                    params=self._superbid_params(cat_slug, page, recent),
+                    headers=self.SUPERBID_HEADERS,
+                )
+                
+                if r.status_code == 404:
+                    return 'end', [], None
+                
+                if r.status_code != 200:
+                    print(f"    ⚠️ {cat_slug} pág {page}: Status {r.status_code}")
+                else:
+                    data = r.json()
+                    total = data.get("total")
+                    return 'ok', data.get("offers", []), total if isinstance(total, int) else None
+            
+            except requests.exceptions.JSONDecodeError:
+                print(f"    ⚠️ {cat_slug} pág {page}: Erro JSON")
+            
+            except Exception as e:
+                print(f"    ❌ {cat_slug} pág {page}: {str(e)[:100]}")
+            
+            # Sem sleep fixo: a falha já reduziu o ritmo do host no limiter
+        
+        return 'error', [], None
+    
+    def _superbid_terminal(self, status: str, offers: list) -> bool:
+        """Página que encerra a categoria (404, vazia, erro ou < 10 ofertas)"""
+        return status != 'ok' or len(offers) < 10
+    
+    def _superbid_probe_cost(self, pages: List[Tuple[int, str, list]], window: int) -> int:
+        """Requisições que a sondagem em janelas gastaria para chegar ao mesmo fim"""
+        last_page, status, offers = pages[-1]
+        # Sem página terminal no plano, a sondagem ainda pediria a seguinte (404)
+        needed = last_page if self._superbid_terminal(status, offers) else last_page + 1
+        return math.ceil(needed / window) * window
+    
+    @staticmethod
+    def _superbid_ids(offers: list) -> List[Optional[int]]:
+        ids = []
+        for offer in offers:
+            try:
+                ids.append(int(offer.get('id')))
+            except (TypeError, ValueError):
+                ids.append(None)
+        return ids
+    
+    def _superbid_reached(self, ids: List[Optional[int]], watermark: Optional[int]) -> bool:
+        """Página que já chega em ofertas vistas numa execução anterior"""
+        ids = [i for i in ids if i is not None]
+        return watermark is not None and bool(ids) and min(ids) <= watermark
+    
+    def _superbid_page_done(self, pages: List[Tuple[int, str, list]], emit: Callable[[int, str, list], None],
+                            page: int, status: str, offers: list) -> List[Optional[int]]:
+        """Entrega a página a `emit` e guarda só (página, status, ids): as ofertas não ficam na memória"""
+        emit(page, status, offers)
+        ids = self._superbid_ids(offers)
+        pages.append((page, status, ids))
+        return ids
+    
+    async def _probe_superbid(self, fetcher: AsyncFetcher, cat_slug: str, emit: Callable[[int, str, list], None],
+                              page: int, pages: List[Tuple[int, str, list]],
+                              watermark: Optional[int] = None) -> List[Tuple[int, str, list]]:
+        """
+        Sonda páginas em janelas concorrentes a partir de `page`
+        
+        Cada janela dispara `max_per_host` páginas de uma vez; a primeira
+        página terminal (ou que alcança a marca d'água) encerra a categoria
+        e as especulativas depois dela são descartadas.
+        """
+        recent = watermark is not None
+        
+        while page <= self.SUPERBID_MAX_PAGES:
+            window = list(range(page, min(page + fetcher.max_per_host, self.SUPERBID_MAX_PAGES + 1)))
+            results = await asyncio.gather(
+                *(self._fetch_superbid_page(fetcher, cat_slug, p, recent) for p in window)
+            )
+            
+            for p, (status, offers, _) in zip(window, results):
+                ids = self._superbid_page_done(pages, emit, p, status, offers)
+                if self._superbid_terminal(status, ids) or self._superbid_reached(ids, watermark):
+                    return pages
+            
+            page += len(window)
+        
+        return pages
+    
+    async def _fetch_superbid_recent(self, fetcher: AsyncFetcher, cat_slug: str, emit: Callable[[int, str, list], None],
+                                     watermark: int) -> Optional[List[Tuple[int, str, list]]]:
+        """
+        Busca incremental: mais novas primeiro, até alcançar a marca d'água
+        
+        Retorna None se a API não devolver as ofertas em ordem decrescente
+        de id (aí não dá para parar cedo e a busca completa assume).
+        """
+        status, offers, total = await self._fetch_superbid_page(fetcher, cat_slug, 1, recent=True)
+        ids = self._superbid_ids(offers)
+        
+        if status == 'ok' and offers and (None in ids or ids != sorted(ids, reverse=True)):
+            print(f"    ⚠️ {cat_slug}: ordem por id indisponível - busca completa")
+            return None
+        
+        pages = []
+        self._superbid_page_done(pages, emit, 1, status, offers)
+        if not (self._superbid_terminal(status, ids) or self._superbid_reached(ids, watermark)):
+            pages = await self._probe_superbid(fetcher, cat_slug, emit, 2, pages, watermark)
+        
+        print(f"    💧 {cat_slug}: {len(pages)} pág(s) até a marca d'água {watermark}")
+        if not any(status == 'error' for _, status, _ in pages):
+            # Pedidas = pág 1 + janelas inteiras da sondagem (especulativas incluídas)
+            window = fetcher.max_per_host
+            requested = 1 + math.ceil((len(pages) - 1) / window) * window
+            avoided = math.ceil(total / self.SUPERBID_PAGE_SIZE) - requested if total else 0
+            watermarks.record(True, requested, avoided)
+            self._stage_superbid_watermark(cat_slug, pages, full=False)
+        
+        return pages
+    
+    def _stage_superbid_watermark(self, cat_slug: str, pages: List[Tuple[int, str, list]], full: bool):
+        ids = [i for _, _, page_ids in pages for i in page_ids if i is not None]
+        watermarks.stage(f"superbid:{cat_slug}", max(ids) if ids else None, full)
+    
+    async def _fetch_superbid_category(self, fetcher: AsyncFetcher, cat_slug: str,
+                                       emit: Callable[[int, str, list], None]) -> List[Tuple[int, str, list]]:
+        """
+        Busca as páginas de uma categoria
+        
+        A 1ª página traz o `total` de ofertas: com ele o número exato de
+        páginas é calculado e o resto sai de uma vez (o semáforo do host
+        limita o que fica em voo), sem sondar além do fim. Sem `total`
+        (ou se a última página planejada vier cheia), segue sondando.
+        
+        Com marca d'água salva (modo incremental), só as páginas novas.
+        
+        Cada página vai para `emit(página, status, ofertas)` assim que ela e
+        as anteriores chegam, em ordem e até a terminal; o retorno guarda
+        só (página, status, ids).
+        """
+        watermark = watermarks.get(f"superbid:{cat_slug}")
+        if watermark is not None:
+            pages = await self._fetch_superbid_recent(fetcher, cat_slug, emit, watermark)
+            if pages is not None:
+                return pages
+        
+        pages = await self._plan_superbid(fetcher, cat_slug, emit)
+        if not any(status == 'error' for _, status, _ in pages):
+            watermarks.record(False, len(pages))
+            self._stage_superbid_watermark(cat_slug, pages, full=True)
+        return pages
+    
+    async def _plan_superbid(self, fetcher: AsyncFetcher, cat_slug: str,
+                             emit: Callable[[int, str, list], None]) -> List[Tuple[int, str, list]]:
+        """Busca completa: plano pelo `total` da 1ª página, sondagem sem ele"""
+        status, offers, total = await self._fetch_superbid_page(fetcher, cat_slug, 1)
+        pages = []
+        self._superbid_page_done(pages, emit, 1, status, offers)
+        
+        if self._superbid_terminal(status, offers):
+            return pages
+        
+        if total is None:
+            print(f"    📐 {cat_slug}: sem total na resposta - sondando páginas")
+            return await self._probe_superbid(fetcher, cat_slug, emit, 2, pages)
+        
+        n_pages = math.ceil(total / self.SUPERBID_PAGE_SIZE)
+        print(f"    📐 {cat_slug}: {total} ofertas → {n_pages} págs (plano)")
+        
+        # Todas saem de uma vez; cada uma é entregue (e solta) na ordem, assim que chega
+        planned = list(range(2, n_pages + 1))
+        tasks = {p: asyncio.ensure_future(self._fetch_superbid_page(fetcher, cat_slug, p)) for p in planned}
+        
+        for p in planned:
+            status, offers, _ = await tasks.pop(p)
+            if self._superbid_terminal(status, self._superbid_page_done(pages, emit, p, status, offers)):
+                # As do plano depois dela já foram pedidas: terminam e são descartadas
+                await asyncio.gather(*tasks.values())
+                break
+        else:
+            # Total desatualizado: a última página veio cheia, continua sondando
+            # (total 0 com a pág 1 cheia: n_pages é 0, mas a 1 já foi buscada)
+            if len(pages[-1][2]) == self.SUPERBID_PAGE_SIZE:
+                return await self._probe_superbid(fetcher, cat_slug, emit, max(n_pages, 1) + 1, pages)
+        
+        # Páginas pedidas pelo plano (1 + planejadas) x o que a sondagem pediria
+        used = 1 + len(planned)
+        self.stats['superbid_requests_saved'] += max(0, self._superbid_probe_cost(pages, fetcher.max_per_host) - used)
+        return pages
+    
+    async def _fetch_superbid_categories(self, fetcher: AsyncFetcher,
+                                         categories: List[Tuple[str, Callable[[int, str, list], None]]]) -> List[list]:
+        """Busca todas as categorias em paralelo (cada uma com o seu `emit`)"""
+        return await asyncio.gather(
+            *(self._fetch_superbid_category(fetcher, slug, emit) for slug, emit in categories)
+        )
+    
+    def _superbid_fetcher(self) -> AsyncFetcher:
+        return AsyncFetcher(
+            self.session,
+            max_per_host=self.superbid_concurrency,
+            limiter=self.limiter,
+            timeout=45,
+        )
+    
+    def _superbid_page_offers(self, page: int, status: str, offers: list, label: str) -> list:
+        """Ofertas de uma página entregue (em ordem, até a terminal), logando o fim da paginação"""
+        if status == 'end':
+            print(f"    ✅ {label}: fim, página {page} retornou 404")
+            return []
+        if status == 'error':
+            return []
+        if not offers:
+            print(f"    ✅ {label}: fim, página {page} vazia")
+            return []
+        if len(offers) < 10:
+            print(f"    ✅ {label}: última página ({page})")
+        return offers
+    
     def scrape_superbid(self) -> List[dict]:
-        """Scrape Superbid - 4 categorias"""
-        print("🔴 SUPERBID")
-        items = []
+        """Scrape Superbid - categorias e páginas em paralelo"""
+        print(f"🔴 SUPERBID (concorrência: {self.superbid_concurrency})")
+        items = self._new_items()
         
         categories = [
             ('carros-motos', 'Carros e Motos'),
             ('caminhoes-onibus', 'Caminhões e Ônibus'),
             ('embarcacoes-aeronaves', 'Embarcações e Aeronaves'),
         ]
+        counts = {slug: 0 for slug, _ in categories}
         
-        headers = {
-            "accept": "*/*",
-            "accept-language": "pt-BR,pt;q=0.9",
-            "origin": "https://exchange.superbid.net",
-            "referer": "https://exchange.superbid.net/",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        }
-        
-        try:
-            for cat_slug, cat_name in categories:
-                print(f"  📦 {cat_name}")
-                items_before = len(items)
-                
-                page = 1
-                consecutive_errors = 0
-                
-                while page <= 100:
-                    url = "https://offer-query.superbid.net/seo/offers/"
-                    params = {
-                        "urlSeo": f"https://exchange.superbid.net/categorias/{cat_slug}",
-                        "locale": "pt_BR",
-                        "orderBy": "offerDetail.percentDiffReservedPriceOverFipePrice:asc",
-                        "pageNumber": page,
-                        "pageSize": 100,
-                        "portalId": "[2,15]",
-                        "preOrderBy": "orderByFirstOpenedOffersAndSecondHasPhoto",
-                        "requestOrigin": "marketplace",
-                        "searchType": "openedAll",
-                        "timeZoneId": "America/Sao_Paulo",
-                    }
-                    
+        def emitter(cat_slug: str, cat_name: str):
+            # Cada página segue para `items` (o pipeline, no run) assim que chega
+            def emit(page: int, status: str, offers: list):
+                valid_count = 0
+                for offer in self._superbid_page_offers(page, status, offers, cat_name):
                     try:
-                        r = self.session.get(url, params=params, headers=headers, timeout=45)
-                        
-                        if r.status_code == 404:
-                            print(f"    ✅ Fim: página {page} retornou 404")
-                            break
-                        
-                        if r.status_code != 200:
-                            print(f"    ⚠️ Status {r.status_code}")
-                            consecutive_errors += 1
-                            if consecutive_errors >= 3:
-                                break
-                            time.sleep(5)
-                            continue
-                        
-                        data = r.json()
-                        offers = data.get("offers", [])
-                        
-                        if not offers:
-                            print(f"    ✅ Fim: página {page} vazia")
-                            break
-                        
-                        valid_count = 0
-                        for offer in offers:
-                            try:
-                                cleaned = self._clean_superbid_offer(offer, cat_slug)
-                                if cleaned:
-                                    is_test, reason = self.is_test_item(cleaned)
-                                    if not is_test:
-                                        items.append(cleaned)
-                                        valid_count += 1
-                                    else:
-                                        self.stats['filtered_test_items'] += 1
-                                        self.stats['filter_details'][reason] += 1
-                            except Exception:
-                                pass
-                        
-                        print(f"    Pág {page}: +{valid_count} | Total: {len(items)}")
-                        
-                        if len(offers) < 10:
-                            print(f"    ✅ Última página")
-                            break
-                        
-                        page += 1
-                        consecutive_errors = 0
-                        time.sleep(random.uniform(2, 5))
-                        
-                    except requests.exceptions.JSONDecodeError:
-                        print(f"    ⚠️ Erro JSON")
-                        consecutive_errors += 1
-                        if consecutive_errors >= 3:
-                            break
-                        time.sleep(5)
-                    
-                    except Exception as e:
-                        print(f"    ❌ Erro: {str(e)[:100]}")
-                        consecutive_errors += 1
-                        if consecutive_errors >= 3:
-                            break
-                        time.sleep(5)
+                        cleaned = self._clean_superbid_offer(offer, cat_slug)
+                        if cleaned:
+                            is_test, reason = self.is_test_item(cleaned)
+                            if not is_test:
+                                items.append(cleaned)
+                                valid_count += 1
+                            else:
+                                self.stats['filtered_test_items'] += 1
+                                self.stats['filter_details'][reason] += 1
+                    except Exception:
+                        pass
                 
-                cat_items = len(items) - items_before
-                print(f"    ✅ {cat_items} itens em {cat_name}\n")
+                counts[cat_slug] += valid_count
+                if status == 'ok' and offers:
+                    print(f"    {cat_name} pág {page}: +{valid_count} | Total: {len(items)}")
+            return emit
         
+        try:
+            fetcher = self._superbid_fetcher()
+            fetcher.run(self._fetch_superbid_categories(
+                fetcher, [(slug, emitter(slug, name)) for slug, name in categories]
+            ))
         except Exception as e:
             print(f"  ❌ Erro geral: {e}")
         
+        for cat_slug, cat_name in categories:
+            print(f"  📦 {cat_name}: {counts[cat_slug]} itens")
+        print()
+        
         self.stats['superbid'] = len(items)
         return items
     
     def scrape_superbid_oportunidades(self) -> List[dict]:
         """Scrape Superbid Oportunidades - filtrado"""
         print("🔴 SUPERBID - Oportunidades (mobilidade)")
-        items = []
-        
-        headers = {
-            "accept": "*/*",
-            "accept-language": "pt-BR,pt;q=0.9",
-            "origin": "https://exchange.superbid.net",
-            "referer": "https://exchange.superbid.net/",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        }
+        items = self._new_items()
+        counts = {'mobility': 0, 'filtered': 0}
         
-        try:
-            page = 1
-            consecutive_errors = 0
-            mobility_count = 0
-            filtered_count = 0
-            
-            while page <= 100:
-                url = "https://offer-query.superbid.net/seo/offers/"
-                params = {
-                    "urlSeo": "https://exchange.superbid.net/categorias/oportunidades",
-                    "locale": "pt_BR",
-                    "orderBy": "offerDetail.percentDiffReservedPriceOverFipePrice:asc",
-                    "pageNumber": page,
-                    "pageSize": 100,
-                    "portalId": "[2,15]",
-                    "preOrderBy": "orderByFirstOpenedOffersAndSecondHasPhoto",
-                    "requestOrigin": "marketplace",
-                    "searchType": "openedAll",
-                    "timeZoneId": "America/Sao_Paulo",
-                }
-                
+        # Cada página segue para `items` (o pipeline, no run) assim que chega
+        def emit(page: int, status: str, offers: list):
+            valid_count = 0
+            for offer in self._superbid_page_offers(page, status, offers, 'Oportunidades'):
                 try:
-                    r = self.session.get(url, params=params, headers=headers, timeout=45)
-                    
-                    if r.status_code == 404:
-                        print(f"    ✅ Fim: página {page} retornou 404")
-                        break
-                    
-                    if r.status_code != 200:
-                        print(f"    ⚠️ Status {r.status_code}")
-                        consecutive_errors += 1
-                        if consecutive_errors >= 3:
-                            break
-                        time.sleep(5)
-                        continue
-                    
-                    data = r.json()
-                    offers = data.get("offers", [])
-                    
-                    if not offers:
-                        print(f"    ✅ Fim: página {page} vazia")
-                        break
-                    
-                    valid_count = 0
-                    for offer in offers:
-                        try:
-                            cleaned = self._clean_superbid_offer(offer, 'oportunidades')
-                            if cleaned:
-                                title = cleaned.get('title', '')
-                                desc = cleaned.get('description', '')
-                                
-                                if self.is_mobility_vehicle(title, desc):
-                                    is_test, reason = self.is_test_item(cleaned)
-                                    if not is_test:
-                                        items.append(cleaned)
-                                        valid_count += 1
-                                        mobility_count += 1
-                                    else:
-                                        self.stats['filtered_test_items'] += 1
-                                        self.stats['filter_details'][reason] += 1
-                                else:
-                                    filtered_count += 1
-                        except Exception:
-                            pass
-                    
-                    if valid_count > 0:
-                        print(f"    Pág {page}: +{valid_count} mobilidade | Total: {len(items)}")
-                    
-                    if len(offers) < 10:
-                        print(f"    ✅ Última página")
-                        break
-                    
-                    page += 1
-                    consecutive_errors = 0
-                    time.sleep(random.uniform(2, 5))
-                    
-                except requests.exceptions.JSONDecodeError:
-                    print(f"    ⚠️ Erro JSON")
-                    consecutive_errors += 1
-                    if consecutive_errors >= 3:
-                        break
-                    time.sleep(5)
-                
-                except Exception as e:
-                    print(f"    ❌ Erro: {str(e)[:100]}")
-                    consecutive_errors += 1
-                    if consecutive_errors >= 3:
-                        break
-                    time.sleep(5)
+                    cleaned = self._clean_superbid_offer(offer, 'oportunidades')
+                    if cleaned:
+                        title = cleaned.get('title', '')
+                        desc = cleaned.get('description', '')
+                        
+                        if self.is_mobility_vehicle(title, desc):
+                            is_test, reason = self.is_test_item(cleaned)
+                            if not is_test:
+                                items.append(cleaned)
+                                valid_count += 1
+                                counts['mobility'] += 1
+                            else:
+                                self.stats['filtered_test_items'] += 1
+                                self.stats['filter_details'][reason] += 1
+                        else:
+                            counts['filtered'] += 1
+                except Exception:
+                    pass
             
-            print(f"    ✅ {mobility_count} itens (filtrou {filtered_count} outros)\n")
+            if valid_count > 0:
+                print(f"    Pág {page}: +{valid_count} mobilidade | Total: {len(items)}")
+        
+        try:
+            fetcher = self._superbid_fetcher()
+            fetcher.run(self._fetch_superbid_category(fetcher, 'oportunidades', emit))
+            print(f"    ✅ {counts['mobility']} itens (filtrou {counts['filtered']} outros)\n")
         
         except Exception as e:
             print(f"  ❌ Erro geral: {e}")
@@ -931,77 +1405,109 @@ class VeiculosScraper:
         title = re.sub(r'\s+', ' ', title)
         return title.strip()
     
-    def save_json(self, items: List[dict], output_dir: str = 'veiculos_data') -> str:
-        """Salva JSON"""
-        Path(output_dir).mkdir(exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filepath = f"{output_dir}/veiculos_{timestamp}.json"
+    def _start_pipeline(self, batch_size: int = 100) -> dict:
+        """
+        Liga o pipeline do run(): JSON bruto + normalizado e upload, lote a lote
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(items, f, ensure_ascii=False, indent=2)
+        Retorna as saídas: os dois JSON e o UpsertStream (None sem Supabase).
+        """
+        Path('veiculos_data').mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = {
+            'raw': JsonArrayWriter(f"veiculos_data/veiculos_{timestamp}.json"),
+            'normalized': JsonArrayWriter(f"veiculos_data/veiculos_normalized_{timestamp}.json"),
+            'upload': None,
+            'normalize_errors': 0,
+        }
         
-        return filepath
-    
-    def upload_to_supabase_batch(self, items: List[dict], batch_size: int = 100):
-        """Upload em batches"""
-        print(f"\n📤 Enviando para Supabase em batches de {batch_size}...")
+        def normalize(batch):
+            output['raw'].write(batch)
+            try:
+                output['normalized'].write(normalize_vehicles(batch))
+            except Exception as e:
+                # Como antes: o banco recebe os itens brutos mesmo sem normalização
+                output['normalize_errors'] += len(batch)
+                print(f"  ⚠️ Normalização falhou ({str(e)[:100]}) - lote segue bruto para o envio")
+            return batch
         
-        if not items:
-            print("  ⚠️ Nenhum item para enviar")
-            return
+        stages = [('normalizar', normalize)]
+        try:
+            # Os lotes do pipeline só entregam itens: os batches HTTP saem do stream, por bytes
+            output['upload'] = SupabaseClient().stream('veiculos', hot=self.hot_refresh)
+            stages.append(('enviar', output['upload'].send))
+        except Exception as e:
+            print(f"{e} - só os JSON serão salvos\n")
         
+        self.pipeline = Pipeline(stages, batch_size=batch_size).start()
+        return output
+    
+    # ============================================================
+    # EXECUÇÃO PARALELA
+    # ============================================================
+    
+    def _spawn_worker(self) -> 'VeiculosScraper':
+        """Cópia do scraper com sessão, itens e stats isolados"""
+        worker = copy.copy(self)
+        worker.session = self._new_session()
+        worker.stats = self._empty_stats()
+        worker.sodre_cookies = {}
+        worker.cookies_from_cache = set()
+        return worker
+    
+    def _run_source(self, label: str, method: str) -> Tuple[List[dict], float]:
+        """Roda uma fonte isolando falhas (fonte com erro retorna 0 itens)"""
+        start = time.time()
         try:
-            client = SupabaseClient()
-            table_name = 'veiculos'
-            
-            total_items = len(items)
-            total_batches = (total_items + batch_size - 1) // batch_size
-            
-            total_inserted = 0
-            total_updated = 0
-            total_errors = 0
-            
-            for i in range(0, total_items, batch_size):
-                batch = items[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                
-                print(f"  📦 Batch {batch_num}/{total_batches} ({len(batch)} itens)...", end=' ')
-                
-                try:
-                    stats = client.upsert(table_name, batch)
-                    
-                    total_inserted += stats['inserted']
-                    total_updated += stats['updated']
-                    total_errors += stats['errors']
-                    
-                    print(f"✅ +{stats['inserted']} novos, {stats['updated']} atualizados")
-                    
-                    if batch_num < total_batches:
-                        time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"❌ Erro: {str(e)[:100]}")
-                    total_errors += len(batch)
-            
-            print(f"\n  ✅ TOTAL: {total_inserted} novos, {total_updated} atualizados, {total_errors} erros")
-            
+            items = getattr(self, method)()
         except Exception as e:
-            print(f"  ❌ Erro geral: {e}")
+            print(f"  ❌ {label}: erro não tratado: {e}")
+            items = []
+        return items, time.time() - start
+    
+    def _run_worker(self, label: str, method: str) -> Tuple[List[dict], float]:
+        """_run_source numa thread de worker, fechando o navegador da thread no fim"""
+        try:
+            return self._run_source(label, method)
+        finally:
+            browser_pool.release()
+    
+    def _merge_stats(self, stats: dict, into: Optional[dict] = None):
+        """Soma stats de um worker nas stats do scraper"""
+        into = self.stats if into is None else into
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                self._merge_stats(value, into.setdefault(key, {}))
+            else:
+                into[key] = into.get(key, 0) + value
     
-    def deduplicate(self, items: List[dict]) -> List[dict]:
-        """Remove duplicatas"""
-        seen = set()
-        unique = []
+    def scrape_parallel(self, sources: List[Tuple[str, str, str]]) -> List[Tuple[str, List[dict]]]:
+        """
+        Roda cada fonte numa thread própria, com stats isoladas
+        
+        Cada fonte fala com um host diferente, então o tempo total tende ao
+        da fonte mais lenta. As stats dos workers são somadas no final e os
+        itens voltam na ordem de `sources`.
+        """
+        print(f"⚡ Modo paralelo: {len(sources)} fontes\n")
+        workers = [self._spawn_worker() for _ in sources]
+        
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            futures = [
+                executor.submit(worker._run_worker, label, method)
+                for worker, (_, label, method) in zip(workers, sources)
+            ]
+            results = [future.result() for future in futures]
         
-        for item in items:
-            key = (item['source'], item['external_id'])
-            if key not in seen:
-                seen.add(key)
-                unique.append(item)
+        output = []
+        for worker, (_, label, _), (items, elapsed) in zip(workers, sources, results):
+            self._merge_stats(worker.stats)
+            print(f"  ⏱️ {label}: {elapsed:.0f}s")
+            output.append((label, items))
+        print()
         
-        return unique
+        return output
     
-    def run(self):
+    def run(self, fonte: str = 'all', paralelo: bool = False):
         """Executa scraping completo"""
         print("="*60)
         print("🚗 SCRAPER: VEICULOS")
@@ -1009,22 +1515,28 @@ class VeiculosScraper:
         
         start_time = time.time()
         
-        # Scrape
-        sodre_items = self.scrape_sodre()
-        self.items.extend(sodre_items)
-        print(f"✅ Sodré: {len(sodre_items)} itens\n")
+        # Scrape ('superbid' inclui oportunidades): cada item segue na hora para o
+        # pipeline, que deduplica, salva, normaliza e envia enquanto as fontes raspam
+        sources = [s for s in self.SOURCES if fonte == 'all' or s[0].split('_')[0] == fonte]
+        output = self._start_pipeline()
         
-        megaleiloes_items = self.scrape_megaleiloes()
-        self.items.extend(megaleiloes_items)
-        print(f"✅ Megaleilões: {len(megaleiloes_items)} itens\n")
-        
-        superbid_items = self.scrape_superbid()
-        self.items.extend(superbid_items)
-        print(f"✅ Superbid: {len(superbid_items)} itens\n")
-        
-        oportunidades_items = self.scrape_superbid_oportunidades()
-        self.items.extend(oportunidades_items)
-        print(f"✅ Superbid Oportunidades: {len(oportunidades_items)} itens\n")
+        try:
+            if paralelo and len(sources) > 1:
+                for label, items in self.scrape_parallel(sources):
+                    print(f"✅ {label}: {len(items)} itens")
+                print()
+            else:
+                for _, label, method in sources:
+                    items, _ = self._run_source(label, method)
+                    print(f"✅ {label}: {len(items)} itens\n")
+        finally:
+            # Scraping acabou: libera o Chromium e espera o pipeline esvaziar
+            browser_pool.release()
+            print(f"⏳ Aguardando pipeline ({self.pipeline.queues[0].qsize()} itens na fila)...")
+            self.pipeline.close()
+            output['raw'].close()
+            output['normalized'].close()
+            upload = output['upload'].close() if output['upload'] else None
         
         # Filtros
         if self.stats['filtered_test_items'] > 0:
@@ -1042,52 +1554,95 @@ class VeiculosScraper:
                 print(f"   • Texto 'test/demo': {details['test_text']}")
             print()
         
-        # Deduplica
-        unique_items = self.deduplicate(self.items)
-        
         # Resumo
         print("📊 RESUMO:")
         print(f"   • Sodré: {self.stats['sodre']}")
         print(f"   • Megaleilões: {self.stats['megaleiloes']}")
         print(f"   • Superbid: {self.stats['superbid']}")
         print(f"   • Superbid Oportunidades: {self.stats['superbid_oportunidades']}")
-        print(f"   • Total bruto: {len(self.items)}")
-        print(f"   • Total único: {len(unique_items)}\n")
+        if self.stats['sodre_truncated'] > 0:
+            print(f"   • ⚠️ Sodré truncado: {self.stats['sodre_truncated']} lotes não paginados")
+        if self.stats['superbid_requests']:
+            print(f"   • Superbid: {self.stats['superbid_requests']} requisições "
+                  f"({self.stats['superbid_requests_saved']} economizadas pelo plano de paginação)")
+        print(f"   • Total bruto: {self.pipeline.received}")
+        print(f"   • Total único: {self.pipeline.unique}\n")
         
-        # Salva JSON
-        filepath = self.save_json(unique_items)
-        print(f"💾 Salvo: {filepath}")
+        print(f"💾 Salvo: {output['raw'].path}")
+        print(f"✨ Normalizado: {output['normalized'].path}")
         
-        # ✨ Normaliza e salva
-        print("✨ Normalizando dados...")
-        normalized_items = normalize_vehicles(unique_items)
+        if upload:
+            print(f"📤 TOTAL: {upload['inserted']} novos, {upload['updated']} atualizados, {upload['errors']} erros")
+            if self.hot_refresh:
+                print(f"⚡ Campos quentes: {upload['refreshed']} lotes")
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        norm_filepath = f"veiculos_data/veiculos_normalized_{timestamp}.json"
-        Path('veiculos_data').mkdir(exist_ok=True)
-        
-        with open(norm_filepath, 'w', encoding='utf-8') as f:
-            json.dump(normalized_items, f, ensure_ascii=False, indent=2)
-        
-        print(f"✨ Normalizado: {norm_filepath}")
-        
-        # Upload
-        self.upload_to_supabase_batch(unique_items, batch_size=100)
+        # Marcas d'água só avançam com tudo enviado (e normalizado)
+        failed = output['normalize_errors'] or any(s['errors'] for s in self.pipeline.stats.values())
+        if upload and not upload['errors'] and not failed:
+            watermarks.commit()
+        elif watermarks.pending:
+            print("⚠️ Upload ou normalização incompletos - marcas d'água mantidas")
         
         elapsed = time.time() - start_time
         minutes = int(elapsed // 60)
         seconds = int(elapsed % 60)
+        self.pipeline.print_report()
+        browser_pool.print_report()
+        cookie_cache.print_report()
+        self.limiter.print_report()
+        watermarks.print_report()
+        change_store.print_report()
+        cassette.print_report()
         print("="*60)
         print(f"✅ CONCLUÍDO em {minutes}min {seconds}s")
         print(f"🕐 Término: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC")
         print("="*60)
 
 
+# Mobilidade entra no classificador compartilhado (título + descrição, como antes)
+category_classifier.register('mobilidade', VeiculosScraper.MOBILITY_TYPES, ['title', 'description'])
+
+
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fonte', choices=['sodre', 'megaleiloes', 'superbid', 'all'], default='all')
+    parser.add_argument('--concorrencia', type=int, default=4,
+                        help='Requisições Superbid simultâneas por host (1 = sequencial)')
+    parser.add_argument('--paralelo', action='store_true',
+                        help='Roda as fontes em paralelo (uma thread por fonte)')
+    parser.add_argument('--renderizar-megaleiloes', action='store_true',
+                        help='Renderiza a listagem do Megaleilões no navegador em vez de HTTP direto')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Sodré/Superbid só até a marca d\'água da última execução '
+                             '(busca completa a cada FULL_RESYNC_HOURS, padrão 24h)')
+    parser.add_argument('--reenviar-tudo', action='store_true',
+                        help='Envia as linhas inteiras mesmo sem mudança desde o último envio')
+    parser.add_argument('--rapido', action='store_true',
+                        help='Lotes já enviados só com value/lances/visitas/dias (linha inteira só para os novos)')
+    cassette_args = parser.add_mutually_exclusive_group()
+    cassette_args.add_argument('--gravar', metavar='CASSETTE',
+                               help='Grava todo o HTTP/HTML da execução em CASSETTE (.json.gz)')
+    cassette_args.add_argument('--reproduzir', metavar='CASSETTE',
+                               help='Reproduz CASSETTE sem rede nem navegador')
+    args = parser.parse_args()
+    
+    watermarks.enabled = args.incremental
+    change_store.enabled = not args.reenviar_tudo
+    if args.gravar:
+        cassette.start('record', args.gravar)
+    elif args.reproduzir:
+        cassette.start('replay', args.reproduzir)
+    
     print("="*60)
     print(f"📅 Início: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC")
     print(f"🇧🇷 Horário Brasil: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} BRT")
     print("="*60)
     
-    scraper = VeiculosScraper()
-    scraper.run()
\ No newline at end of file
+    scraper = VeiculosScraper(
+        superbid_concurrency=args.concorrencia,
+        megaleiloes_render=args.renderizar_megaleiloes,
+        hot_refresh=args.rapido,
+    )
+    scraper.run(fonte=args.fonte, paralelo=args.paralelo)
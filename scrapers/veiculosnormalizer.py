@@ -7,8 +7,74 @@ Uniformiza dados de diferentes fontes (Sodré, Superbid, Megaleilões)
 para apresentação elegante no front-end.
 """
 
+import os
 import re
-from typing import Dict, List, Optional
+import sys
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from keyword_matcher import KeywordMatcher
+
+
+# ============================================================
+# PADRÕES (compilados uma vez no import)
+# ============================================================
+
+# Megaleilões: "Carro/Caminhonete MARCA MODELO - YYYY/YYYY"
+MEGALEILOES_TITLE_YEARS = re.compile(r'((?:Carro|Caminhonete|Moto|Motocicleta)\s+[A-ZÀ-Ú][A-Za-zÀ-ú0-9\s]+?)\s+-\s+(\d{4})/(\d{4})', re.IGNORECASE)
+MEGALEILOES_TITLE_AFTER_NUMBERS = re.compile(r'\d+\s+\d+\s+((?:Carro|Caminhonete|Moto)\s+[A-Za-zÀ-ú0-9\s-]+?)\s+[A-Z]\d+', re.IGNORECASE)
+MEGALEILOES_TITLE_BRAND = re.compile(r'((?:Carro|Caminhonete|Moto)\s+(Ford|Fiat|Chevrolet|VW|Volkswagen|Renault|Honda|Toyota|Yamaha|Nissan|Hyundai|Citroen|Peugeot)[A-Za-zÀ-ú0-9\s]+)', re.IGNORECASE)
+TRAILING_CODE = re.compile(r'\s+[A-Z]\d+.*$')
+
+# Limpeza de título
+LEADING_LOT = re.compile(r'^LOTE\s+\d+\s+', re.IGNORECASE)
+HTML_TAG = re.compile(r'<[^>]+>')
+PLATE_FINAL_SUFFIX = re.compile(r'\s*,?\s*Placa\s+FINAL\s+\d+\s*\([A-Z]{2}\)\s*,?', re.IGNORECASE)
+LEADING_ZEROS = re.compile(r'\b0+(\d+)\b')
+WHITESPACE = re.compile(r'\s+')
+
+# Ano, placa, descrição e endereço
+YEAR_RANGE = re.compile(r'(\d{4})/(\d{4})')
+YEAR_20XX = re.compile(r'\b(20\d{2})\b')
+PLATE = re.compile(r'\b([A-Z]{3}[-\s]?\d[A-Z0-9]\d{2})\b')
+PLATE_FINAL = re.compile(r'FINAL\s+(\d)')
+ADDRESS_CITY_STATE = re.compile(r'([^/\-,]+)[\s/\-]+([A-Z]{2})\b')
+
+
+class ExtractionContext:
+    """
+    Um item em normalização: valores derivados calculados uma vez
+    
+    Metadata de veículo, marca, cidade e UF (usados por todo item) são
+    calculados na criação; título + descrição e a versão em maiúsculas,
+    só quando algum extrator pede. Os `_get_*` do normalizer leem daqui
+    em vez de refazer cada um.
+    """
+    
+    def __init__(self, item: dict, normalizer: 'VehicleDataNormalizer'):
+        self.item = item
+        self.metadata = item.get('metadata', {})
+        self.veiculo = self.metadata['veiculo'] if 'veiculo' in self.metadata else None
+        self.title = item.get('title', '')
+        self.description = item.get('description', '')
+        self.city = normalizer._format_city(item.get('city'))
+        self.state = normalizer._validate_state(item.get('state'))
+        self.brand = normalizer._get_brand(self)
+    
+    @cached_property
+    def text(self) -> str:
+        """Título + descrição (busca de ano)"""
+        return f"{self.title} {self.description}"
+    
+    @cached_property
+    def text_upper(self) -> str:
+        """Título + descrição em maiúsculas (busca de placa)"""
+        return self.text.upper()
 
 
 class VehicleDataNormalizer:
@@ -26,6 +92,9 @@ class VehicleDataNormalizer:
         'YAMAHA',
     ]
     
+    # Todas as marcas numa passada, com limite de palavra e mais longa primeiro
+    BRAND_MATCHER = KeywordMatcher(KNOWN_BRANDS)
+    
     # UFs válidos
     VALID_STATES = [
         'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA',
@@ -35,37 +104,37 @@ class VehicleDataNormalizer:
     
     def normalize(self, item: dict) -> dict:
         """Normaliza um item de veículo para estrutura uniforme"""
-        source = item.get('source', '')
+        ctx = ExtractionContext(item, self)
         
         return {
             # IDs
             'id': item.get('id'),
-            'source': source,
+            'source': item.get('source', ''),
             'external_id': item.get('external_id'),
             
             # Informações principais
-            'display_title': self._get_display_title(item),
-            'brand': self._get_brand(item),
-            'model': self._get_model(item),
-            'year': self._get_year(item),
-            'plate': self._get_plate(item),
+            'display_title': self._get_display_title(ctx),
+            'brand': ctx.brand,
+            'model': self._get_model(ctx),
+            'year': self._get_year(ctx),
+            'plate': self._get_plate(ctx),
             
             # Descrição
-            'description': self._get_clean_description(item),
+            'description': self._get_clean_description(ctx),
             'description_preview': item.get('description_preview'),
             
             # Valores
-            'price': self._get_price(item),
+            'price': self._get_price(ctx),
             'price_formatted': item.get('value_text'),
             
             # Localização
-            'location': self._get_location(item),
-            'city': self._format_city(item.get('city')),
-            'state': self._validate_state(item.get('state')),
+            'location': self._get_location(ctx),
+            'city': ctx.city,
+            'state': ctx.state,
             'full_address': item.get('address'),
             
             # Leilão
-            'auction': self._get_auction_info(item),
+            'auction': self._get_auction_info(ctx),
             
             # Estatísticas
             'stats': {
@@ -87,7 +156,7 @@ class VehicleDataNormalizer:
             'original_metadata': item.get('metadata'),
         }
     
-    def _get_display_title(self, item: dict) -> str:
+    def _get_display_title(self, ctx: ExtractionContext) -> str:
         """
         Título SIMPLES - só primeira letra da FRASE maiúscula
         
@@ -95,15 +164,14 @@ class VehicleDataNormalizer:
             "Nissan kicks sense cvt 23/23"
             "Carro citroen jumpy furgão pk 2020/2021"
         """
-        source = item.get('source', '')
-        title = item.get('title', '')
-        metadata = item.get('metadata', {})
+        source = ctx.item.get('source', '')
+        title = ctx.title
         
         # ========================================
         # SODRÉ: Usa metadata (mais confiável)
         # ========================================
-        if source == 'sodre' and 'veiculo' in metadata:
-            veiculo = metadata['veiculo']
+        if source == 'sodre' and ctx.veiculo is not None:
+            veiculo = ctx.veiculo
             marca = (veiculo.get('marca') or '').strip()
             modelo = (veiculo.get('modelo') or '').strip()
             ano = veiculo.get('ano')
@@ -127,10 +195,10 @@ class VehicleDataNormalizer:
         # MEGALEILÕES: Extrai da descrição
         # ========================================
         if source == 'megaleiloes':
-            description = item.get('description', '')
+            description = ctx.description
             
             # Padrão 1: "Carro/Caminhonete MARCA MODELO - YYYY/YYYY"
-            match = re.search(r'((?:Carro|Caminhonete|Moto|Motocicleta)\s+[A-ZÀ-Ú][A-Za-zÀ-ú0-9\s]+?)\s+-\s+(\d{4})/(\d{4})', description, re.IGNORECASE)
+            match = MEGALEILOES_TITLE_YEARS.search(description)
             if match:
                 vehicle_part = match.group(1).strip()
                 year1 = match.group(2)
@@ -141,17 +209,16 @@ class VehicleDataNormalizer:
                 return result[0].upper() + result[1:]
             
             # Padrão 2: Fallback - busca depois de números
-            match = re.search(r'\d+\s+\d+\s+((?:Carro|Caminhonete|Moto)\s+[A-Za-zÀ-ú0-9\s-]+?)\s+[A-Z]\d+', description, re.IGNORECASE)
+            match = MEGALEILOES_TITLE_AFTER_NUMBERS.search(description)
             if match:
                 vehicle_text = match.group(1).strip().lower()
                 return vehicle_text[0].upper() + vehicle_text[1:]
             
             # Padrão 3: Super fallback - marca conhecida
-            brands_pattern = r'(Ford|Fiat|Chevrolet|VW|Volkswagen|Renault|Honda|Toyota|Yamaha|Nissan|Hyundai|Citroen|Peugeot)'
-            match = re.search(rf'((?:Carro|Caminhonete|Moto)\s+{brands_pattern}[A-Za-zÀ-ú0-9\s]+)', description, re.IGNORECASE)
+            match = MEGALEILOES_TITLE_BRAND.search(description)
             if match:
                 vehicle_text = match.group(0).strip()
-                vehicle_text = re.sub(r'\s+[A-Z]\d+.*$', '', vehicle_text)
+                vehicle_text = TRAILING_CODE.sub('', vehicle_text)
                 vehicle_text = vehicle_text.lower()
                 return vehicle_text[0].upper() + vehicle_text[1:]
         
@@ -162,25 +229,25 @@ class VehicleDataNormalizer:
             clean_title = title
             
             # Remove "LOTE XX" do início
-            clean_title = re.sub(r'^LOTE\s+\d+\s+', '', clean_title, flags=re.IGNORECASE)
+            clean_title = LEADING_LOT.sub('', clean_title)
             
             # Remove HTML tags
-            clean_title = re.sub(r'<[^>]+>', '', clean_title)
+            clean_title = HTML_TAG.sub('', clean_title)
             
             # Remove vírgulas soltas no final
             clean_title = clean_title.rstrip(',').strip()
             
             # Remove "Placa FINAL X (UF)"
-            clean_title = re.sub(r'\s*,?\s*Placa\s+FINAL\s+\d+\s*\([A-Z]{2}\)\s*,?', '', clean_title, flags=re.IGNORECASE)
+            clean_title = PLATE_FINAL_SUFFIX.sub('', clean_title)
             
             # Remove underscores
             clean_title = clean_title.replace('_', ' ')
             
             # Remove zeros à esquerda de números (exemplo: "03" → "3", "Fan 125" mantém)
-            clean_title = re.sub(r'\b0+(\d+)\b', r'\1', clean_title)
+            clean_title = LEADING_ZEROS.sub(r'\1', clean_title)
             
             # Remove espaços duplicados
-            clean_title = re.sub(r'\s+', ' ', clean_title).strip()
+            clean_title = WHITESPACE.sub(' ', clean_title).strip()
             
             # Minúsculo + primeira maiúscula apenas
             clean_title = clean_title.lower()
@@ -198,35 +265,28 @@ class VehicleDataNormalizer:
         # ========================================
         return "Veículo"
     
-    def _get_brand(self, item: dict) -> Optional[str]:
-        """Extrai marca - title case"""
-        metadata = item.get('metadata', {})
-        
-        if 'veiculo' in metadata:
-            marca = metadata['veiculo'].get('marca')
+    def _get_brand(self, ctx: ExtractionContext) -> Optional[str]:
+        """Extrai marca - title case (chamado uma vez, pelo contexto: use ctx.brand)"""
+        if ctx.veiculo is not None:
+            marca = ctx.veiculo.get('marca')
             if marca:
                 return marca.strip().title()
         
-        text = f"{item.get('title', '')} {item.get('description', '')}".upper()
-        
-        for brand in self.KNOWN_BRANDS:
-            if brand in text:
-                return brand.title()
+        # Título primeiro: a descrição longa só é percorrida se o título não tiver marca
+        brand = self.BRAND_MATCHER.search(ctx.title) or self.BRAND_MATCHER.search(ctx.description)
         
-        return None
+        return brand.title() if brand else None
     
-    def _get_model(self, item: dict) -> Optional[str]:
+    def _get_model(self, ctx: ExtractionContext) -> Optional[str]:
         """Extrai modelo - title case"""
-        metadata = item.get('metadata', {})
-        
-        if 'veiculo' in metadata:
-            modelo = metadata['veiculo'].get('modelo')
+        if ctx.veiculo is not None:
+            modelo = ctx.veiculo.get('modelo')
             if modelo:
                 return modelo.strip().title()
         
-        brand = self._get_brand(item)
+        brand = ctx.brand
         if brand:
-            title = item.get('title', '').upper()
+            title = ctx.title.upper()
             model_part = title.replace(brand.upper(), '').strip()
             words = model_part.split()[:4]
             if words:
@@ -234,71 +294,68 @@ class VehicleDataNormalizer:
         
         return None
     
-    def _get_year(self, item: dict) -> Optional[str]:
+    def _get_year(self, ctx: ExtractionContext) -> Optional[str]:
         """Extrai ano"""
-        metadata = item.get('metadata', {})
-        
-        if 'veiculo' in metadata:
-            ano = metadata['veiculo'].get('ano')
+        if ctx.veiculo is not None:
+            ano = ctx.veiculo.get('ano')
             if ano:
                 return f"{ano}/{ano}"
         
-        text = f"{item.get('title', '')} {item.get('description', '')}"
-        
-        match = re.search(r'(\d{4})/(\d{4})', text)
+        match = YEAR_RANGE.search(ctx.text)
         if match:
             return f"{match.group(1)}/{match.group(2)}"
         
-        match = re.search(r'\b(20\d{2})\b', text)
+        match = YEAR_20XX.search(ctx.text)
         if match:
             year = match.group(1)
             return f"{year}/{year}"
         
         return None
     
-    def _get_plate(self, item: dict) -> Optional[str]:
+    def _get_plate(self, ctx: ExtractionContext) -> Optional[str]:
         """Extrai placa - formatada"""
-        metadata = item.get('metadata', {})
-        
-        if 'veiculo' in metadata:
-            placa = metadata['veiculo'].get('placa')
+        if ctx.veiculo is not None:
+            placa = ctx.veiculo.get('placa')
             if placa:
                 # Formata: "FINAL 7" → "Final 7"
                 return placa.strip().title()
         
-        text = f"{item.get('title', '')} {item.get('description', '')}".upper()
-        
         # Padrão: ABC-1234 ou ABC1D23
-        match = re.search(r'\b([A-Z]{3}[-\s]?\d[A-Z0-9]\d{2})\b', text)
+        match = PLATE.search(ctx.text_upper)
         if match:
             return match.group(1).replace(' ', '').upper()  # Placa fica maiúscula
         
-        # Padrão: "final 7" → "Final 7"
-        match = re.search(r'final\s+(\d)', text.lower())
+        # Padrão: "final 7" → "Final 7" (texto já em maiúsculas)
+        match = PLATE_FINAL.search(ctx.text_upper)
         if match:
             return f"Final {match.group(1)}"
         
         return None
     
-    def _get_clean_description(self, item: dict) -> str:
+    def _get_clean_description(self, ctx: ExtractionContext) -> str:
         """Limpa descrição"""
-        desc = item.get('description', '') or ''
+        desc = ctx.description or ''
         
         if not desc:
-            return item.get('description_preview', '') or ''
+            return ctx.item.get('description_preview', '') or ''
         
-        desc = re.sub(r'<[^>]+>', '\n', desc)
-        desc = re.sub(r'\n\s*\n+', '\n\n', desc)
-        desc = re.sub(r'\s+', ' ', desc)
+        desc = HTML_TAG.sub(' ', desc)
+        
+        # split/join colapsa os espaços em C (bem mais rápido que re.sub(r'\s+'));
+        # as pontas continuam contando no corte de 3000, como antes
+        collapsed = ' '.join(desc.split())
+        if collapsed:
+            collapsed = (' ' if desc[0].isspace() else '') + collapsed + (' ' if desc[-1].isspace() else '')
+        desc = collapsed
         
         if len(desc) > 3000:
             desc = desc[:2997] + '...'
         
         return desc.strip()
     
-    def _get_price(self, item: dict) -> Optional[float]:
+    def _get_price(self, ctx: ExtractionContext) -> Optional[float]:
         """Normaliza preço"""
-        value = item.get('value')
+        value = ctx.item.get('value')
         
         if value is None:
             return None
@@ -329,10 +386,10 @@ class VehicleDataNormalizer:
             return state
         return None
     
-    def _get_location(self, item: dict) -> Optional[str]:
+    def _get_location(self, ctx: ExtractionContext) -> Optional[str]:
         """Cria string de localização - Cidade/UF"""
-        city = self._format_city(item.get('city'))
-        state = self._validate_state(item.get('state'))
+        city = ctx.city
+        state = ctx.state
         
         if city and state:
             return f"{city}/{state}"
@@ -341,9 +398,9 @@ class VehicleDataNormalizer:
         elif state:
             return state
         
-        address = item.get('address', '')
+        address = ctx.item.get('address', '')
         if address:
-            match = re.search(r'([^/\-,]+)[\s/\-]+([A-Z]{2})\b', address)
+            match = ADDRESS_CITY_STATE.search(address)
             if match:
                 city_match = match.group(1).strip().title()
                 state_match = match.group(2).upper()
@@ -353,9 +410,10 @@ class VehicleDataNormalizer:
         
         return None
     
-    def _get_auction_info(self, item: dict) -> dict:
+    def _get_auction_info(self, ctx: ExtractionContext) -> dict:
         """Info do leilão"""
-        metadata = item.get('metadata', {})
+        item = ctx.item
+        metadata = ctx.metadata
         source = item.get('source', '')
         
         info = {
@@ -379,7 +437,118 @@ class VehicleDataNormalizer:
         return info
 
 
-def normalize_vehicles(items: List[dict]) -> List[dict]:
-    """Normaliza lista de veículos"""
-    normalizer = VehicleDataNormalizer()
-    return [normalizer.normalize(item) for item in items]
\ No newline at end of file
+# ============================================================
+# LOTES EM PARALELO
+# ============================================================
+
+# Normalizer de cada processo do pool (criado na primeira tarefa)
+_worker_normalizer = None
+
+
+def _worker() -> VehicleDataNormalizer:
+    global _worker_normalizer
+    if _worker_normalizer is None:
+        _worker_normalizer = VehicleDataNormalizer()
+    return _worker_normalizer
+
+
+def _normalize_chunk(items: List[dict]) -> List[dict]:
+    normalizer = _worker()
+    return [normalizer.normalize(item) for item in items]
+
+
+def _normalize_lines(lines: List[str]) -> List[str]:
+    """Lote NDJSON → NDJSON: parse e serialização também rodam no processo do pool"""
+    normalizer = _worker()
+    return [json.dumps(normalizer.normalize(json.loads(line)), ensure_ascii=False) for line in lines]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ordered_map(fn: Callable, chunks: Iterable[list], workers: int) -> Iterator[list]:
+    """
+    `fn` em cada lote num pool de processos, devolvendo na ordem de entrada
+    
+    No máximo 2 lotes por processo ficam em voo: a entrada é lida conforme
+    a saída é consumida, então a memória não cresce com o tamanho do arquivo.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def normalize_vehicles(items: List[dict], workers: int = 1, chunk_size: int = 500) -> List[dict]:
+    """Normaliza lista de veículos (workers > 1: pool de processos, mesma ordem da entrada)"""
+    if workers <= 1 or len(items) <= chunk_size:
+        normalizer = VehicleDataNormalizer()
+        return [normalizer.normalize(item) for item in items]
+    
+    return [item for chunk in _ordered_map(_normalize_chunk, _chunks(items, chunk_size), workers) for item in chunk]
+
+
+def normalize_ndjson(lines: Iterable[str], workers: Optional[int] = None, chunk_size: int = 1000) -> Iterator[str]:
+    """Linhas NDJSON → linhas NDJSON normalizadas, em ordem e com memória constante"""
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks((line for line in lines if line.strip()), chunk_size)
+    
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _normalize_lines(chunk)
+        return
+    
+    for chunk in _ordered_map(_normalize_lines, chunks, workers):
+        yield from chunk
+
+
+def main():
+    """Renormaliza snapshots: NDJSON (ou JSON com lista) → NDJSON"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Normaliza veículos em lote, em paralelo")
+    parser.add_argument('entrada', nargs='?', default='-',
+                        help='NDJSON (um item por linha), .json com lista (ex.: veiculos_data/) ou - para stdin')
+    parser.add_argument('-o', '--saida', default='-', help='NDJSON de saída (padrão: stdout)')
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--lote', type=int, default=1000, help='Itens por tarefa do pool')
+    args = parser.parse_args()
+    
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, encoding='utf-8')
+    saida = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8')
+    
+    # Lista JSON (gravada por run()) precisa ser lida inteira; NDJSON é lido em fluxo
+    if args.entrada.endswith('.json'):
+        lines = (json.dumps(item, ensure_ascii=False) for item in json.load(entrada))
+    else:
+        lines = entrada
+    
+    start = time.time()
+    total = 0
+    try:
+        for line in normalize_ndjson(lines, args.processos, args.lote):
+            saida.write(line + '\n')
+            total += 1
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+    
+    elapsed = max(time.time() - start, 1e-9)
+    print(f"✨ {total} itens normalizados em {elapsed:.1f}s ({total / elapsed:.0f} itens/s, "
+          f"{args.processos} processo(s))", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
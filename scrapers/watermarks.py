@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""WATERMARKS - Marca d'água por fonte para scraping incremental"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class WatermarkStore:
+    """
+    Maior id visto por fonte (ex.: "sodre:veiculos", "superbid:carros-motos")
+    
+    Com `enabled`, as fontes de API pedem os resultados do mais novo para o
+    mais antigo e param de paginar ao chegar na marca d'água. A cada
+    `resync_hours` (ou sem marca salva) a busca volta a ser completa, para
+    pegar edições e remoções. Fica em `<dir>/watermarks.json`.
+    
+    As marcas novas ficam pendentes (`stage`) e só vão para o disco com
+    `commit()`, depois que os itens foram enviados: se o upload falhar, a
+    próxima execução ainda busca esses lotes.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, resync_hours: Optional[float] = None):
+        cache_dir = cache_dir or os.getenv('SCRAPER_CACHE_DIR', '.cache')
+        resync_hours = resync_hours if resync_hours is not None else float(os.getenv('FULL_RESYNC_HOURS', '24'))
+        
+        self.path = Path(cache_dir) / 'watermarks.json'
+        self.resync = resync_hours * 3600
+        self.enabled = False
+        self.pending = {}
+        self._lock = threading.Lock()
+        self.stats = {'incremental': 0, 'full': 0, 'pages': 0, 'pages_avoided': 0}
+    
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def get(self, key: str) -> Optional[int]:
+        """Marca d'água para busca incremental, ou None se a busca deve ser completa"""
+        if not self.enabled:
+            return None
+        
+        entry = self._load().get(key) or {}
+        if entry.get('watermark') is None:
+            return None
+        if time.time() - entry.get('last_full_at', 0) > self.resync:
+            return None
+        
+        return entry['watermark']
+    
+    def stage(self, key: str, watermark: Optional[int], full: bool):
+        """Marca da execução, pendente até o commit (só chamar se a paginação terminou sem erro)"""
+        if watermark is not None:
+            with self._lock:
+                self.pending[key] = (watermark, full)
+    
+    def commit(self):
+        """Grava as marcas pendentes"""
+        with self._lock:
+            if not self.pending:
+                return
+            
+            data = self._load()
+            now = time.time()
+            
+            for key, (watermark, full) in self.pending.items():
+                entry = data.get(key) or {}
+                if full or entry.get('watermark') is None:
+                    entry['watermark'] = watermark
+                else:
+                    entry['watermark'] = max(entry['watermark'], watermark)
+                entry['updated_at'] = now
+                if full:
+                    entry['last_full_at'] = now
+                data[key] = entry
+            
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            tmp.replace(self.path)
+            self.pending = {}
+    
+    def record(self, incremental: bool, pages: int, pages_avoided: int = 0):
+        with self._lock:
+            self.stats['incremental' if incremental else 'full'] += 1
+            self.stats['pages'] += pages
+            self.stats['pages_avoided'] += max(0, pages_avoided)
+    
+    def print_report(self):
+        s = self.stats
+        if not s['incremental'] and not s['full']:
+            return
+        
+        print(f"💧 Incremental: {s['incremental']} busca(s) incrementais, {s['full']} completa(s), "
+              f"{s['pages']} págs baixadas, {s['pages_avoided']} págs evitadas")
+
+
+# Instância única do processo
+watermarks = WatermarkStore()